@@ -0,0 +1,94 @@
+"""
+Compara el formato de registro binario (AES-GCM) con los tokens Fernet:
+tamaño de la base de datos y velocidad de descifrado.
+
+Uso: python benchmark_records.py [número_de_entradas]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from modules.encryption import SecureEncryption
+
+SCHEMA = "CREATE TABLE password_entries (id INTEGER PRIMARY KEY, title TEXT NOT NULL, encrypted_password BLOB NOT NULL, password_salt BLOB NOT NULL, notes BLOB, notes_salt BLOB)"
+
+
+def build_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.executemany(
+        "INSERT INTO password_entries (title, encrypted_password, password_salt, notes, notes_salt) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(path)
+
+
+def read_all(path, encryption, data_key):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        "SELECT encrypted_password, password_salt, notes, notes_salt FROM password_entries"
+    ).fetchall()
+    conn.close()
+
+    start = time.perf_counter()
+    for enc_pwd, pwd_salt, enc_notes, notes_salt in rows:
+        encryption.decrypt_with_key(enc_pwd, pwd_salt, data_key)
+        if enc_notes:
+            encryption.decrypt_with_key(enc_notes, notes_salt, data_key)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    encryption = SecureEncryption()
+    data_key = encryption.generate_data_key()
+
+    fernet_rows = []
+    record_rows = []
+    for i in range(count):
+        password = f"Contraseña-{i:06d}!x"
+        notes = f"Nota de la entrada {i}" if i % 3 == 0 else None
+
+        enc_pwd, pwd_salt = encryption.encrypt_with_key(password, data_key)
+        enc_notes, notes_salt = (None, None)
+        if notes:
+            enc_notes, notes_salt = encryption.encrypt_with_key(notes, data_key)
+        fernet_rows.append((f"Entrada {i}", enc_pwd, pwd_salt, enc_notes, notes_salt))
+
+        record_rows.append(
+            (
+                f"Entrada {i}",
+                encryption.seal_record(password, data_key),
+                b"",
+                encryption.seal_record(notes, data_key) if notes else None,
+                None,
+            )
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, rows in (("Fernet", fernet_rows), ("AES-GCM", record_rows)):
+            path = os.path.join(tmp, f"{name}.db")
+            size = build_database(path, rows)
+            elapsed = read_all(path, encryption, data_key)
+            results[name] = (size, elapsed)
+
+    print(f"Entradas: {count}")
+    for name, (size, elapsed) in results.items():
+        print(
+            f"  {name:<8} {size / 1024:10.1f} KiB  {elapsed * 1000:9.1f} ms  {count / elapsed:10.0f} entradas/s"
+        )
+    fernet_size, fernet_time = results["Fernet"]
+    record_size, record_time = results["AES-GCM"]
+    print(
+        f"  Registro binario: {100 * (1 - record_size / fernet_size):.1f}% menos espacio, {fernet_time / record_time:.2f}x más rápido"
+    )
+
+
+if __name__ == "__main__":
+    main()
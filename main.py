@@ -7,10 +7,17 @@ import win32con
 import sys
 import os
 import json
-import shutil
 from tkinter import ttk
 
 from modules.config import APP_VERSION as CURRENT_VERSION
+from modules.bootstrap import (
+    PROFILE_FLAG,
+    PROFILE_CHILD_FLAG,
+    StartupProfiler,
+    get_data_dir,
+    prepare_data,
+    run_startup_profile,
+)
 
 # --- INICIO DE LÓGICA DE INSTANCIA ÚNICA ---
 # Variable global para mantener vivo el candado (Mutex)
@@ -52,24 +59,6 @@ def focus_existing_window():
 # --- FIN DE LÓGICA DE INSTANCIA ÚNICA ---
 
 
-def get_app_path():
-    """Obtiene la ruta donde se está ejecutando el .exe."""
-    if getattr(sys, "frozen", False):
-        return os.path.dirname(sys.executable)
-    return os.path.dirname(os.path.abspath(__file__))
-
-
-def get_persistent_data_path():
-    """Obtiene la ruta a la carpeta de datos segura y persistente del usuario en AppData\Local."""
-    app_data = os.getenv("LOCALAPPDATA")
-    if not app_data:
-        app_data = os.path.expanduser(r"~\AppData\Local")
-
-    path = os.path.join(app_data, "BIGestPwd")
-    os.makedirs(path, exist_ok=True)
-    return path
-
-
 def get_resource_path(relative_path):
     """Obtiene la ruta absoluta a un recurso (como icon.ico), funciona para desarrollo y para el .exe compilado."""
     try:
@@ -79,61 +68,33 @@ def get_resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
-def migrate_old_data():
-    """
-    Función de migración automática.
-    Revisa si existen datos en la ubicación antigua (junto al .exe) y los mueve a AppData.
-    Se ejecuta una sola vez.
-    """
-    old_data_path = os.path.join(get_app_path(), "data")
-    new_data_path = get_persistent_data_path()
-
-    if os.path.exists(old_data_path) and os.path.abspath(
-        old_data_path
-    ) != os.path.abspath(new_data_path):
-        old_db = os.path.join(old_data_path, "bigestpwd_secure.db")
-        if os.path.exists(old_db):
-            try:
-                for filename in os.listdir(old_data_path):
-                    old_file = os.path.join(old_data_path, filename)
-                    new_file = os.path.join(new_data_path, filename)
-                    if not os.path.exists(new_file):
-                        if os.path.isfile(old_file):
-                            shutil.copy2(old_file, new_file)
-                try:
-                    os.rename(old_data_path, old_data_path + "_migrated")
-                except:
-                    pass
-            except Exception:
-                pass
-
-
-# Ejecutar la migración ANTES de que cualquier otra parte del código intente acceder a los datos
-migrate_old_data()
-
-# Las constantes globales ahora usan la ruta de datos segura
-DATA_PATH = get_persistent_data_path()
+# Las constantes globales usan la ruta de datos segura
+DATA_PATH = get_data_dir()  # prepare_data() la crea al arrancar
 SETTINGS_FILE = os.path.join(DATA_PATH, "settings.json")
 
-
-from modules.auth_system_new import LoginSystemNew as LoginSystem
+# Solo lo necesario para llegar a la bandeja; el resto se importa al usarse
 from modules.encryption import db_manager
-from modules.main_app import MainApplication
+from modules.database import connection_provider
 from modules.components.virtual_keyboard import VirtualKeyboard
 from modules.utils.helpers import WindowHelper
 from modules.auth.multi_factor import MultiFactorAuth
 from modules.components.widgets import ModernWidgets
-from modules.release_notes import RELEASE_NOTES
 from modules.utils.afk_monitor import AFKMonitor
 from modules.utils.system_tray import AppTrayIcon
 from modules.utils.animator import WindowAnimator
+from modules.utils.task_executor import task_executor
+
+startup_profiler = StartupProfiler(enabled=PROFILE_CHILD_FLAG in sys.argv)
 
 
 class BIGestPwdApp:
     def __init__(self):
-        self.root = tk.Tk()
-        self.root.withdraw()
-        self.master_password = ""
+        with startup_profiler.stage("ventana Tk"):
+            self.root = tk.Tk()
+            self.root.withdraw()
+            task_executor.attach(self.root)
+        self.vault = None
+        self.main_app = None
         self.widgets = ModernWidgets()
         self.virtual_kb = VirtualKeyboard(self.root)
         self.mfa = MultiFactorAuth()
@@ -158,8 +119,10 @@ class BIGestPwdApp:
         self.is_closing = False
         self.is_window_visible = False
 
-        self.setup_system_tray()
-        self.setup_app_window()
+        with startup_profiler.stage("bandeja del sistema"):
+            self.setup_system_tray()
+        with startup_profiler.stage("base de datos y ventana"):
+            self.setup_app_window()
 
     def load_settings(self):
         try:
@@ -248,7 +211,7 @@ class BIGestPwdApp:
         self.root.lift()
         self.root.focus_force()
 
-        if not self.master_password:
+        if not self.vault:
             self.check_login_status()
 
     def minimize_to_tray(self):
@@ -268,6 +231,11 @@ class BIGestPwdApp:
             self.afk_monitor.stop()
         if self.tray_icon:
             self.tray_icon.stop()
+        if self.main_app:
+            self.main_app.close_session()
+        # os._exit no pasa por atexit: el cierre ordenado se hace aquí
+        task_executor.shutdown()
+        connection_provider.close_all()
         try:
             self.root.destroy()
         except:
@@ -290,9 +258,14 @@ class BIGestPwdApp:
         if not self.settings["afk_lock"]:
             return
 
-        if self.master_password and not self.is_closing:
-            self.master_password = ""
-            self.root.after(0, self._force_logout_afk)
+        if self.vault and not self.is_closing:
+            # Mismo cierre que el logout: nada sigue trabajando con la bóveda cerrada
+            if self.main_app:
+                self.main_app.close_session()
+                self.main_app = None
+            self.vault.close()
+            self.vault = None
+            self._force_logout_afk()
 
     def _force_logout_afk(self):
         if self.is_window_visible:
@@ -374,7 +347,11 @@ class BIGestPwdApp:
         self.confirm_entry = self.widgets.create_styled_entry(card, show="•")
         self.confirm_entry.pack(fill="x", ipady=6, pady=(0, 20))
 
+        setup_state = {"busy": False}
+
         def setup_master():
+            if setup_state["busy"]:
+                return
             master_pwd = self.master_entry.get()
             confirm_pwd = self.confirm_entry.get()
 
@@ -392,8 +369,16 @@ class BIGestPwdApp:
                 )
                 return
 
-            if db_manager.configure_master_password(master_pwd):
-                self.master_password = master_pwd
+            # Calibrar el KDF y derivar la llave lleva su tiempo: fuera del hilo de Tk
+            setup_state["busy"] = True
+            task_executor.submit(
+                self.configure_and_unlock, master_pwd, on_success=on_master_configured
+            )
+
+        def on_master_configured(vault):
+            setup_state["busy"] = False
+            if vault:
+                self.vault = vault
                 self.show_mfa_setup()
             else:
                 WindowHelper.show_custom_message(
@@ -419,6 +404,11 @@ class BIGestPwdApp:
         self.master_entry.bind("<Return>", lambda e: setup_master())
         self.confirm_entry.bind("<Return>", lambda e: setup_master())
 
+    def configure_and_unlock(self, master_pwd):
+        if not db_manager.configure_master_password(master_pwd):
+            return None
+        return db_manager.unlock(master_pwd)
+
     def show_mfa_setup(self):
         self.clear_window()
         from modules.components.mfa_setup import MFASetupWizard
@@ -427,12 +417,12 @@ class BIGestPwdApp:
         WindowHelper.center_window(self.root, 900, 700)
         self.mfa_wizard = MFASetupWizard(
             self.root,
-            self.master_password,
+            self.vault,
             on_complete_callback=self.on_mfa_setup_complete,
         )
 
     def on_mfa_setup_complete(self):
-        if self.master_password:
+        if self.vault:
             self.show_main_interface()
         else:
             self.show_login()
@@ -441,15 +431,20 @@ class BIGestPwdApp:
         self.clear_window()
         self.root.geometry("500x650")
         WindowHelper.center_window(self.root, 500, 650)
+        from modules.auth_system_new import LoginSystemNew as LoginSystem
+
         self.login_system = LoginSystem(self.root)
         self.login_system.create_login_interface(self.on_login_success)
 
-    def on_login_success(self, master_password):
-        self.master_password = master_password
+    def on_login_success(self, vault):
+        self.vault = vault
         self.show_main_interface()
 
     def on_logout(self):
-        self.master_password = ""
+        self.main_app = None
+        if self.vault:
+            self.vault.close()
+            self.vault = None
         self.show_login()
 
     def show_main_interface(self):
@@ -465,8 +460,10 @@ class BIGestPwdApp:
         if self.settings["privacy_mode"]:
             WindowHelper.set_display_affinity(self.root, True)
 
+        from modules.main_app import MainApplication
+
         self.main_app = MainApplication(
-            self.root, self.master_password, on_logout_callback=self.on_logout
+            self.root, self.vault, on_logout_callback=self.on_logout
         )
         self.check_version_and_show_news()
 
@@ -533,6 +530,8 @@ class BIGestPwdApp:
             fg="white",
         ).pack(anchor="w", pady=(0, 15))
 
+        from modules.release_notes import RELEASE_NOTES
+
         notes = RELEASE_NOTES.get(CURRENT_VERSION, [])
 
         if not notes:
@@ -606,9 +605,20 @@ class BIGestPwdApp:
 
 
 if __name__ == "__main__":
-    if not acquire_mutex():
+    if PROFILE_FLAG in sys.argv:
+        sys.exit(run_startup_profile(os.path.abspath(__file__), sys.argv[1:]))
+
+    profiling = PROFILE_CHILD_FLAG in sys.argv
+    if not profiling and not acquire_mutex():
         focus_existing_window()
         sys.exit(0)
 
+    # La migración de datos antiguos va antes de la primera conexión a la DB
+    with startup_profiler.stage("migración de datos"):
+        prepare_data()
+
     app = BIGestPwdApp()
+    startup_profiler.report_when_idle(
+        app.root, exit_callback=app.quit_app_completely if profiling else None
+    )
     app.root.mainloop()
@@ -1,8 +1,22 @@
 __version__ = "2.8.3"
 __author__ = "BIGestPwd Team"
 
-from .auth.multi_factor import MultiFactorAuth
-from .auth.totp_offline import TOTPOffline
-from .auth.usb_bypass import USBBypass
+import importlib
+
+# Carga diferida: importar el paquete no arrastra pyotp, qrcode ni psutil
+_LAZY_EXPORTS = {
+    "MultiFactorAuth": ".auth.multi_factor",
+    "TOTPOffline": ".auth.totp_offline",
+    "USBBypass": ".auth.usb_bypass",
+}
 
 __all__ = ["MultiFactorAuth", "TOTPOffline", "USBBypass"]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
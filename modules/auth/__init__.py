@@ -1,5 +1,19 @@
-from .multi_factor import MultiFactorAuth
-from .totp_offline import TOTPOffline
-from .usb_bypass import USBBypass
+import importlib
+
+# Carga diferida: TOTP y USB (pyotp, qrcode, psutil) solo cuando se usan
+_LAZY_EXPORTS = {
+    "MultiFactorAuth": ".multi_factor",
+    "TOTPOffline": ".totp_offline",
+    "USBBypass": ".usb_bypass",
+}
 
 __all__ = ["MultiFactorAuth", "TOTPOffline", "USBBypass"]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,5 +1,5 @@
-import sqlite3
 import os
+from modules.database import get_connection
 from modules.encryption import db_manager, DB_PATH
 
 
@@ -8,20 +8,16 @@ class MultiFactorAuth:
         self.db_path = db_path if db_path else DB_PATH
 
     def get_mfa_status(self):
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        cursor = conn.cursor()
+        cursor = get_connection(self.db_path).cursor()
         cursor.execute(
             "SELECT method_name, is_enabled, is_configured FROM mfa_config ORDER BY id"
         )
         methods = {}
         for row in cursor.fetchall():
             methods[row[0]] = {"enabled": bool(row[1]), "configured": bool(row[2])}
-        conn.close()
         return methods
 
     def update_mfa_method(self, method_name, enabled=None, configured=None):
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        cursor = conn.cursor()
         updates = []
         params = []
         if enabled is not None:
@@ -32,12 +28,11 @@ class MultiFactorAuth:
             params.append(configured)
         if updates:
             params.append(method_name)
-            cursor.execute(
-                f"UPDATE mfa_config SET {', '.join(updates)} WHERE method_name = ?",
-                params,
-            )
-        conn.commit()
-        conn.close()
+            with get_connection(self.db_path) as conn:
+                conn.execute(
+                    f"UPDATE mfa_config SET {', '.join(updates)} WHERE method_name = ?",
+                    params,
+                )
         return True
 
     def get_required_methods_count(self):
@@ -50,21 +45,24 @@ class MultiFactorAuth:
     def can_authenticate(self):
         return len(self.get_available_methods()) >= self.get_required_methods_count()
 
-    def validate_authentication(self, provided_methods, master_password=""):
+    def authenticate(self, provided_methods):
+        """Valida los métodos y devuelve la sesión desbloqueada (UnlockedVault) o None."""
         if len(provided_methods) < self.get_required_methods_count():
-            return False
+            return None
+
+        # La llave maestra es obligatoria: de ella sale la llave de la bóveda
+        vault = db_manager.unlock(provided_methods.get("master_password", ""))
+        if not vault:
+            return None
 
-        valid_methods_count = 0
+        valid_methods_count = 1
 
         for method, data in provided_methods.items():
             try:
-                if method == "master_password":
-                    if db_manager.verify_master_password(data):
-                        valid_methods_count += 1
-                elif method == "totp_offline":
+                if method == "totp_offline":
                     from .totp_offline import TOTPOffline
 
-                    if TOTPOffline(self.db_path).verify_code(data, master_password):
+                    if TOTPOffline(self.db_path).verify_code(data, vault):
                         valid_methods_count += 1
                 elif method == "usb_bypass":
                     from .usb_bypass import USBBypass
@@ -74,30 +72,27 @@ class MultiFactorAuth:
             except:
                 continue
 
-        return valid_methods_count >= self.get_required_methods_count()
+        if valid_methods_count >= self.get_required_methods_count():
+            return vault
+        vault.close()
+        return None
 
     def save_user_profile(self, display_name, is_anonymous=False):
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        cursor = conn.cursor()
         try:
-            cursor.execute("DELETE FROM user_profile")
-            cursor.execute(
-                "INSERT INTO user_profile (display_name, is_anonymous) VALUES (?, ?)",
-                (display_name, is_anonymous),
-            )
-            conn.commit()
+            with get_connection(self.db_path) as conn:
+                conn.execute("DELETE FROM user_profile")
+                conn.execute(
+                    "INSERT INTO user_profile (display_name, is_anonymous) VALUES (?, ?)",
+                    (display_name, is_anonymous),
+                )
             return True
         except:
             return False
-        finally:
-            conn.close()
 
     def get_user_profile(self):
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        cursor = conn.cursor()
+        cursor = get_connection(self.db_path).cursor()
         cursor.execute("SELECT display_name, is_anonymous FROM user_profile LIMIT 1")
         result = cursor.fetchone()
-        conn.close()
         if result:
             return {"display_name": result[0], "is_anonymous": bool(result[1])}
         return None
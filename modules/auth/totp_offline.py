@@ -3,11 +3,15 @@ import hashlib
 import time
 import sqlite3
 import secrets
-import qrcode
 import os
 from io import BytesIO
-import pyotp
-from modules.encryption import encryption_system, DB_PATH
+from modules.database import get_connection
+from modules.encryption import (
+    encryption_system,
+    DB_PATH,
+    KEY_VERSION_LEGACY,
+    KEY_VERSION_DATA_KEY,
+)
 
 
 class TOTPOffline:
@@ -15,15 +19,18 @@ class TOTPOffline:
         self.db_path = db_path if db_path else DB_PATH
 
     def generate_secret(self):
+        import pyotp
+
         return pyotp.random_base32()
 
-    def save_secret(self, secret, master_password):
-        encrypted_secret, secret_salt = encryption_system.encrypt_data(
-            secret, master_password
+    def save_secret(self, secret, vault):
+        data_key = vault.data_key
+        encrypted_secret, secret_salt = encryption_system.encrypt_with_key(
+            secret, data_key
         )
         backup_codes = self.generate_backup_codes()
-        encrypted_backup, backup_salt = encryption_system.encrypt_data(
-            ",".join(backup_codes), master_password
+        encrypted_backup, backup_salt = encryption_system.encrypt_with_key(
+            ",".join(backup_codes), data_key
         )
         return self._save_to_db(
             encrypted_secret, secret_salt, encrypted_backup, backup_salt, backup_codes
@@ -33,14 +40,18 @@ class TOTPOffline:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                with sqlite3.connect(
-                    self.db_path, check_same_thread=False, timeout=10.0
-                ) as conn:
+                with get_connection(self.db_path) as conn:
                     cursor = conn.cursor()
                     cursor.execute("DELETE FROM totp_secrets")
                     cursor.execute(
-                        "INSERT INTO totp_secrets (encrypted_secret, secret_salt, backup_codes, backup_salt) VALUES (?, ?, ?, ?)",
-                        (enc_secret, sec_salt, enc_backup, back_salt),
+                        "INSERT INTO totp_secrets (encrypted_secret, secret_salt, backup_codes, backup_salt, key_version) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            enc_secret,
+                            sec_salt,
+                            enc_backup,
+                            back_salt,
+                            KEY_VERSION_DATA_KEY,
+                        ),
                     )
                     conn.commit()
                 return return_value
@@ -51,22 +62,40 @@ class TOTPOffline:
                 return [] if isinstance(return_value, list) else False
         return []
 
-    def get_secret(self, master_password):
+    def get_secret(self, vault):
         try:
-            with sqlite3.connect(
-                self.db_path, check_same_thread=False, timeout=10.0
-            ) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT encrypted_secret, secret_salt FROM totp_secrets LIMIT 1"
+                    "SELECT encrypted_secret, secret_salt, backup_codes, backup_salt, key_version FROM totp_secrets LIMIT 1"
                 )
                 result = cursor.fetchone()
             if not result:
                 return None
-            return encryption_system.decrypt_data(result[0], result[1], master_password)
+            if result[4] == KEY_VERSION_LEGACY:
+                return self._reseal_legacy_secret(result, vault)
+            return encryption_system.decrypt_with_key(
+                result[0], result[1], vault.data_key
+            )
         except:
             return None
 
+    def _reseal_legacy_secret(self, row, vault):
+        # Secreto cifrado con PBKDF2 propio: se descifra una vez y se pasa a la llave de la bóveda
+        secret = encryption_system.decrypt_data(row[0], row[1], vault.master_password)
+        backup = None
+        if row[2] and row[3]:
+            backup = encryption_system.decrypt_data(
+                row[2], row[3], vault.master_password
+            )
+        data_key = vault.data_key
+        enc_secret, sec_salt = encryption_system.encrypt_with_key(secret, data_key)
+        enc_backup, back_salt = (None, None)
+        if backup is not None:
+            enc_backup, back_salt = encryption_system.encrypt_with_key(backup, data_key)
+        self._save_to_db(enc_secret, sec_salt, enc_backup, back_salt, True)
+        return secret
+
     def generate_backup_codes(self, count=8):
         return [
             "".join(
@@ -76,6 +105,10 @@ class TOTPOffline:
         ]
 
     def generate_qr_code(self, secret, username="BIGestPwd User"):
+        # qrcode y pyotp solo se cargan al configurar TOTP, no al arrancar
+        import pyotp
+        import qrcode
+
         try:
             totp = pyotp.TOTP(secret)
             uri = totp.provisioning_uri(name=username, issuer_name="BIGestPwd 2.8.2")
@@ -95,27 +128,20 @@ class TOTPOffline:
         except:
             return None, None
 
-    def verify_code(self, code, master_password):
-        secret = self.get_secret(master_password)
+    def verify_code(self, code, vault):
+        secret = self.get_secret(vault)
         if not secret:
             return False
+        import pyotp
+
         totp = pyotp.TOTP(secret)
         return totp.verify(code, valid_window=1)
 
     def is_configured(self):
         try:
-            with sqlite3.connect(self.db_path, check_same_thread=False) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM totp_secrets")
                 return cursor.fetchone()[0] > 0
         except:
             return False
-
-    def reencrypt_secret(self, old_pwd, new_pwd):
-        try:
-            secret = self.get_secret(old_pwd)
-            if not secret:
-                return False
-            return bool(self.save_secret(secret, new_pwd))
-        except:
-            return False
@@ -4,6 +4,9 @@ import sqlite3
 import time
 import threading
 from modules.security.file_encryption import FileEncryption
+from modules.security.secure_wipe import secure_wiper
+from modules.utils.task_executor import task_executor
+from modules.database import get_connection
 from modules.encryption import DB_PATH  # IMPORTACIÓN CLAVE: Usar la ruta correcta
 
 try:
@@ -73,7 +76,7 @@ class USBBypass:
         device_uuid = self.get_usb_uuid(device_path)
         with self.db_lock:
             try:
-                with sqlite3.connect(self.db_path, timeout=30.0) as conn:
+                with get_connection(self.db_path) as conn:
                     cursor = conn.cursor()
                     cursor.execute(
                         "SELECT COUNT(*) FROM usb_devices WHERE device_uuid = ? AND is_active = 1",
@@ -166,7 +169,7 @@ class USBBypass:
         if not devices:
             return False
         try:
-            with sqlite3.connect(self.db_path, timeout=5.0) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 for dev in devices:
                     uuid_val = self.get_usb_uuid(dev["path"])
@@ -177,9 +180,7 @@ class USBBypass:
                     blacklisted = cursor.fetchone()
                     if blacklisted:
                         if not blacklisted[0]:
-                            threading.Thread(
-                                target=self.clean_usb_files, args=(dev["path"],)
-                            ).start()
+                            task_executor.submit(self.clean_usb_files, dev["path"])
                         continue
                     cursor.execute(
                         "SELECT device_name FROM usb_devices WHERE device_uuid = ? AND is_active = 1",
@@ -194,7 +195,7 @@ class USBBypass:
     def remove_usb_device(self, device_uuid, device_name):
         with self.db_lock:
             try:
-                with sqlite3.connect(self.db_path) as conn:
+                with get_connection(self.db_path) as conn:
                     conn.execute(
                         "INSERT OR REPLACE INTO usb_blacklist (device_uuid, device_name, reason) VALUES (?, ?, 'Usuario revocó acceso')",
                         (device_uuid, device_name),
@@ -219,11 +220,12 @@ class USBBypass:
         folder = os.path.join(device_path, "BIGestPwd_Security")
         try:
             if os.path.exists(folder):
-                import shutil
-
-                shutil.rmtree(folder)
+                report = secure_wiper.wipe_tree(folder)
+                print(f"🧹 Limpieza USB: {report.summary()}")
+                if os.path.exists(folder):
+                    return False
                 uuid_val = self.get_usb_uuid(device_path)
-                with sqlite3.connect(self.db_path) as conn:
+                with get_connection(self.db_path) as conn:
                     conn.execute(
                         "UPDATE usb_blacklist SET cleaned = 1 WHERE device_uuid = ?",
                         (uuid_val,),
@@ -242,9 +244,10 @@ class USBBypass:
 
     def get_authorized_devices(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                rows = conn.execute(
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                rows = cursor.execute(
                     "SELECT * FROM usb_devices WHERE is_active = 1"
                 ).fetchall()
                 return [
@@ -7,6 +7,7 @@ from modules.auth.multi_factor import MultiFactorAuth
 from modules.auth.totp_offline import TOTPOffline
 from modules.auth.usb_bypass import USBBypass
 from modules.components.widgets import ModernWidgets
+from modules.utils.task_executor import task_executor
 
 
 class LoginSystemNew:
@@ -18,6 +19,8 @@ class LoginSystemNew:
         self.totp = TOTPOffline()
         self.usb = USBBypass()
         self.master_password = ""
+        self.login_task = None
+        self.usb_check_task = None
 
     def create_login_interface(self, on_success_callback):
         self.on_success_callback = on_success_callback
@@ -215,9 +218,24 @@ class LoginSystemNew:
             center_box, "Salir", self.root.quit, self.widgets.text_secondary, width=15
         ).pack(pady=15)
 
-    def verify_usb_status(self):
+    def verify_usb_status(self, on_detected=None):
+        """Busca la llave USB (psutil y DB) en el ejecutor; la ventana no se congela."""
+        if self.usb_check_task and not self.usb_check_task.done():
+            return
         try:
-            if self.usb.verify_device():
+            self.usb_status.config(text="🔍 Buscando...", fg=self.widgets.warning_color)
+            self.usb_login_btn.config(state="disabled", bg="#4b5563")
+        except:
+            return
+        self.usb_check_task = task_executor.submit(
+            self.usb.verify_device,
+            on_success=lambda detected: self.show_usb_status(detected, on_detected),
+            on_error=lambda e: self.show_usb_status(False),
+        )
+
+    def show_usb_status(self, detected, on_detected=None):
+        try:
+            if detected:
                 self.usb_status.config(
                     text="✅ USB Autorizado Detectado", fg=self.widgets.success_color
                 )
@@ -228,20 +246,19 @@ class LoginSystemNew:
                 )
                 self.usb_login_btn.config(state="disabled", bg="#4b5563")
         except:
-            pass
+            # La interfaz USB ya no está (cambio de modo o login hecho)
+            return
+        if detected and on_detected:
+            on_detected()
 
     def attempt_usb_login(self):
-        if self.usb.verify_device():
-            pwd = self.get_password_for_usb_login()
-            if pwd:
-                if db_manager.verify_master_password(pwd):
-                    self.on_success_callback(pwd)
-                else:
-                    WindowHelper.show_custom_message(
-                        self.root, "Error", "Contraseña incorrecta", is_error=True
-                    )
-        else:
-            self.verify_usb_status()
+        # Se vuelve a comprobar la llave: pudo retirarse tras la última búsqueda
+        self.verify_usb_status(on_detected=self.request_usb_unlock)
+
+    def request_usb_unlock(self):
+        pwd = self.get_password_for_usb_login()
+        if pwd:
+            self.start_login(db_manager.unlock, pwd, self.on_usb_login_result)
 
     def get_password_for_usb_login(self):
         win = tk.Toplevel(self.root)
@@ -306,19 +323,47 @@ class LoginSystemNew:
             )
             return
 
-        try:
-            methods = {"master_password": pwd}
-            if code:
-                methods["totp_offline"] = code
-            if self.mfa.validate_authentication(methods, pwd):
-                self.on_success_callback(pwd)
-            else:
-                WindowHelper.show_custom_message(
-                    self.root, "Error", "Credenciales inválidas", is_error=True
-                )
-                self.totp_entry.delete(0, tk.END)
-        except Exception as e:
-            WindowHelper.show_custom_message(self.root, "Error", str(e), is_error=True)
+        methods = {"master_password": pwd}
+        if code:
+            methods["totp_offline"] = code
+        self.start_login(self.mfa.authenticate, methods, self.on_totp_login_result)
+
+    def start_login(self, unlock_func, credentials, on_result):
+        """Deriva la llave en el ejecutor; la ventana sigue respondiendo."""
+        if self.login_task and not self.login_task.done():
+            return
+        self.root.config(cursor="watch")
+        self.login_task = task_executor.submit(
+            unlock_func,
+            credentials,
+            on_success=lambda vault: self.finish_login(vault, on_result),
+            on_error=self.on_login_error,
+        )
+
+    def finish_login(self, vault, on_result):
+        self.root.config(cursor="")
+        on_result(vault)
+
+    def on_login_error(self, e):
+        self.root.config(cursor="")
+        WindowHelper.show_custom_message(self.root, "Error", str(e), is_error=True)
+
+    def on_usb_login_result(self, vault):
+        if vault:
+            self.on_success_callback(vault)
+        else:
+            WindowHelper.show_custom_message(
+                self.root, "Error", "Contraseña incorrecta", is_error=True
+            )
+
+    def on_totp_login_result(self, vault):
+        if vault:
+            self.on_success_callback(vault)
+        else:
+            WindowHelper.show_custom_message(
+                self.root, "Error", "Credenciales inválidas", is_error=True
+            )
+            self.totp_entry.delete(0, tk.END)
 
     def switch_to_usb_mode(self):
         self.force_totp_mode = False
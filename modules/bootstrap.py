@@ -0,0 +1,171 @@
+"""Arranque explícito de la aplicación.
+
+Nada de lo que está aquí se ejecuta al importar: ``main.py`` llama a
+``prepare_data`` antes de tocar la base de datos y, con ``--profile-startup``,
+a ``run_startup_profile`` para medir el coste de cada subsistema.
+"""
+
+import os
+import sys
+import time
+import shutil
+import subprocess
+from contextlib import contextmanager
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_CHILD_FLAG = "--profile-child"
+
+
+def get_app_path():
+    """Ruta donde se ejecuta el .exe (o la raíz del proyecto en desarrollo)."""
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_data_dir():
+    """Ruta de la carpeta de datos en AppData\\Local, sin crearla."""
+    app_data = os.getenv("LOCALAPPDATA")
+    if not app_data:
+        app_data = os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    return os.path.join(app_data, "BIGestPwd")
+
+
+def get_persistent_data_path():
+    """Carpeta de datos segura y persistente del usuario (la crea si falta)."""
+    path = get_data_dir()
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def migrate_old_data():
+    """
+    Migración de la carpeta 'data' antigua (junto al .exe) a AppData.
+    Solo copia lo que aún no existe y renombra la carpeta para no repetirla.
+    """
+    old_data_path = os.path.join(get_app_path(), "data")
+    new_data_path = get_persistent_data_path()
+
+    if not os.path.isdir(old_data_path) or os.path.abspath(
+        old_data_path
+    ) == os.path.abspath(new_data_path):
+        return
+    if not os.path.exists(os.path.join(old_data_path, "bigestpwd_secure.db")):
+        return
+
+    try:
+        for filename in os.listdir(old_data_path):
+            old_file = os.path.join(old_data_path, filename)
+            new_file = os.path.join(new_data_path, filename)
+            if os.path.isfile(old_file) and not os.path.exists(new_file):
+                shutil.copy2(old_file, new_file)
+        try:
+            new_name = old_data_path + "_migrated"
+            if os.path.exists(new_name):
+                new_name = f"{old_data_path}_migrated_{int(time.time())}"
+            os.rename(old_data_path, new_name)
+        except:
+            pass
+    except Exception as e:
+        print(f"Error general en migración: {e}")
+
+
+def prepare_data():
+    """Paso único de arranque: deja los datos en AppData antes de abrir la DB."""
+    migrate_old_data()
+    return get_persistent_data_path()
+
+
+class StartupProfiler:
+    """Cronometra las etapas del arranque hasta el primer bucle de eventos ocioso."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        before = len(sys.modules)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - t0) * 1000
+            self.stages.append((name, elapsed, len(sys.modules) - before))
+
+    def report_when_idle(self, root, exit_callback=None):
+        if not self.enabled:
+            return
+
+        def on_idle():
+            total = (time.perf_counter() - self.start) * 1000
+            print("Etapas de arranque:")
+            for name, elapsed, modules in self.stages:
+                print(f"  {name:<28} {elapsed:8.1f} ms  (+{modules} módulos)")
+            print(f"  {'hasta bucle ocioso':<28} {total:8.1f} ms")
+            # Marca para el proceso padre: instante absoluto del bucle ocioso
+            print(f"IDLE_AT {time.perf_counter():.6f}", flush=True)
+            if exit_callback:
+                exit_callback()
+
+        root.after_idle(on_idle)
+
+
+def _subsystem(module_name):
+    parts = module_name.strip().split(".")
+    if parts[0] == "modules" and len(parts) > 1:
+        return ".".join(parts[:2])
+    return parts[0]
+
+
+def summarize_importtime(stderr_text, top=15):
+    """Agrupa la salida de ``-X importtime`` (tiempo propio) por subsistema."""
+    totals = {}
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _cumulative, name = line[len("import time:") :].split("|")
+            key = _subsystem(name)
+            totals[key] = totals.get(key, 0) + int(self_us)
+        except ValueError:
+            continue
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:top], sum(totals.values())
+
+
+def run_startup_profile(script_path, argv):
+    """Relanza la app con ``-X importtime`` y resume el coste por subsistema.
+
+    El proceso hijo se cierra en cuanto el bucle de eventos queda ocioso.
+    """
+    child_args = [a for a in argv if a != PROFILE_FLAG] + [PROFILE_CHILD_FLAG]
+    if getattr(sys, "frozen", False):
+        # Ejecutable compilado: sin -X importtime, solo etapas propias
+        command = [sys.executable] + child_args
+    else:
+        command = [sys.executable, "-X", "importtime", script_path] + child_args
+
+    launched_at = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True)
+
+    idle_ms = None
+    for line in result.stdout.splitlines():
+        if line.startswith("IDLE_AT "):
+            idle_ms = (float(line.split()[1]) - launched_at) * 1000
+        else:
+            print(line)
+
+    ranked, total_us = summarize_importtime(result.stderr)
+    if ranked:
+        print("Importaciones por subsistema (tiempo propio):")
+        for name, self_us in ranked:
+            print(f"  {name:<28} {self_us / 1000:8.1f} ms")
+        print(f"  {'total importaciones':<28} {total_us / 1000:8.1f} ms")
+    if idle_ms is not None:
+        print(f"Proceso lanzado -> bucle ocioso: {idle_ms:.1f} ms")
+    return result.returncode
@@ -0,0 +1,167 @@
+import re
+import sqlite3
+from modules.encryption import db_manager
+
+DEFAULT_CATEGORY_COLOR = "#3b82f6"
+CATEGORY_NAME_MAX = 40
+COLOR_PATTERN = re.compile(r"^#[0-9a-fA-F]{6}$")
+
+
+class CategoryService:
+    """
+    Categorías con caché en memoria. La lista se lee una vez y se invalida
+    con cada alta, cambio o borrado; los conteos por categoría salen de un
+    único GROUP BY y se repiten solo cuando cambian las entradas.
+    """
+
+    def __init__(self, manager=None):
+        self.manager = manager or db_manager
+        self._categories = None
+        self._by_id = {}
+        self._by_name = {}
+        self._counts = None
+        self._counts_version = None
+
+    def invalidate(self):
+        self._categories = None
+        self._counts = None
+
+    def _load(self):
+        if self._categories is not None:
+            return
+        try:
+            with self.manager._get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT id, name, color FROM categories ORDER BY name"
+                ).fetchall()
+        except:
+            rows = []
+        self._categories = [
+            {"id": row[0], "name": row[1], "color": row[2]} for row in rows
+        ]
+        self._by_id = {c["id"]: c for c in self._categories}
+        self._by_name = {c["name"]: c for c in self._categories}
+
+    def list_categories(self):
+        self._load()
+        return [dict(c) for c in self._categories]
+
+    def get(self, category_id):
+        self._load()
+        category = self._by_id.get(category_id)
+        return dict(category) if category else None
+
+    def get_id(self, name):
+        self._load()
+        category = self._by_name.get(name)
+        return category["id"] if category else None
+
+    def counts(self):
+        """Entradas por categoría (``None`` = sin categoría)."""
+        version = self.manager.entries_version
+        if self._counts is None or self._counts_version != version:
+            try:
+                with self.manager._get_connection() as conn:
+                    rows = conn.execute(
+                        "SELECT category_id, COUNT(*) FROM password_entries GROUP BY category_id"
+                    ).fetchall()
+                self._counts = dict(rows)
+                self._counts_version = version
+            except:
+                return {}
+        return dict(self._counts)
+
+    def _validate(self, name, color, current_id=None):
+        name = (name or "").strip()
+        if not name:
+            return None, "El nombre no puede estar vacío"
+        if len(name) > CATEGORY_NAME_MAX:
+            return None, f"Máximo {CATEGORY_NAME_MAX} caracteres"
+        if color is not None and not COLOR_PATTERN.match(color):
+            return None, "Color inválido (formato #RRGGBB)"
+        self._load()
+        existing = self._by_name.get(name)
+        if existing and existing["id"] != current_id:
+            return None, "Ya existe una categoría con ese nombre"
+        return name, None
+
+    def add_category(self, name, color=DEFAULT_CATEGORY_COLOR):
+        name, error = self._validate(name, color)
+        if error:
+            return False, error
+        try:
+            with self.manager.db_lock:
+                with self.manager._get_connection() as conn:
+                    conn.execute(
+                        "INSERT INTO categories (name, color) VALUES (?, ?)",
+                        (name, color),
+                    )
+                    conn.commit()
+        except sqlite3.IntegrityError:
+            return False, "Ya existe una categoría con ese nombre"
+        except Exception as e:
+            return False, f"Error: {e}"
+        finally:
+            self.invalidate()
+        return True, "Categoría creada"
+
+    def update_category(self, category_id, name=None, color=None):
+        """Renombra y/o cambia el color; lo que llega como ``None`` no cambia."""
+        current = self.get(category_id)
+        if current is None:
+            return False, "La categoría no existe"
+        name, error = self._validate(
+            current["name"] if name is None else name, color, category_id
+        )
+        if error:
+            return False, error
+        try:
+            with self.manager.db_lock:
+                with self.manager._get_connection() as conn:
+                    conn.execute(
+                        "UPDATE categories SET name = ?, color = ? WHERE id = ?",
+                        (name, color or current["color"], category_id),
+                    )
+                    conn.commit()
+        except sqlite3.IntegrityError:
+            return False, "Ya existe una categoría con ese nombre"
+        except Exception as e:
+            return False, f"Error: {e}"
+        finally:
+            self.invalidate()
+        return True, "Categoría actualizada"
+
+    def rename_category(self, category_id, name):
+        return self.update_category(category_id, name=name)
+
+    def recolor_category(self, category_id, color):
+        return self.update_category(category_id, color=color)
+
+    def delete_category(self, category_id, move_to=None):
+        """Borra la categoría; sus entradas pasan a ``move_to`` o quedan sin categoría."""
+        if self.get(category_id) is None:
+            return False, "La categoría no existe"
+        if move_to == category_id or (
+            move_to is not None and self.get(move_to) is None
+        ):
+            return False, "Categoría de destino inválida"
+        try:
+            with self.manager.db_lock:
+                with self.manager._get_connection() as conn:
+                    # foreign_keys está activo: primero se sueltan las entradas
+                    moved = conn.execute(
+                        "UPDATE password_entries SET category_id = ? WHERE category_id = ?",
+                        (move_to, category_id),
+                    ).rowcount
+                    conn.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+                    conn.commit()
+                    if moved:
+                        self.manager.entries_version += 1
+        except Exception as e:
+            return False, f"Error: {e}"
+        finally:
+            self.invalidate()
+        return True, "Categoría eliminada"
+
+
+category_service = CategoryService()
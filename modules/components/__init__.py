@@ -1,27 +1,30 @@
-from .modals import PasswordGeneratorModal, PasswordEditModal
-from .virtual_keyboard import VirtualKeyboard
-from .widgets import ModernWidgets
-from .mfa_setup import MFASetupWizard
-from .usb_detector import USBDetector
+import importlib
 
-from .security_modals import (
-    PasswordChangeModal,
-    USBManagementModal,
-    TOTPManagementModal,
-    USBSetupModal,
-    SecurityVerificationModal,
-)
+# Carga diferida: cada componente se importa la primera vez que se usa
+_LAZY_EXPORTS = {
+    "PasswordGeneratorModal": ".modals",
+    "PasswordEditModal": ".modals",
+    "CategoryManagerModal": ".modals",
+    "VirtualKeyboard": ".virtual_keyboard",
+    "ModernWidgets": ".widgets",
+    "MFASetupWizard": ".mfa_setup",
+    "USBDetector": ".usb_detector",
+    "TreeRenderer": ".tree_renderer",
+    "PasswordChangeModal": ".security_modals",
+    "USBManagementModal": ".security_modals",
+    "TOTPManagementModal": ".security_modals",
+    "KdfSettingsModal": ".security_modals",
+    "USBSetupModal": ".security_modals",
+    "SecurityVerificationModal": ".security_modals",
+}
 
-__all__ = [
-    "PasswordGeneratorModal",
-    "PasswordEditModal",
-    "VirtualKeyboard",
-    "ModernWidgets",
-    "MFASetupWizard",
-    "USBDetector",
-    "PasswordChangeModal",
-    "USBManagementModal",
-    "TOTPManagementModal",
-    "USBSetupModal",
-    "SecurityVerificationModal",
-]
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
 import secrets
-import pyotp
 import webbrowser
 from modules.auth.multi_factor import MultiFactorAuth
 from modules.auth.totp_offline import TOTPOffline
@@ -10,9 +9,9 @@ from modules.components.widgets import ModernWidgets
 
 
 class MFASetupWizard:
-    def __init__(self, parent, master_password, on_complete_callback):
+    def __init__(self, parent, vault, on_complete_callback):
         self.parent = parent
-        self.master_password = master_password
+        self.vault = vault
         self.on_complete_callback = on_complete_callback
         self.widgets = ModernWidgets()
         self.mfa = MultiFactorAuth()
@@ -527,13 +526,23 @@ class MFASetupWizard:
     def on_verify_code_input(self, e):
         code = self.verify_code_var.get().strip()
         if len(code) == 6 and code.isdigit():
+            import pyotp
+
             totp = pyotp.TOTP(self.totp_secret)
             if totp.verify(code, valid_window=1):
                 self.verify_status.config(
                     text="✅ Correcto", fg=self.widgets.success_color
                 )
+                if not self.vault:
+                    WindowHelper.show_custom_message(
+                        self.parent,
+                        "Error",
+                        "Inicia sesión con tu llave maestra para activar TOTP.",
+                        is_error=True,
+                    )
+                    return
                 self.totp_verified = True
-                backups = self.totp.save_secret(self.totp_secret, self.master_password)
+                backups = self.totp.save_secret(self.totp_secret, self.vault)
                 self.mfa.update_mfa_method(
                     "totp_offline", enabled=True, configured=True
                 )
@@ -694,7 +703,9 @@ class MFASetupWizard:
             sel_dev = next((d for d in devs if d["uuid"] == selected.get()), None)
             if sel_dev:
                 res, msg = usb.register_usb_device(
-                    sel_dev["name"], sel_dev["path"], self.master_password
+                    sel_dev["name"],
+                    sel_dev["path"],
+                    self.vault.master_password if self.vault else "",
                 )
                 if res:
                     WindowHelper.show_custom_message(win, "Éxito", "USB Configurado")
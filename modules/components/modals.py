@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox, colorchooser
 from .virtual_keyboard import VirtualKeyboard
 import string
 import secrets
@@ -10,6 +10,7 @@ from modules.utils.helpers import (
 )
 from modules.components.widgets import ModernWidgets
 from modules.encryption import db_manager
+from modules.categories import category_service, DEFAULT_CATEGORY_COLOR
 from modules.utils.clipboard_security import ClipboardManager
 
 
@@ -275,10 +276,10 @@ class PasswordGeneratorModal:
 
 
 class PasswordEditModal:
-    def __init__(self, parent, password_data, master_password, on_save_callback):
+    def __init__(self, parent, password_data, vault, on_save_callback):
         self.parent = parent
         self.password_data = password_data
-        self.master_password = master_password
+        self.vault = vault
         self.on_save_callback = on_save_callback
         self.widgets = ModernWidgets()
         self.password_visible = False
@@ -322,7 +323,7 @@ class PasswordEditModal:
         tk.Label(form_frame, text="Categoría:", **lbl_style).grid(
             row=0, column=0, padx=(0, 15), pady=10, sticky="e"
         )
-        categories = db_manager.get_categories()
+        categories = category_service.list_categories()
         cat_names = [cat["name"] for cat in categories]
         self.category_var = tk.StringVar(value=self.password_data["category"])
         cat_combo = ttk.Combobox(
@@ -455,8 +456,7 @@ class PasswordEditModal:
             )
             return
 
-        cats = db_manager.get_categories()
-        cat_id = next((c["id"] for c in cats if c["name"] == cat_name), None)
+        cat_id = category_service.get_id(cat_name)
         if not cat_id:
             WindowHelper.show_custom_message(
                 self.modal, "Error", "Categoría inválida", is_error=True
@@ -471,7 +471,7 @@ class PasswordEditModal:
             pwd,
             url,
             notes,
-            self.master_password,
+            self.vault,
         )
         if success:
             self.on_save_callback()
@@ -480,3 +480,206 @@ class PasswordEditModal:
             WindowHelper.show_custom_message(
                 self.modal, "Error", "No se pudo guardar", is_error=True
             )
+
+
+class CategoryManagerModal:
+    NO_CATEGORY = "Sin categoría"
+
+    def __init__(self, parent, on_change_callback=None):
+        self.parent = parent
+        self.on_change_callback = on_change_callback
+        self.widgets = ModernWidgets()
+        self.selected_id = None
+        self.create_modal()
+
+    def create_modal(self):
+        self.modal = tk.Toplevel(self.parent)
+        self.modal.title("🏷️ Categorías")
+        self.modal.configure(bg="#0a0a0a")
+        self.modal.minsize(460, 520)
+        self.modal.transient(self.parent)
+        self.modal.grab_set()
+        main_frame = tk.Frame(self.modal, bg="#0a0a0a", padx=25, pady=20)
+        main_frame.pack(fill="both", expand=True)
+
+        tk.Label(
+            main_frame,
+            text="🏷️ Gestionar Categorías",
+            font=("Segoe UI", 16, "bold"),
+            bg="#0a0a0a",
+            fg="white",
+        ).pack(anchor="w", pady=(0, 15))
+
+        list_frame = tk.Frame(main_frame, bg="#0a0a0a")
+        list_frame.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(
+            list_frame, columns=("Nombre", "Entradas"), show="headings", height=8
+        )
+        self.tree.heading("Nombre", text="Nombre")
+        self.tree.heading("Entradas", text="Entradas")
+        self.tree.column("Nombre", width=260)
+        self.tree.column("Entradas", width=90, anchor="center")
+        sb = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=sb.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+        form_frame = tk.Frame(main_frame, bg="#0a0a0a")
+        form_frame.pack(fill="x", pady=15)
+        form_frame.grid_columnconfigure(1, weight=1)
+        lbl_style = {"font": ("Segoe UI", 10, "bold"), "bg": "#0a0a0a", "fg": "white"}
+
+        tk.Label(form_frame, text="Nombre:", **lbl_style).grid(
+            row=0, column=0, padx=(0, 10), pady=5, sticky="e"
+        )
+        self.name_var = tk.StringVar()
+        self.widgets.create_styled_entry(form_frame, self.name_var).grid(
+            row=0, column=1, columnspan=2, sticky="ew", pady=5, ipady=4
+        )
+
+        tk.Label(form_frame, text="Color:", **lbl_style).grid(
+            row=1, column=0, padx=(0, 10), pady=5, sticky="e"
+        )
+        self.color_var = tk.StringVar(value=DEFAULT_CATEGORY_COLOR)
+        self.color_swatch = tk.Label(
+            form_frame, bg=DEFAULT_CATEGORY_COLOR, width=4, relief="flat"
+        )
+        self.color_swatch.grid(row=1, column=1, sticky="w", pady=5)
+        self.widgets.create_modern_button(
+            form_frame, "🎨 Elegir", self.choose_color, "#6b7280"
+        ).grid(row=1, column=2, sticky="e", pady=5)
+
+        tk.Label(form_frame, text="Al eliminar, mover a:", **lbl_style).grid(
+            row=2, column=0, padx=(0, 10), pady=5, sticky="e"
+        )
+        self.move_var = tk.StringVar(value=self.NO_CATEGORY)
+        self.move_combo = ttk.Combobox(
+            form_frame, textvariable=self.move_var, state="readonly"
+        )
+        self.move_combo.grid(row=2, column=1, columnspan=2, sticky="ew", pady=5)
+
+        btn_frame = tk.Frame(main_frame, bg="#0a0a0a")
+        btn_frame.pack(fill="x", side="bottom")
+        self.widgets.create_modern_button(
+            btn_frame, "➕ Añadir", self.add_category, self.widgets.success_color
+        ).pack(side="left", padx=(0, 5))
+        self.save_btn = self.widgets.create_modern_button(
+            btn_frame, "💾 Guardar", self.save_category, self.widgets.accent_color
+        )
+        self.save_btn.pack(side="left", padx=5)
+        self.delete_btn = self.widgets.create_modern_button(
+            btn_frame, "🗑️ Eliminar", self.delete_category, self.widgets.danger_color
+        )
+        self.delete_btn.pack(side="left", padx=5)
+        self.widgets.create_modern_button(
+            btn_frame, "Cerrar", self.modal.destroy, "#6b7280"
+        ).pack(side="right")
+
+        self.refresh_list()
+        WindowHelper.center_window(self.modal, 460, 520)
+
+    def refresh_list(self):
+        categories = category_service.list_categories()
+        counts = category_service.counts()
+        self.tree.delete(*self.tree.get_children())
+        for cat in categories:
+            tag = f"color_{cat['color'].lstrip('#')}"
+            self.tree.tag_configure(tag, foreground=cat["color"])
+            self.tree.insert(
+                "",
+                "end",
+                iid=str(cat["id"]),
+                values=(cat["name"], counts.get(cat["id"], 0)),
+                tags=(tag,),
+            )
+        self.move_combo["values"] = [self.NO_CATEGORY] + [c["name"] for c in categories]
+        if self.selected_id is not None and self.tree.exists(str(self.selected_id)):
+            self.tree.selection_set(str(self.selected_id))
+        else:
+            self.selected_id = None
+        self.update_buttons()
+
+    def update_buttons(self):
+        state = "normal" if self.selected_id is not None else "disabled"
+        self.save_btn.config(state=state)
+        self.delete_btn.config(state=state)
+
+    def on_select(self, e):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        self.selected_id = int(sel[0])
+        cat = category_service.get(self.selected_id)
+        if cat:
+            self.name_var.set(cat["name"])
+            self.set_color(cat["color"])
+        self.update_buttons()
+
+    def set_color(self, color):
+        self.color_var.set(color)
+        self.color_swatch.config(bg=color)
+
+    def choose_color(self):
+        color = colorchooser.askcolor(
+            self.color_var.get(), parent=self.modal, title="Color de la categoría"
+        )[1]
+        if color:
+            self.set_color(color)
+
+    def show_result(self, ok, message):
+        if not ok:
+            WindowHelper.show_custom_message(
+                self.modal, "Error", message, is_error=True
+            )
+            return
+        self.refresh_list()
+        if self.on_change_callback:
+            self.on_change_callback()
+
+    def add_category(self):
+        ok, message = category_service.add_category(
+            self.name_var.get(), self.color_var.get()
+        )
+        if ok:
+            self.selected_id = category_service.get_id(self.name_var.get().strip())
+        self.show_result(ok, message)
+
+    def save_category(self):
+        if self.selected_id is None:
+            return
+        self.show_result(
+            *category_service.update_category(
+                self.selected_id, self.name_var.get(), self.color_var.get()
+            )
+        )
+
+    def delete_category(self):
+        if self.selected_id is None:
+            return
+        cat = category_service.get(self.selected_id)
+        if cat is None:
+            return
+        count = category_service.counts().get(self.selected_id, 0)
+        move_name = self.move_var.get()
+        move_to = category_service.get_id(move_name)
+        if move_to == self.selected_id:
+            WindowHelper.show_custom_message(
+                self.modal,
+                "Error",
+                "Elige otra categoría de destino",
+                is_error=True,
+            )
+            return
+        if not messagebox.askyesno(
+            "Eliminar",
+            f"¿Eliminar '{cat['name']}'? Sus {count} entradas pasarán a '{move_name}'.",
+            parent=self.modal,
+        ):
+            return
+        ok, message = category_service.delete_category(self.selected_id, move_to)
+        if ok:
+            self.selected_id = None
+            self.name_var.set("")
+            self.move_var.set(self.NO_CATEGORY)
+        self.show_result(ok, message)
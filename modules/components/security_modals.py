@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from modules.encryption import db_manager, encryption_system
+from modules.encryption import db_manager
+from modules.utils.task_executor import task_executor
 from modules.components.virtual_keyboard import VirtualKeyboard
 from modules.utils.helpers import WindowHelper
 from modules.auth.multi_factor import MultiFactorAuth
@@ -9,13 +10,12 @@ from modules.auth.usb_bypass import USBBypass
 from modules.components.widgets import ModernWidgets
 from PIL import Image, ImageTk
 import io
-import sqlite3
 
 
 class PasswordChangeModal:
-    def __init__(self, parent, master_password, on_success_callback=None):
+    def __init__(self, parent, vault, on_success_callback=None):
         self.parent = parent
-        self.current_master_password = master_password
+        self.vault = vault
         self.on_success_callback = on_success_callback
         self.widgets = ModernWidgets()
         self.virtual_kb = VirtualKeyboard(parent)
@@ -48,7 +48,7 @@ class PasswordChangeModal:
         ).pack(pady=(0, 10))
         tk.Label(
             main_frame,
-            text="Esta acción re-encriptará todas tus contraseñas.",
+            text="Tus contraseñas se mantienen; solo se re-envuelve la llave de la bóveda.",
             font=("Segoe UI", 10),
             bg=self.widgets.bg_color,
             fg=self.widgets.text_secondary,
@@ -127,7 +127,7 @@ class PasswordChangeModal:
         btn_frame.pack(fill="x", side="bottom", pady=10)
         self.change_btn = self.widgets.create_modern_button(
             btn_frame,
-            "🔄 Re-encriptar Todo",
+            "🔄 Cambiar Llave",
             self.change_master_password,
             self.widgets.success_color,
             width=20,
@@ -204,11 +204,7 @@ class PasswordChangeModal:
     def change_master_password(self):
         current_password = self.current_password_var.get()
         new_password = self.new_password_var.get()
-        if not db_manager.verify_master_password(current_password):
-            WindowHelper.show_custom_message(
-                self.modal, "Error", "Contraseña actual incorrecta", is_error=True
-            )
-            return
+        # La contraseña actual la comprueba el propio cambio, fuera del hilo de Tk
         if current_password == new_password:
             WindowHelper.show_custom_message(
                 self.modal,
@@ -218,82 +214,74 @@ class PasswordChangeModal:
             )
             return
         if messagebox.askyesno(
-            "Confirmar Re-encriptación",
-            "Esto re-encriptará TODAS tus contraseñas.\n¿Estás seguro?",
+            "Confirmar Cambio",
+            "Se cambiará la llave maestra de la bóveda.\n¿Estás seguro?",
             parent=self.modal,
         ):
             self.execute_password_change(current_password, new_password)
 
     def execute_password_change(self, current_password, new_password):
         self.change_btn.config(text="⏳ Procesando...", state="disabled")
-        self.modal.update()
-        success = self.update_master_password_and_data(current_password, new_password)
+
+        def on_progress(done, total):
+            if total and self.modal.winfo_exists():
+                self.change_btn.config(text=f"⏳ Re-sellando {done}/{total}...")
+
+        # El re-sellado de entradas antiguas va por lotes fuera del hilo de Tk
+        task_executor.submit(
+            self.update_master_password_and_data,
+            current_password,
+            new_password,
+            on_progress=on_progress,
+            on_success=lambda result: self.on_password_change_finished(
+                result, new_password
+            ),
+        )
+
+    def on_password_change_finished(self, result, new_password):
+        success, message = result
+        # La sesión debe conocer la nueva llave aunque el modal ya se cerrara
+        if success and self.on_success_callback:
+            self.on_success_callback(new_password)
+        if not self.modal.winfo_exists():
+            return
         if success:
             WindowHelper.show_custom_message(
                 self.parent,
                 "Éxito",
                 "Llave maestra actualizada.\nUsa la nueva contraseña la próxima vez.",
             )
-            if self.on_success_callback:
-                self.on_success_callback(new_password)
             self.modal.destroy()
         else:
             WindowHelper.show_custom_message(
-                self.modal, "Error", "Error crítico al cambiar la llave", is_error=True
+                self.modal, "Error", message, is_error=True
             )
-            self.change_btn.config(text="🔄 Re-encriptar Todo", state="normal")
+            self.change_btn.config(text="🔄 Cambiar Llave", state="normal")
 
-    def update_master_password_and_data(self, old_password, new_password):
+    def update_master_password_and_data(
+        self, old_password, new_password, progress_callback=None
+    ):
+        """Devuelve (éxito, mensaje de error)."""
         try:
-            if not db_manager.verify_master_password(old_password):
-                print("❌ Contraseña antigua inválida")
-                return False
-
-            entries = db_manager.get_password_entries(old_password)
-
             if self.totp.is_configured():
-                self.totp.reencrypt_secret(old_password, new_password)
-
-            new_master_hash, new_master_salt = encryption_system.hash_master_password(
-                new_password
-            )
-
-            with sqlite3.connect(db_manager.db_path, check_same_thread=False) as conn:
-                cursor = conn.cursor()
-
-                cursor.execute(
-                    "UPDATE master_config SET master_hash = ?, master_salt = ?",
-                    (new_master_hash, new_master_salt),
-                )
-
-                for entry in entries:
-                    enc_pwd, pwd_salt = encryption_system.encrypt_data(
-                        entry["password"], new_password
-                    )
-                    enc_notes, notes_salt = (None, None)
-                    if entry["notes"]:
-                        enc_notes, notes_salt = encryption_system.encrypt_data(
-                            entry["notes"], new_password
-                        )
-
-                    cursor.execute(
-                        """
-                        UPDATE password_entries 
-                        SET encrypted_password = ?, password_salt = ?, notes = ?, notes_salt = ? 
-                        WHERE id = ?
-                    """,
-                        (enc_pwd, pwd_salt, enc_notes, notes_salt, entry["id"]),
-                    )
-
-                conn.commit()
-
-            return True
+                # Un secreto TOTP antiguo aún depende de la contraseña: se pasa a la llave de la bóveda
+                self.totp.get_secret(self.vault)
+
+            if not db_manager.change_master_password(
+                old_password, new_password, progress_callback
+            ):
+                return False, "Error crítico al cambiar la llave"
+
+            return True, ""
+        except ValueError as e:
+            # Contraseña actual incorrecta o bóveda bloqueada
+            return False, str(e)
         except Exception as e:
             print(f"❌ Error crítico actualizando DB: {e}")
             import traceback
 
             traceback.print_exc()
-            return False
+            return False, "Error crítico al cambiar la llave"
 
 
 class USBManagementModal:
@@ -422,9 +410,9 @@ class USBManagementModal:
 
 
 class TOTPManagementModal:
-    def __init__(self, parent, master_password, on_success_callback=None):
+    def __init__(self, parent, vault, on_success_callback=None):
         self.parent = parent
-        self.master_password = master_password
+        self.vault = vault
         self.on_success_callback = on_success_callback
         self.widgets = ModernWidgets()
         self.totp = TOTPOffline()
@@ -485,7 +473,7 @@ class TOTPManagementModal:
 
     def regenerate_qr(self):
         try:
-            secret = self.totp.get_secret(self.master_password)
+            secret = self.totp.get_secret(self.vault)
             if not secret:
                 raise Exception("No se pudo desencriptar el secreto")
             mfa = MultiFactorAuth()
@@ -504,12 +492,168 @@ class TOTPManagementModal:
             if self.on_success_callback:
                 self.on_success_callback()
 
-        w = MFASetupWizard(
-            self.modal, self.master_password, on_complete_callback=on_done
-        )
+        w = MFASetupWizard(self.modal, self.vault, on_complete_callback=on_done)
         w.show_step(2)
 
 
+class KdfSettingsModal:
+    TARGET_OPTIONS = {
+        "Rápido (~150 ms)": 150,
+        "Equilibrado (~300 ms)": 300,
+        "Reforzado (~750 ms)": 750,
+        "Máximo (~1500 ms)": 1500,
+    }
+
+    def __init__(self, parent, vault, on_success_callback=None):
+        self.parent = parent
+        self.vault = vault
+        self.on_success_callback = on_success_callback
+        self.widgets = ModernWidgets()
+        self.create_modal()
+
+    def create_modal(self):
+        from modules.security.kdf import KDF_LABELS, available_algorithms
+
+        self.modal = tk.Toplevel(self.parent)
+        self.modal.title("⏱️ Derivación de la Llave")
+        self.modal.configure(bg=self.widgets.bg_color)
+        try:
+            self.modal.iconbitmap("icon.ico")
+        except:
+            pass
+        self.modal.geometry("480x420")
+        self.modal.transient(self.parent)
+        self.modal.grab_set()
+        main_frame = tk.Frame(self.modal, bg=self.widgets.bg_color, padx=30, pady=30)
+        main_frame.pack(fill="both", expand=True)
+        tk.Label(
+            main_frame,
+            text="⏱️ Derivación de la Llave",
+            font=("Segoe UI", 18, "bold"),
+            bg=self.widgets.bg_color,
+            fg="white",
+        ).pack(pady=(0, 10))
+        tk.Label(
+            main_frame,
+            text="El coste se mide en este equipo para el tiempo de desbloqueo elegido.",
+            font=("Segoe UI", 10),
+            bg=self.widgets.bg_color,
+            fg=self.widgets.text_secondary,
+            wraplength=400,
+        ).pack(pady=(0, 15))
+
+        settings = db_manager.get_kdf_settings()
+        self.current_label = tk.Label(
+            main_frame,
+            text=f"Actual: {settings['params'].describe()}",
+            font=("Segoe UI", 10, "bold"),
+            bg=self.widgets.bg_color,
+            fg="white",
+            wraplength=400,
+        )
+        self.current_label.pack(anchor="w", pady=(0, 15))
+
+        form_frame = tk.Frame(main_frame, bg=self.widgets.bg_color)
+        form_frame.pack(fill="x")
+        form_frame.grid_columnconfigure(1, weight=1)
+        lbl_style = {
+            "font": ("Segoe UI", 10, "bold"),
+            "bg": self.widgets.bg_color,
+            "fg": "white",
+            "anchor": "w",
+        }
+
+        self.algorithms = {KDF_LABELS[a]: a for a in available_algorithms()}
+        tk.Label(form_frame, text="Algoritmo:", **lbl_style).grid(
+            row=0, column=0, pady=8, sticky="w"
+        )
+        self.algorithm_var = tk.StringVar(
+            value=KDF_LABELS.get(settings["params"].algorithm, "PBKDF2-SHA256")
+        )
+        ttk.Combobox(
+            form_frame,
+            textvariable=self.algorithm_var,
+            values=list(self.algorithms),
+            state="readonly",
+        ).grid(row=0, column=1, sticky="ew", padx=(10, 0))
+
+        tk.Label(form_frame, text="Desbloqueo:", **lbl_style).grid(
+            row=1, column=0, pady=8, sticky="w"
+        )
+        current_target = next(
+            (
+                label
+                for label, ms in self.TARGET_OPTIONS.items()
+                if ms == settings["target_ms"]
+            ),
+            "Equilibrado (~300 ms)",
+        )
+        self.target_var = tk.StringVar(value=current_target)
+        ttk.Combobox(
+            form_frame,
+            textvariable=self.target_var,
+            values=list(self.TARGET_OPTIONS),
+            state="readonly",
+        ).grid(row=1, column=1, sticky="ew", padx=(10, 0))
+
+        self.result_label = tk.Label(
+            main_frame,
+            text="",
+            font=("Segoe UI", 9),
+            bg=self.widgets.bg_color,
+            fg=self.widgets.text_secondary,
+            wraplength=400,
+        )
+        self.result_label.pack(anchor="w", pady=15)
+
+        btn_frame = tk.Frame(main_frame, bg=self.widgets.bg_color)
+        btn_frame.pack(fill="x", side="bottom", pady=10)
+        self.apply_btn = self.widgets.create_modern_button(
+            btn_frame,
+            "📏 Calibrar y Aplicar",
+            self.apply_settings,
+            self.widgets.success_color,
+            width=20,
+        )
+        self.apply_btn.pack(side="right", padx=5)
+        self.widgets.create_modern_button(
+            btn_frame, "Cerrar", self.modal.destroy, self.widgets.text_secondary
+        ).pack(side="right", padx=5)
+        WindowHelper.center_window(self.modal, 480, 420)
+
+    def apply_settings(self):
+        algorithm = self.algorithms[self.algorithm_var.get()]
+        target_ms = self.TARGET_OPTIONS[self.target_var.get()]
+        self.apply_btn.config(text="⏳ Midiendo...", state="disabled")
+
+        # La calibración deriva varias veces: fuera del hilo de Tk
+        task_executor.submit(
+            db_manager.apply_kdf_settings,
+            self.vault,
+            algorithm,
+            target_ms,
+            on_success=self.on_settings_applied,
+        )
+
+    def on_settings_applied(self, result):
+        if not self.modal.winfo_exists():
+            return
+        self.apply_btn.config(text="📏 Calibrar y Aplicar", state="normal")
+        if not result:
+            WindowHelper.show_custom_message(
+                self.modal, "Error", "No se pudo aplicar el KDF", is_error=True
+            )
+            return
+        params, measured_ms = result
+        self.current_label.config(text=f"Actual: {params.describe()}")
+        self.result_label.config(
+            text=f"✅ Desbloqueo medido: {measured_ms:.0f} ms",
+            fg=self.widgets.success_color,
+        )
+        if self.on_success_callback:
+            self.on_success_callback()
+
+
 class TOTPQRModal:
     def __init__(self, parent, qr_image, title="Escanea este código"):
         self.widgets = ModernWidgets()
@@ -589,17 +733,26 @@ class USBSetupModal:
 
     def scan(self):
         self.scan_btn.config(text="Buscando...", state="disabled")
-        self.modal.update()
         for w in self.list_frame.winfo_children():
             w.destroy()
+        # Enumerar unidades puede tardar segundos: fuera del hilo de Tk
+        task_executor.submit(
+            self.find_new_devices,
+            on_success=self.show_devices,
+            on_error=self.show_scan_error,
+        )
+
+    def find_new_devices(self):
+        connected = self.usb.detect_real_usb_devices()
+        authorized = [d["uuid"] for d in self.usb.get_authorized_devices()]
+        return [
+            d for d in connected if self.usb.get_usb_uuid(d["path"]) not in authorized
+        ]
+
+    def show_devices(self, available):
+        if not self.modal.winfo_exists():
+            return
         try:
-            connected = self.usb.detect_real_usb_devices()
-            authorized = [d["uuid"] for d in self.usb.get_authorized_devices()]
-            available = [
-                d
-                for d in connected
-                if self.usb.get_usb_uuid(d["path"]) not in authorized
-            ]
             if not available:
                 tk.Label(
                     self.list_frame,
@@ -625,9 +778,16 @@ class USBSetupModal:
                         width=10,
                     ).pack(side="right")
         except Exception as e:
-            tk.Label(
-                self.list_frame, text=f"Error: {e}", fg="red", bg=self.widgets.card_bg
-            ).pack()
+            self.show_scan_error(e)
+            return
+        self.scan_btn.config(text="🔄 Escanear", state="normal")
+
+    def show_scan_error(self, e):
+        if not self.modal.winfo_exists():
+            return
+        tk.Label(
+            self.list_frame, text=f"Error: {e}", fg="red", bg=self.widgets.card_bg
+        ).pack()
         self.scan_btn.config(text="🔄 Escanear", state="normal")
 
     def configure(self, device):
@@ -0,0 +1,183 @@
+from bisect import bisect_left
+
+RENDER_FIRST_CHUNK = 60  # una pantalla: se pinta sin esperar al bucle de Tk
+RENDER_CHUNK_SIZE = 500
+RENDER_CHUNK_DELAY_MS = 1
+
+
+class TreeRenderer:
+    """Pinta filas en un Treeview aplicando solo las diferencias.
+
+    Cada fila usa como iid el id de la base de datos y el color de estado se
+    aplica con una etiqueta compartida por color, no una por fila.
+    Las listas grandes se pintan por tramos con ``render_progressive``.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.order = []
+        self.rows = {}
+        self._status_tags = set()
+        self._steps = None
+        self._after_id = None
+
+    def status_tag(self, color):
+        tag = f"status_{color.lstrip('#')}"
+        if tag not in self._status_tags:
+            self.tree.tag_configure(tag, foreground=color)
+            self._status_tags.add(tag)
+        return tag
+
+    def render(self, rows):
+        """``rows`` es una lista ordenada de ``(db_id, values, color)``."""
+        self.cancel()
+        for _ in self._render_steps(rows, len(rows) + 1, len(rows) + 1):
+            pass
+
+    def render_progressive(
+        self,
+        rows,
+        first_chunk=RENDER_FIRST_CHUNK,
+        chunk_size=RENDER_CHUNK_SIZE,
+        on_progress=None,
+        on_done=None,
+    ):
+        """Como ``render``, pero solo el primer tramo se pinta ya.
+
+        El resto se pinta en tramos de ``chunk_size`` programados con
+        ``after``; ``on_progress(hechas, total)`` se llama tras cada tramo y
+        ``on_done(total)`` al terminar. Un nuevo render o ``cancel`` lo detiene.
+        """
+        self.cancel()
+        total = len(rows)
+        steps = self._render_steps(rows, first_chunk, chunk_size)
+
+        def step():
+            self._after_id = None
+            try:
+                done = next(steps)
+            except StopIteration:
+                self._steps = None
+                if on_done:
+                    on_done(total)
+                return
+            if on_progress:
+                on_progress(done, total)
+            self._after_id = self.tree.after(RENDER_CHUNK_DELAY_MS, step)
+
+        self._steps = steps
+        step()
+
+    def cancel(self):
+        """Detiene un render por tramos a medias."""
+        if self._after_id is not None:
+            try:
+                self.tree.after_cancel(self._after_id)
+            except:
+                pass
+            self._after_id = None
+        if self._steps is not None:
+            self._steps.close()
+            self._steps = None
+            # Quedan filas antiguas sin recolocar: el orden real es el del árbol
+            try:
+                self.order = [int(iid) for iid in self.tree.get_children()]
+            except:
+                self.order = []
+                self.rows = {}
+
+    def _render_steps(self, rows, first_chunk, chunk_size):
+        """Aplica las diferencias y cede el control tras cada tramo de filas."""
+        wanted = {db_id: (tuple(values), color) for db_id, values, color in rows}
+        desired = [db_id for db_id, _, _ in rows]
+
+        removed = [db_id for db_id in self.order if db_id not in wanted]
+        if removed:
+            self.tree.delete(*[str(db_id) for db_id in removed])
+            for db_id in removed:
+                del self.rows[db_id]
+            self.order = [db_id for db_id in self.order if db_id in wanted]
+
+        stable = self._stable_ids(desired)
+        # Filas antiguas aún sin colocar; sin ninguna, las nuevas van al final
+        pending_old = len(self.order)
+        previous = None
+        limit = first_chunk
+        for done, db_id in enumerate(desired):
+            if done == limit:
+                yield done
+                limit += chunk_size
+            iid = str(db_id)
+            values, color = wanted[db_id]
+
+            if db_id not in self.rows:
+                self.tree.insert(
+                    "",
+                    self._index_after(previous) if pending_old else "end",
+                    iid=iid,
+                    values=values,
+                    tags=(self.status_tag(color),),
+                )
+            else:
+                pending_old -= 1
+                if db_id not in stable:
+                    self._move_after(iid, previous)
+                if self.rows[db_id] != (values, color):
+                    self.tree.item(iid, values=values, tags=(self.status_tag(color),))
+
+            self.rows[db_id] = (values, color)
+            previous = iid
+
+        self.order = desired
+
+    def set_color(self, db_id, color):
+        row = self.rows.get(db_id)
+        if row is None or row[1] == color:
+            return
+        self.tree.item(str(db_id), tags=(self.status_tag(color),))
+        self.rows[db_id] = (row[0], color)
+
+    def clear(self):
+        self.cancel()
+        if self.order:
+            self.tree.delete(*[str(db_id) for db_id in self.order])
+        self.order = []
+        self.rows = {}
+
+    def _index_after(self, previous):
+        return 0 if previous is None else self.tree.index(previous) + 1
+
+    def _move_after(self, iid, previous):
+        # move cuenta la posición sin la propia fila: si está antes de
+        # ``previous``, todo lo que sigue se adelanta un puesto
+        index = self._index_after(previous)
+        if index and self.tree.index(iid) < index:
+            index -= 1
+        self.tree.move(iid, "", index)
+
+    def _stable_ids(self, desired):
+        # Las filas que ya están en orden relativo correcto (subsecuencia
+        # creciente más larga) no se mueven; solo se recolocan las demás
+        position = {db_id: i for i, db_id in enumerate(self.order)}
+        kept = [db_id for db_id in desired if db_id in position]
+
+        tails = []
+        tail_ids = []
+        parent = {}
+        for db_id in kept:
+            pos = position[db_id]
+            k = bisect_left(tails, pos)
+            parent[db_id] = tail_ids[k - 1] if k else None
+            if k == len(tails):
+                tails.append(pos)
+                tail_ids.append(db_id)
+            else:
+                tails[k] = pos
+                tail_ids[k] = db_id
+
+        stable = set()
+        db_id = tail_ids[-1] if tail_ids else None
+        while db_id is not None:
+            stable.add(db_id)
+            db_id = parent[db_id]
+        return stable
@@ -0,0 +1,92 @@
+import atexit
+import os
+import sqlite3
+import threading
+from modules.migrations import migrate
+
+# Se aplican una sola vez, al abrir cada conexión
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=20000",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA foreign_keys=ON",
+)
+CACHED_STATEMENTS = 256
+
+
+class ConnectionProvider:
+    """Conexiones SQLite de larga vida, una por hilo y por base de datos.
+
+    Las conexiones se reutilizan (sin reconectar ni re-parsear sentencias) y
+    se cierran todas al salir. ``with conn:`` sigue sirviendo para confirmar o
+    deshacer la transacción, pero ya no cierra la conexión. La DB no se toca
+    hasta la primera conexión, que es la que aplica las migraciones.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._migrated = set()
+
+    def get_connection(self, db_path):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        conn = connections.get(db_path)
+        if conn is None:
+            conn = self._open(db_path)
+            connections[db_path] = conn
+            with self._lock:
+                self._prune_dead_threads()
+                self._connections[(threading.get_ident(), db_path)] = (
+                    threading.current_thread(),
+                    conn,
+                )
+        return conn
+
+    def _open(self, db_path):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            timeout=20.0,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            if db_path not in self._migrated:
+                migrate(conn)
+                self._migrated.add(db_path)
+        return conn
+
+    def _prune_dead_threads(self):
+        for key, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                try:
+                    conn.close()
+                except:
+                    pass
+                del self._connections[key]
+
+    def close_all(self):
+        with self._lock:
+            for thread, conn in self._connections.values():
+                try:
+                    conn.close()
+                except:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+connection_provider = ConnectionProvider()
+atexit.register(connection_provider.close_all)
+
+
+def get_connection(db_path):
+    return connection_provider.get_connection(db_path)
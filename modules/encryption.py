@@ -1,271 +1,279 @@
 import os
-import sys
+import re
 import base64
+import hmac
 import sqlite3
 import threading
-import shutil
+import time
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
+from modules.bootstrap import get_data_dir
+from modules.database import get_connection
+from modules.security.kdf import (
+    KdfParams,
+    DEFAULT_TARGET_MS,
+    KDF_PBKDF2_SHA256,
+    available_algorithms,
+    calibrate,
+    derive_key,
+    measure_ms,
+)
+
+# Solo rutas: la carpeta se crea al abrir la primera conexión, no al importar
+DB_PATH = os.path.join(get_data_dir(), "bigestpwd_secure.db")
+SALT_PATH = os.path.join(get_data_dir(), "salt.key")
+
+# Versiones de cifrado de las entradas (columna key_version)
+KEY_VERSION_LEGACY = 0  # PBKDF2 por campo con la contraseña maestra
+KEY_VERSION_DATA_KEY = 1  # Subllave por entrada derivada de la llave de la bóveda
+KEY_VERSION_RECORD = 2  # Registro binario AEAD, sin columna de sal
+
+# Registro binario: versión (1 byte) | nonce (12) | texto cifrado AES-GCM | tag (16)
+RECORD_VERSION_AESGCM = 0x02
+RECORD_NONCE_SIZE = 12
+# password_salt es NOT NULL en bases existentes; los registros no la usan
+RECORD_EMPTY_SALT = b""
+# master_hash/master_salt son NOT NULL; con llave envuelta no se usan
+MASTER_HASH_UNUSED = b""
+
+ENTRY_LIST_SQL = "SELECT p.id, c.name, c.color, p.title, p.username, p.url, p.created_at, p.updated_at, p.notes IS NOT NULL, p.strength, p.created_epoch, p.updated_epoch FROM password_entries p LEFT JOIN categories c ON p.category_id = c.id"
+ENTRY_SORT_COLUMNS = {
+    "title": "p.title",
+    "username": "COALESCE(p.username, '')",
+    "created": "COALESCE(p.created_epoch, 0)",
+    "updated": "COALESCE(p.updated_epoch, p.created_epoch, 0)",
+}
+ENTRY_FTS_JOIN = " JOIN password_entries_fts ON password_entries_fts.rowid = p.id"
+ENTRY_SELECT_SQL = "SELECT p.id, c.name, c.color, p.title, p.username, p.encrypted_password, p.password_salt, p.url, p.notes, p.notes_salt, p.created_at, p.updated_at, p.key_version FROM password_entries p LEFT JOIN categories c ON p.category_id = c.id"
 
 
-def _get_old_base_path():
-    if getattr(sys, "frozen", False):
-        return os.path.dirname(sys.executable)
-    else:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        return os.path.dirname(current_dir)
-
-
-def get_persistent_data_path():
-    # Obtener ruta segura AppData
-    app_data = os.getenv("LOCALAPPDATA")
-    if not app_data:
-        app_data = os.path.expanduser(r"~\AppData\Local")
-
-    path = os.path.join(app_data, "BIGestPwd")
-    os.makedirs(path, exist_ok=True)
-    return path
-
+class SecureEncryption:
+    def __init__(self):
+        self.backend = default_backend()
 
-def migrate_old_data():
-    """
-    Migración Forzada:
-    Si existe la carpeta 'data' antigua, copia TODO su contenido a AppData,
-    sobrescribiendo los archivos vacíos que se hayan creado al iniciar.
-    """
-    old_data_path = os.path.join(_get_old_base_path(), "data")
-    new_data_path = get_persistent_data_path()
+    def derive_key_from_password(
+        self, password: str, salt: bytes, params: KdfParams = None
+    ) -> bytes:
+        # Sin parámetros: PBKDF2 de 100k, el de entradas antiguas y bóvedas previas
+        return base64.urlsafe_b64encode(derive_key(password, salt, params))
 
-    # Solo migrar si la carpeta antigua existe y NO ha sido renombrada todavía
-    if os.path.exists(old_data_path) and os.path.isdir(old_data_path):
-        print(f"Detectados datos antiguos en: {old_data_path}. Iniciando migración...")
+    def generate_salt(self) -> bytes:
+        return os.urandom(32)
 
-        migrated_any = False
+    def verify_master_password(
+        self, password: str, stored_hash: bytes, salt: bytes, params: KdfParams = None
+    ) -> bool:
         try:
-            # Recorrer todos los archivos en la carpeta vieja (db, salt, settings, etc.)
-            for filename in os.listdir(old_data_path):
-                source_file = os.path.join(old_data_path, filename)
-
-                # Solo copiar archivos, ignorar subcarpetas
-                if os.path.isfile(source_file):
-                    dest_file = os.path.join(new_data_path, filename)
-
-                    try:
-                        # Copy2 preserva metadatos y SOBRESCRIBE si ya existe (esto arregla tu problema)
-                        shutil.copy2(source_file, dest_file)
-                        print(f" -> Migrado: {filename}")
-                        migrated_any = True
-                    except Exception as e:
-                        print(f"Error copiando {filename}: {e}")
-
-            # Si logramos copiar algo, renombramos la carpeta vieja para no hacerlo de nuevo
-            if migrated_any:
-                try:
-                    new_name = old_data_path + "_migrated"
-                    if os.path.exists(new_name):
-                        # Si ya existía una carpeta migrated (raro), forzamos nombre único
-                        import time
-
-                        new_name = f"{old_data_path}_migrated_{int(time.time())}"
-
-                    os.rename(old_data_path, new_name)
-                    print("Migración completada y carpeta antigua renombrada.")
-                except Exception as e:
-                    print(
-                        f"No se pudo renombrar la carpeta antigua (quizás permisos): {e}"
-                    )
-
-        except Exception as e:
-            print(f"Error general en migración: {e}")
+            return hmac.compare_digest(derive_key(password, salt, params), stored_hash)
+        except:
+            return False
 
+    def encrypt_data(self, data: str, password: str) -> tuple[bytes, bytes]:
+        salt = self.generate_salt()
+        key = self.derive_key_from_password(password, salt)
+        cipher_suite = Fernet(key)
+        if isinstance(data, str):
+            data = data.encode()
+        encrypted_data = cipher_suite.encrypt(data)
+        return encrypted_data, salt
 
-# Ejecutar migración ANTES de definir las rutas de DB
-migrate_old_data()
+    def decrypt_data(self, encrypted_data: bytes, salt: bytes, password: str) -> str:
+        try:
+            key = self.derive_key_from_password(password, salt)
+            cipher_suite = Fernet(key)
+            decrypted_data = cipher_suite.decrypt(encrypted_data)
+            return decrypted_data.decode("utf-8")
+        except:
+            raise ValueError("Error desencriptando")
 
-DB_PATH = os.path.join(get_persistent_data_path(), "bigestpwd_secure.db")
-SALT_PATH = os.path.join(get_persistent_data_path(), "salt.key")
+    def generate_data_key(self) -> bytes:
+        return Fernet.generate_key()
 
+    def wrap_data_key(
+        self, data_key: bytes, password: str, params: KdfParams = None
+    ) -> tuple[bytes, bytes]:
+        salt = self.generate_salt()
+        cipher_suite = Fernet(self.derive_key_from_password(password, salt, params))
+        return cipher_suite.encrypt(data_key), salt
 
-class SecureEncryption:
-    def __init__(self):
-        self.backend = default_backend()
+    def unwrap_data_key(
+        self, wrapped_key: bytes, salt: bytes, password: str, params: KdfParams = None
+    ) -> bytes:
+        try:
+            cipher_suite = Fernet(self.derive_key_from_password(password, salt, params))
+            return cipher_suite.decrypt(wrapped_key)
+        except:
+            raise ValueError("Error desencriptando")
 
-    def derive_key_from_password(self, password: str, salt: bytes) -> bytes:
-        if isinstance(password, str):
-            password = password.encode()
-        kdf = PBKDF2HMAC(
+    def derive_entry_key(self, data_key: bytes, salt: bytes) -> bytes:
+        # HKDF es barato: una subllave por campo sin repetir el PBKDF2
+        hkdf = HKDF(
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=100000,
+            info=b"BIGestPwd-entry",
             backend=self.backend,
         )
-        key = kdf.derive(password)
+        key = hkdf.derive(base64.urlsafe_b64decode(data_key))
         return base64.urlsafe_b64encode(key)
 
-    def generate_salt(self) -> bytes:
-        return os.urandom(32)
-
-    def hash_master_password(self, password: str) -> tuple[bytes, bytes]:
+    def encrypt_with_key(self, data: str, data_key: bytes) -> tuple[bytes, bytes]:
         salt = self.generate_salt()
-        kdf = PBKDF2HMAC(
+        cipher_suite = Fernet(self.derive_entry_key(data_key, salt))
+        if isinstance(data, str):
+            data = data.encode()
+        encrypted_data = cipher_suite.encrypt(data)
+        return encrypted_data, salt
+
+    def derive_record_key(self, data_key: bytes) -> bytes:
+        hkdf = HKDF(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=salt,
-            iterations=100000,
+            salt=None,
+            info=b"BIGestPwd-record-v2",
             backend=self.backend,
         )
-        if isinstance(password, str):
-            password = password.encode()
-        hashed = kdf.derive(password)
-        return hashed, salt
+        return hkdf.derive(base64.urlsafe_b64decode(data_key))
 
-    def verify_master_password(
-        self, password: str, stored_hash: bytes, salt: bytes
-    ) -> bool:
-        try:
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-                backend=self.backend,
-            )
-            if isinstance(password, str):
-                password = password.encode()
-            test_hash = kdf.derive(password)
-            return test_hash == stored_hash
-        except:
-            return False
+    def derive_hmac_key(self, data_key: bytes) -> bytes:
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b"BIGestPwd-password-hmac",
+            backend=self.backend,
+        )
+        return hkdf.derive(base64.urlsafe_b64decode(data_key))
 
-    def encrypt_data(self, data: str, password: str) -> tuple[bytes, bytes]:
-        salt = self.generate_salt()
-        key = self.derive_key_from_password(password, salt)
-        cipher_suite = Fernet(key)
+    def password_hmac(self, password: str, data_key: bytes) -> bytes:
+        """Huella de la contraseña: igual para contraseñas iguales, inútil sin la llave."""
+        return hmac.new(
+            self.derive_hmac_key(data_key), password.encode(), "sha256"
+        ).digest()
+
+    def seal_record(self, data: str, data_key: bytes) -> bytes:
+        """Cifra en un registro binario crudo; el byte de versión va autenticado."""
         if isinstance(data, str):
             data = data.encode()
-        encrypted_data = cipher_suite.encrypt(data)
-        return encrypted_data, salt
+        header = bytes([RECORD_VERSION_AESGCM])
+        nonce = os.urandom(RECORD_NONCE_SIZE)
+        cipher = AESGCM(self.derive_record_key(data_key))
+        return header + nonce + cipher.encrypt(nonce, data, header)
 
-    def decrypt_data(self, encrypted_data: bytes, salt: bytes, password: str) -> str:
+    def open_record(self, record: bytes, data_key: bytes) -> str:
         try:
-            key = self.derive_key_from_password(password, salt)
-            cipher_suite = Fernet(key)
+            header = record[:1]
+            nonce = record[1 : 1 + RECORD_NONCE_SIZE]
+            cipher = AESGCM(self.derive_record_key(data_key))
+            plaintext = cipher.decrypt(nonce, record[1 + RECORD_NONCE_SIZE :], header)
+            return plaintext.decode("utf-8")
+        except:
+            raise ValueError("Error desencriptando")
+
+    def is_record(self, encrypted_data: bytes) -> bool:
+        # Los tokens Fernet son base64 y empiezan por "g"; nunca por 0x02
+        return bool(encrypted_data) and encrypted_data[0] == RECORD_VERSION_AESGCM
+
+    def decrypt_with_key(
+        self, encrypted_data: bytes, salt: bytes, data_key: bytes
+    ) -> str:
+        """Lee tanto registros binarios como tokens Fernet con subllave por sal."""
+        if self.is_record(encrypted_data):
+            return self.open_record(encrypted_data, data_key)
+        try:
+            cipher_suite = Fernet(self.derive_entry_key(data_key, salt))
             decrypted_data = cipher_suite.decrypt(encrypted_data)
             return decrypted_data.decode("utf-8")
         except:
             raise ValueError("Error desencriptando")
 
 
-class DatabaseManager:
-    def __init__(self, encryption_system: SecureEncryption):
-        self.encryption = encryption_system
-        self.db_path = DB_PATH
-        self.db_lock = threading.Lock()
-        self.setup_database()
-        self.repair_database_tables()
+def _decrypt_entry_row(row, data_key, master_password):
+    """
+    Descifra una fila de ENTRY_SELECT_SQL. Devuelve None si la fila no se puede
+    leer.
+    """
+    try:
+        if row[12] == KEY_VERSION_LEGACY:
 
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False, timeout=20.0)
+            def decrypt(blob, salt):
+                return encryption_system.decrypt_data(blob, salt, master_password)
 
-    def setup_database(self):
-        with self.db_lock:
-            with self._get_connection() as conn:
-                conn.execute("PRAGMA journal_mode=WAL")
-                cursor = conn.cursor()
+        else:
 
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS master_config (id INTEGER PRIMARY KEY, master_hash BLOB NOT NULL, master_salt BLOB NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
-                )
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, color TEXT DEFAULT '#3b82f6', created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
-                )
+            def decrypt(blob, salt):
+                return encryption_system.decrypt_with_key(blob, salt, data_key)
 
-                default_categories = [
-                    ("Redes Sociales", "#ef4444"),
-                    ("Trabajo", "#3b82f6"),
-                    ("Personal", "#10b981"),
-                    ("Finanzas", "#f59e0b"),
-                    ("Correos", "#8b5cf6"),
-                    ("Juegos", "#ec4899"),
-                    ("Streaming", "#06b6d4"),
-                    ("Compras", "#84cc16"),
-                    ("Otros", "#6b7280"),
-                ]
-                for name, color in default_categories:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)",
-                        (name, color),
-                    )
+        decrypted_password = decrypt(row[5], row[6])
+        decrypted_notes = ""
+        if row[8]:
+            decrypted_notes = decrypt(row[8], row[9])
 
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS password_entries (id INTEGER PRIMARY KEY, category_id INTEGER, title TEXT NOT NULL, username TEXT, encrypted_password BLOB NOT NULL, password_salt BLOB NOT NULL, url TEXT, notes BLOB, notes_salt BLOB, strength INTEGER DEFAULT 0, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (category_id) REFERENCES categories(id))"
-                )
+        date_to_use = row[11] if row[11] else row[10]
 
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS totp_secrets (id INTEGER PRIMARY KEY, service_name TEXT DEFAULT 'BIGestPwd', encrypted_secret BLOB NOT NULL, secret_salt BLOB NOT NULL, backup_codes BLOB, backup_salt BLOB, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
-                )
+        return {
+            "id": row[0],
+            "category": row[1] or "Sin categoría",
+            "color": row[2] or "#6b7280",
+            "title": row[3],
+            "username": row[4],
+            "password": decrypted_password,
+            "url": row[7],
+            "notes": decrypted_notes,
+            "date_for_check": date_to_use,
+        }
+    except:
+        return None
 
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS mfa_config (id INTEGER PRIMARY KEY, method_name TEXT NOT NULL UNIQUE, is_enabled BOOLEAN DEFAULT 0, is_configured BOOLEAN DEFAULT 0, config_data BLOB, config_salt BLOB, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
-                )
 
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS user_profile (id INTEGER PRIMARY KEY, display_name TEXT NOT NULL, is_anonymous BOOLEAN DEFAULT 0, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
-                )
+class UnlockedVault:
+    """
+    Sesión abierta tras el login: guarda la llave de datos derivada una sola vez.
+    Debe cerrarse (close) al salir o al bloquear por inactividad.
+    """
 
-                mfa_methods = [
-                    ("master_password", 1, 1),
-                    ("totp_offline", 0, 0),
-                    ("usb_bypass", 0, 0),
-                ]
-                for method_name, is_enabled, is_configured in mfa_methods:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO mfa_config (method_name, is_enabled, is_configured) VALUES (?, ?, ?)",
-                        (method_name, is_enabled, is_configured),
-                    )
+    def __init__(self, data_key: bytes, master_password: str):
+        self._data_key = bytearray(data_key)
+        self.master_password = master_password
 
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS usb_devices (id INTEGER PRIMARY KEY, device_name TEXT NOT NULL, device_uuid TEXT UNIQUE NOT NULL, device_path TEXT DEFAULT '', created_at DATETIME DEFAULT CURRENT_TIMESTAMP, last_seen DATETIME DEFAULT CURRENT_TIMESTAMP, is_active BOOLEAN DEFAULT 1)"
-                )
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS usb_security_files (id INTEGER PRIMARY KEY, device_uuid TEXT NOT NULL, file_name TEXT NOT NULL, encrypted_data BLOB NOT NULL, file_salt BLOB NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (device_uuid) REFERENCES usb_devices(device_uuid))"
-                )
-                cursor.execute(
-                    "CREATE TABLE IF NOT EXISTS usb_blacklist (id INTEGER PRIMARY KEY, device_uuid TEXT UNIQUE NOT NULL, device_name TEXT NOT NULL, revoked_at DATETIME DEFAULT CURRENT_TIMESTAMP, cleaned BOOLEAN DEFAULT 0, reason TEXT DEFAULT 'Usuario eliminó dispositivo')"
-                )
+    @property
+    def is_open(self) -> bool:
+        return self._data_key is not None
 
-                conn.commit()
+    @property
+    def data_key(self) -> bytes:
+        if self._data_key is None:
+            raise ValueError("La bóveda está bloqueada")
+        return bytes(self._data_key)
 
-    def repair_database_tables(self):
-        with self.db_lock:
-            try:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
+    def close(self):
+        if self._data_key is not None:
+            for i in range(len(self._data_key)):
+                self._data_key[i] = 0
+            self._data_key = None
+        self.master_password = ""
 
-                    cursor.execute("PRAGMA table_info(totp_secrets)")
-                    columns_totp = [column[1] for column in cursor.fetchall()]
-                    if "backup_codes" not in columns_totp:
-                        cursor.execute(
-                            "ALTER TABLE totp_secrets ADD COLUMN backup_codes BLOB"
-                        )
-                        cursor.execute(
-                            "ALTER TABLE totp_secrets ADD COLUMN backup_salt BLOB"
-                        )
 
-                    cursor.execute("PRAGMA table_info(password_entries)")
-                    columns_pwd = [column[1] for column in cursor.fetchall()]
+class DatabaseManager:
+    def __init__(self, encryption_system: SecureEncryption):
+        self.encryption = encryption_system
+        self.db_path = DB_PATH
+        self.db_lock = threading.Lock()
+        self.fts_enabled = True
+        # Sube con cada alta, edición o borrado de entradas (cachés de conteos)
+        self.entries_version = 0
 
-                    if "updated_at" not in columns_pwd:
-                        cursor.execute(
-                            "ALTER TABLE password_entries ADD COLUMN updated_at DATETIME DEFAULT CURRENT_TIMESTAMP"
-                        )
+    def _get_connection(self):
+        # La primera conexión a la DB aplica las migraciones pendientes
+        return get_connection(self.db_path)
 
-                    conn.commit()
-            except Exception as e:
-                pass
+    def _fts_query(self, search):
+        # Cada término como prefijo entre comillas; varios términos = AND
+        terms = re.findall(r"\w+", search)
+        return " ".join(f'"{term}"*' for term in terms)
 
     def is_master_configured(self) -> bool:
         with self.db_lock:
@@ -274,64 +282,292 @@ class DatabaseManager:
                 cursor.execute("SELECT COUNT(*) FROM master_config")
                 return cursor.fetchone()[0] > 0
 
-    def configure_master_password(self, master_password: str) -> bool:
+    def configure_master_password(
+        self, master_password: str, params: KdfParams = None
+    ) -> bool:
         if self.is_master_configured():
             return False
-        master_hash, master_salt = self.encryption.hash_master_password(master_password)
+        # Bóveda nueva: el KDF se calibra para esta máquina. La llave envuelta
+        # ya verifica la contraseña, así que solo se deriva una vez
+        params = params or calibrate(KDF_PBKDF2_SHA256, DEFAULT_TARGET_MS)
+        wrapped_key, key_salt = self.encryption.wrap_data_key(
+            self.encryption.generate_data_key(), master_password, params
+        )
         with self.db_lock:
             with self._get_connection() as conn:
                 conn.execute(
-                    "INSERT INTO master_config (master_hash, master_salt) VALUES (?, ?)",
-                    (master_hash, master_salt),
+                    "INSERT INTO master_config (master_hash, master_salt, wrapped_key, key_salt, kdf_algorithm, kdf_iterations, kdf_memory_kib, kdf_parallelism, kdf_target_ms, kdf_calibrated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)",
+                    (
+                        MASTER_HASH_UNUSED,
+                        MASTER_HASH_UNUSED,
+                        wrapped_key,
+                        key_salt,
+                        params.algorithm,
+                        params.iterations,
+                        params.memory_kib,
+                        params.parallelism,
+                        DEFAULT_TARGET_MS,
+                    ),
                 )
                 conn.commit()
         return True
 
+    def _get_master_row(self):
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT master_hash, master_salt, wrapped_key, key_salt, kdf_algorithm, kdf_iterations, kdf_memory_kib, kdf_parallelism, kdf_target_ms, kdf_calibrated FROM master_config LIMIT 1"
+            )
+            return cursor.fetchone()
+
+    def _row_kdf_params(self, row):
+        return KdfParams(row[4], row[5], row[6], row[7])
+
+    def get_kdf_settings(self):
+        row = self._get_master_row()
+        if not row:
+            return None
+        return {
+            "params": self._row_kdf_params(row),
+            "target_ms": row[8],
+            "calibrated": bool(row[9]),
+        }
+
     def verify_master_password(self, master_password: str) -> bool:
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT master_hash, master_salt FROM master_config LIMIT 1"
-                )
-                result = cursor.fetchone()
+            result = self._get_master_row()
             if not result:
                 return False
+            params = self._row_kdf_params(result)
+            if result[2] and result[3]:
+                # El MAC de la llave envuelta confirma la contraseña con un solo KDF
+                self.encryption.unwrap_data_key(
+                    result[2], result[3], master_password, params
+                )
+                return True
             return self.encryption.verify_master_password(
-                master_password, result[0], result[1]
+                master_password, result[0], result[1], params
+            )
+        except:
+            return False
+
+    def unlock_data_key(self, master_password: str):
+        """
+        Obtiene la llave de datos de la bóveda con una única derivación, usando
+        el KDF guardado en master_config. Las bóvedas antiguas reciben aquí su
+        llave; sus entradas se re-sellan aparte con el trabajo de re-cifrado
+        (modules/security/reencryption.py).
+        """
+        try:
+            result = self._get_master_row()
+            if not result:
+                return None
+            params = self._row_kdf_params(result)
+
+            if result[2] and result[3]:
+                data_key = self.encryption.unwrap_data_key(
+                    result[2], result[3], master_password, params
+                )
+            else:
+                if not self.encryption.verify_master_password(
+                    master_password, result[0], result[1], params
+                ):
+                    return None
+                data_key = self.encryption.generate_data_key()
+                wrapped_key, key_salt = self.encryption.wrap_data_key(
+                    data_key, master_password, params
+                )
+                with self.db_lock:
+                    with self._get_connection() as conn:
+                        conn.execute(
+                            "UPDATE master_config SET wrapped_key = ?, key_salt = ?",
+                            (wrapped_key, key_salt),
+                        )
+                        conn.commit()
+
+            return data_key
+        except:
+            return None
+
+    def unlock(self, master_password: str):
+        data_key = self.unlock_data_key(master_password)
+        if not data_key:
+            return None
+        return UnlockedVault(data_key, master_password)
+
+    def _store_master_key(
+        self, password, data_key, params, target_ms, expected_wrapped=None
+    ) -> bool:
+        """
+        Re-envuelve la llave de datos con ``params``. Con ``expected_wrapped``
+        solo escribe si nadie cambió la llave envuelta mientras se derivaba.
+        Una sola derivación: el hash antiguo se vacía, ya no hace falta.
+        """
+        wrapped_key, key_salt = self.encryption.wrap_data_key(
+            data_key, password, params
+        )
+        sql = "UPDATE master_config SET master_hash = ?, master_salt = ?, wrapped_key = ?, key_salt = ?, kdf_algorithm = ?, kdf_iterations = ?, kdf_memory_kib = ?, kdf_parallelism = ?, kdf_target_ms = ?, kdf_calibrated = 1"
+        args = [
+            MASTER_HASH_UNUSED,
+            MASTER_HASH_UNUSED,
+            wrapped_key,
+            key_salt,
+            params.algorithm,
+            params.iterations,
+            params.memory_kib,
+            params.parallelism,
+            target_ms,
+        ]
+        if expected_wrapped is not None:
+            sql += " WHERE wrapped_key = ?"
+            args.append(expected_wrapped)
+        try:
+            with self.db_lock:
+                with self._get_connection() as conn:
+                    cursor = conn.execute(sql, args)
+                    conn.commit()
+                    return cursor.rowcount > 0
+        except:
+            return False
+
+    def change_master_password(
+        self,
+        old_password: str,
+        new_password: str,
+        progress_callback=None,
+        cancel_event=None,
+    ) -> bool:
+        """
+        Cambia la llave maestra re-envolviendo la llave de datos de la bóveda.
+        Las entradas no se tocan, así que el coste no depende del tamaño de la
+        bóveda; solo las entradas antiguas (que dependen de la contraseña
+        maestra) se re-sellan antes, por lotes reanudables.
+
+        Lanza ValueError si ``old_password`` no abre la bóveda (la comprobación
+        es la propia derivación, sin otra aparte); devuelve False si el
+        re-sellado se cancela o la escritura falla.
+        """
+        data_key = self.unlock_data_key(old_password)
+        if not data_key:
+            raise ValueError("Contraseña actual incorrecta")
+
+        if self.has_legacy_entries():
+            from modules.security.reencryption import (
+                reencryption_runner,
+                legacy_to_record_job,
+            )
+
+            session = UnlockedVault(data_key, old_password)
+            try:
+                completed = reencryption_runner.run(
+                    legacy_to_record_job(), session, progress_callback, cancel_event
+                )
+            finally:
+                session.close()
+            if not completed:
+                return False
+        settings = self.get_kdf_settings()
+        return self._store_master_key(
+            new_password, data_key, settings["params"], settings["target_ms"]
+        )
+
+    def rehash_master_if_needed(self, vault) -> bool:
+        """
+        Rehash tras el login: una bóveda con el coste fijo de versiones
+        anteriores se calibra para esta máquina. Se llama en segundo plano.
+        """
+        try:
+            row = self._get_master_row()
+            if not row or row[9] or not (row[2] and row[3]):
+                return False
+            algorithm = row[4]
+            if algorithm not in available_algorithms():
+                algorithm = KDF_PBKDF2_SHA256
+            target_ms = row[8] or DEFAULT_TARGET_MS
+            return self._store_master_key(
+                vault.master_password,
+                vault.data_key,
+                calibrate(algorithm, target_ms),
+                target_ms,
+                expected_wrapped=row[2],
             )
         except:
             return False
 
+    def apply_kdf_settings(self, vault, algorithm, target_ms):
+        """
+        Calibra el algoritmo elegido para ``target_ms`` y re-envuelve la llave.
+        Devuelve (params, ms medidos en un desbloqueo) o None si falla.
+        """
+        try:
+            row = self._get_master_row()
+            params = calibrate(algorithm, target_ms)
+            if not self._store_master_key(
+                vault.master_password,
+                vault.data_key,
+                params,
+                target_ms,
+                expected_wrapped=row[2],
+            ):
+                return None
+            return params, measure_ms(params)
+        except:
+            return None
+
+    def has_legacy_entries(self) -> bool:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT 1 FROM password_entries WHERE key_version = ? LIMIT 1",
+                (KEY_VERSION_LEGACY,),
+            )
+            return cursor.fetchone() is not None
+
+    def has_outdated_entries(self) -> bool:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT 1 FROM password_entries WHERE key_version < ? LIMIT 1",
+                (KEY_VERSION_RECORD,),
+            )
+            return cursor.fetchone() is not None
+
     def add_password_entry(
-        self, category_id, title, username, password, url, notes, master_password
+        self, category_id, title, username, password, url, notes, vault
     ):
+        from modules.utils.helpers import PasswordHealth
+
         try:
-            encrypted_password, password_salt = self.encryption.encrypt_data(
-                password, master_password
-            )
-            encrypted_notes, notes_salt = (None, None)
+            data_key = vault.data_key
+            encrypted_password = self.encryption.seal_record(password, data_key)
+            password_hmac = self.encryption.password_hmac(password, data_key)
+            encrypted_notes = None
             if notes:
-                encrypted_notes, notes_salt = self.encryption.encrypt_data(
-                    notes, master_password
-                )
+                encrypted_notes = self.encryption.seal_record(notes, data_key)
 
             with self.db_lock:
                 with self._get_connection() as conn:
+                    now = int(time.time())
                     conn.execute(
-                        "INSERT INTO password_entries (category_id, title, username, encrypted_password, password_salt, url, notes, notes_salt) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        "INSERT INTO password_entries (category_id, title, username, encrypted_password, password_salt, url, notes, notes_salt, key_version, strength, created_epoch, updated_epoch, password_hmac) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
                         (
                             category_id,
                             title,
                             username,
                             encrypted_password,
-                            password_salt,
+                            RECORD_EMPTY_SALT,
                             url,
                             encrypted_notes,
-                            notes_salt,
+                            None,
+                            KEY_VERSION_RECORD,
+                            PasswordHealth.assess_strength(password)[0],
+                            now,
+                            now,
+                            password_hmac,
                         ),
                     )
                     conn.commit()
+                    self.entries_version += 1
             return True
         except:
             return False
@@ -345,89 +581,368 @@ class DatabaseManager:
         password,
         url,
         notes,
-        master_password,
+        vault,
     ):
+        from modules.utils.helpers import PasswordHealth
+
         try:
-            encrypted_password, password_salt = self.encryption.encrypt_data(
-                password, master_password
-            )
-            encrypted_notes, notes_salt = (None, None)
+            data_key = vault.data_key
+            encrypted_password = self.encryption.seal_record(password, data_key)
+            password_hmac = self.encryption.password_hmac(password, data_key)
+            encrypted_notes = None
             if notes:
-                encrypted_notes, notes_salt = self.encryption.encrypt_data(
-                    notes, master_password
-                )
+                encrypted_notes = self.encryption.seal_record(notes, data_key)
 
             with self.db_lock:
                 with self._get_connection() as conn:
                     conn.execute(
-                        "UPDATE password_entries SET category_id = ?, title = ?, username = ?, encrypted_password = ?, password_salt = ?, url = ?, notes = ?, notes_salt = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                        "UPDATE password_entries SET category_id = ?, title = ?, username = ?, encrypted_password = ?, password_salt = ?, url = ?, notes = ?, notes_salt = ?, key_version = ?, strength = ?, password_hmac = ?, updated_at = CURRENT_TIMESTAMP, updated_epoch = ?, created_epoch = COALESCE(created_epoch, CAST(strftime('%s', created_at) AS INTEGER)) WHERE id = ?",
                         (
                             category_id,
                             title,
                             username,
                             encrypted_password,
-                            password_salt,
+                            RECORD_EMPTY_SALT,
                             url,
                             encrypted_notes,
-                            notes_salt,
+                            None,
+                            KEY_VERSION_RECORD,
+                            PasswordHealth.assess_strength(password)[0],
+                            password_hmac,
+                            int(time.time()),
                             entry_id,
                         ),
                     )
                     conn.commit()
+                    self.entries_version += 1
             return True
         except:
             return False
 
-    def get_password_entries(self, master_password):
+    def get_password_entry(self, entry_id, vault):
+        """Descifra una sola entrada (para editarla) sin tocar el resto de la bóveda."""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(ENTRY_SELECT_SQL + " WHERE p.id = ?", (entry_id,))
+                row = cursor.fetchone()
+            if not row:
+                return None
+            return _decrypt_entry_row(row, vault.data_key, vault.master_password)
+        except:
+            return None
+
+    def get_entry_title(self, entry_id):
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT title FROM password_entries WHERE id = ?", (entry_id,)
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+        except:
+            return None
+
+    def list_password_entries(self):
+        """Listado solo con metadatos en claro: no descifra ningún secreto."""
+        return self.query_password_entries()
+
+    def query_password_entries(
+        self,
+        category_id=None,
+        search="",
+        sort="title",
+        after_title=None,
+        after_id=None,
+        limit=None,
+    ):
+        """Filtra, ordena y pagina en SQLite sobre las columnas en claro.
+
+        La paginación es por clave (keyset): ``after_title`` es el valor de la
+        columna de orden de la última fila vista y ``after_id`` su id. Con
+        ``sort="relevance"`` la búsqueda se ordena por bm25 y no admite keyset.
+
+        La búsqueda usa el índice FTS5 por prefijo de palabra ("face" encuentra
+        "facebook"). Si ninguna palabra empieza por el término se busca como
+        subcadena con LIKE ("book" también encuentra "facebook").
+        """
+        fts_query = self._fts_query(search) if search and self.fts_enabled else ""
+        if fts_query:
+            try:
+                rows = self._select_entries(
+                    category_id, search, fts_query, sort, after_title, after_id, limit
+                )
+                # Página vacía tras una con resultados FTS: fin de la lista
+                if rows or (
+                    after_id is not None
+                    and self._select_entries(
+                        category_id, search, fts_query, sort, None, None, 1
+                    )
+                ):
+                    return [self._entry_metadata(row) for row in rows]
+            except sqlite3.OperationalError as e:
+                # Sin FTS5 (SQLite compilado sin ella) se deja de intentar; un
+                # error pasajero (p. ej. "database is locked") solo afecta a esta
+                # consulta, que sale por LIKE
+                if "no such table" in str(e) or "no such module" in str(e):
+                    self.fts_enabled = False
+            except:
+                return []
+
+        try:
+            rows = self._select_entries(
+                category_id, search, "", sort, after_title, after_id, limit
+            )
+            return [self._entry_metadata(row) for row in rows]
+        except:
+            return []
+
+    def _select_entries(
+        self, category_id, search, fts_query, sort, after_title, after_id, limit
+    ):
+        """Filas de ENTRY_LIST_SQL: búsqueda por FTS con ``fts_query``, si no LIKE."""
+        ranked = sort == "relevance" and bool(fts_query)
+        sort_column = ENTRY_SORT_COLUMNS.get(sort, ENTRY_SORT_COLUMNS["title"])
+        sql = ENTRY_LIST_SQL
+        conditions = []
+        params = []
+
+        if fts_query:
+            sql += ENTRY_FTS_JOIN
+            conditions.append("password_entries_fts MATCH ?")
+            params.append(fts_query)
+
+        if category_id is not None:
+            conditions.append("p.category_id = ?")
+            params.append(category_id)
+
+        if search and not fts_query:
+            pattern = (
+                "%"
+                + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                + "%"
+            )
+            conditions.append(
+                "(p.title LIKE ? ESCAPE '\\' OR p.username LIKE ? ESCAPE '\\' OR p.url LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern, pattern, pattern])
+
+        if after_id is not None and not ranked:
+            conditions.append(f"({sort_column}, p.id) > (?, ?)")
+            params.extend([after_title, after_id])
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if ranked:
+            sql += " ORDER BY bm25(password_entries_fts), p.id"
+        else:
+            sql += f" ORDER BY {sort_column}, p.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _entry_metadata(self, row):
+        return {
+            "id": row[0],
+            "category": row[1] or "Sin categoría",
+            "color": row[2] or "#6b7280",
+            "title": row[3],
+            "username": row[4],
+            "url": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+            "date_for_check": row[11] or row[10] or row[7] or row[6],
+            "has_notes": bool(row[8]),
+            # Sin epoch la fila aún no pasó por el relleno: fortaleza desconocida
+            "strength": row[9] if row[11] is not None else None,
+        }
+
+    def has_pending_health(self):
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT p.id, c.name, c.color, p.title, p.username, p.encrypted_password, p.password_salt, p.url, p.notes, p.notes_salt, p.created_at, p.updated_at FROM password_entries p LEFT JOIN categories c ON p.category_id = c.id ORDER BY p.title"
+                    "SELECT 1 FROM password_entries WHERE updated_epoch IS NULL LIMIT 1"
                 )
-                rows = cursor.fetchall()
+                return cursor.fetchone() is not None
+        except:
+            return False
+
+    def backfill_entry_health(self, vault, batch_size=200, cancel_event=None):
+        """Relleno único: fortaleza y epochs para las filas anteriores a estas columnas.
+
+        Las filas re-selladas ya traen ambos, así que se lanza tras el re-cifrado.
+        """
+        from modules.utils.helpers import PasswordHealth
 
-            entries = []
-            for row in rows:
-                try:
-                    decrypted_password = self.encryption.decrypt_data(
-                        row[5], row[6], master_password
+        done = 0
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return done
+                with self._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "SELECT id, encrypted_password, password_salt, key_version FROM password_entries WHERE updated_epoch IS NULL LIMIT ?",
+                        (batch_size,),
                     )
-                    decrypted_notes = ""
-                    if row[8] and row[9]:
-                        decrypted_notes = self.encryption.decrypt_data(
-                            row[8], row[9], master_password
+                    rows = cursor.fetchall()
+                if not rows:
+                    return done
+
+                updates = []
+                for entry_id, token, salt, key_version in rows:
+                    password = self._decrypt_value(token, salt, key_version, vault)
+                    score = (
+                        PasswordHealth.assess_strength(password)[0]
+                        if password is not None
+                        else 0
+                    )
+                    updates.append((score, entry_id))
+
+                # Si la bóveda se bloqueó a mitad de lote no se escribe nada
+                vault.data_key
+
+                with self.db_lock:
+                    with self._get_connection() as conn:
+                        conn.executemany(
+                            "UPDATE password_entries SET strength = ?, created_epoch = CAST(strftime('%s', created_at) AS INTEGER), updated_epoch = CAST(strftime('%s', COALESCE(updated_at, created_at)) AS INTEGER) WHERE id = ? AND updated_epoch IS NULL",
+                            updates,
                         )
+                        conn.commit()
+                done += len(updates)
+        except:
+            return done
+
+    def has_pending_hmac(self):
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT 1 FROM password_entries WHERE password_hmac IS NULL LIMIT 1"
+                )
+                return cursor.fetchone() is not None
+        except:
+            return False
+
+    def backfill_password_hmac(self, vault, batch_size=200, cancel_event=None):
+        """Relleno único del HMAC para las filas anteriores a la columna.
 
-                    date_to_use = row[11] if row[11] else row[10]
-
-                    entries.append(
-                        {
-                            "id": row[0],
-                            "category": row[1] or "Sin categoría",
-                            "color": row[2] or "#6b7280",
-                            "title": row[3],
-                            "username": row[4],
-                            "password": decrypted_password,
-                            "url": row[7],
-                            "notes": decrypted_notes,
-                            "date_for_check": date_to_use,
-                        }
+        Las filas re-selladas ya lo traen, así que se lanza tras el re-cifrado.
+        Se detiene al cancelarlo o en cuanto la bóveda se bloquea.
+        """
+        done = 0
+        last_id = 0
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return done
+                # Bóveda bloqueada (logout, AFK): salta al except y termina
+                data_key = vault.data_key
+                # Por id: una fila que no se pueda descifrar no se repite
+                with self._get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "SELECT id, encrypted_password, password_salt, key_version FROM password_entries WHERE password_hmac IS NULL AND id > ? ORDER BY id LIMIT ?",
+                        (last_id, batch_size),
                     )
-                except:
+                    rows = cursor.fetchall()
+                if not rows:
+                    return done
+                last_id = rows[-1][0]
+
+                updates = []
+                for entry_id, token, salt, key_version in rows:
+                    password = self._decrypt_value(token, salt, key_version, vault)
+                    if password is not None:
+                        updates.append(
+                            (
+                                self.encryption.password_hmac(password, data_key),
+                                entry_id,
+                            )
+                        )
+
+                # Si la bóveda se bloqueó a mitad de lote no se escribe nada
+                vault.data_key
+                if not updates:
                     continue
-            return entries
+
+                with self.db_lock:
+                    with self._get_connection() as conn:
+                        conn.executemany(
+                            "UPDATE password_entries SET password_hmac = ? WHERE id = ? AND password_hmac IS NULL",
+                            updates,
+                        )
+                        conn.commit()
+                        self.entries_version += 1
+                done += len(updates)
+        except:
+            return done
+
+    def get_reuse_groups(self):
+        """Grupos de entradas con la misma contraseña, de mayor a menor.
+
+        Un solo GROUP BY sobre la columna indexada; no descifra nada.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT group_concat(id), COUNT(*) AS n FROM password_entries WHERE password_hmac IS NOT NULL GROUP BY password_hmac HAVING n > 1 ORDER BY n DESC"
+                )
+                return [
+                    [int(entry_id) for entry_id in row[0].split(",")]
+                    for row in cursor.fetchall()
+                ]
         except:
             return []
 
-    def get_categories(self):
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name, color FROM categories ORDER BY name")
-            return [
-                {"id": row[0], "name": row[1], "color": row[2]}
-                for row in cursor.fetchall()
-            ]
+    def get_reuse_counts(self):
+        """``{entry_id: otras entradas con la misma contraseña}``."""
+        counts = {}
+        for group in self.get_reuse_groups():
+            for entry_id in group:
+                counts[entry_id] = len(group) - 1
+        return counts
+
+    def get_secret(self, entry_id, vault):
+        return self._decrypt_entry_field(
+            entry_id, "encrypted_password", "password_salt", vault
+        )
+
+    def get_notes(self, entry_id, vault):
+        return self._decrypt_entry_field(entry_id, "notes", "notes_salt", vault)
+
+    def _decrypt_entry_field(self, entry_id, data_column, salt_column, vault):
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT {data_column}, {salt_column}, key_version FROM password_entries WHERE id = ?",
+                    (entry_id,),
+                )
+                row = cursor.fetchone()
+            if not row:
+                return None
+            if not row[0]:
+                return ""
+            return self._decrypt_value(row[0], row[1], row[2], vault)
+        except:
+            return None
+
+    def _decrypt_value(self, token, salt, key_version, vault):
+        try:
+            if key_version == KEY_VERSION_LEGACY:
+                return self.encryption.decrypt_data(token, salt, vault.master_password)
+            return self.encryption.decrypt_with_key(token, salt, vault.data_key)
+        except:
+            return None
 
     def delete_password_entry(self, entry_id):
         try:
@@ -437,6 +952,7 @@ class DatabaseManager:
                         "DELETE FROM password_entries WHERE id = ?", (entry_id,)
                     )
                     conn.commit()
+                    self.entries_version += 1
             return True
         except:
             return False
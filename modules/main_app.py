@@ -5,28 +5,38 @@ import json
 import os
 import time
 from modules.encryption import db_manager
+from modules.categories import category_service
 from modules.components.virtual_keyboard import VirtualKeyboard
-from modules.components.modals import PasswordGeneratorModal, PasswordEditModal
+from modules.components.modals import (
+    PasswordGeneratorModal,
+    PasswordEditModal,
+    CategoryManagerModal,
+)
 from modules.components.security_modals import (
     PasswordChangeModal,
     USBManagementModal,
     TOTPManagementModal,
+    KdfSettingsModal,
 )
 from modules.components.widgets import ModernWidgets
+from modules.components.tree_renderer import TreeRenderer
 from modules.utils.helpers import WindowHelper, PasswordHealth, Tooltip
 from modules.utils.clipboard_security import ClipboardManager
+from modules.utils.search_controller import SearchController
+from modules.utils.task_executor import task_executor
 from modules.auth.multi_factor import MultiFactorAuth
 from modules.auth.totp_offline import TOTPOffline
 from modules.auth.usb_bypass import USBBypass
 from modules.utils.updater import AppUpdater
 
 SETTINGS_FILE = os.path.join(os.getcwd(), "data", "settings.json")
+HOVER_THROTTLE_MS = 30
 
 
 class MainApplication:
-    def __init__(self, root, master_password, on_logout_callback=None):
+    def __init__(self, root, vault, on_logout_callback=None):
         self.root = root
-        self.master_password = master_password
+        self.vault = vault
         self.on_logout_callback = on_logout_callback
         self.virtual_kb = VirtualKeyboard(root)
         self.widgets = ModernWidgets()
@@ -35,8 +45,20 @@ class MainApplication:
         self.usb = USBBypass()
         self.clipboard_manager = ClipboardManager(root)
         self.tooltip = Tooltip(root)
+        self.hover_point = None
+        self.hover_row = None
+        self.hover_after_id = None
         self.password_health_data = {}
+        self.reused_count = 0
         self.current_search = ""
+        self.category_filter_ids = {}
+        self.reencryption_task = None
+        self.health_backfill_task = None
+        self.hmac_backfill_task = None
+        self.saving = False
+        self.search_controller = SearchController(
+            root, self.fetch_entries, self.render_entries
+        )
         self.selected_item = None
         self.user_profile = self.mfa.get_user_profile()
 
@@ -65,6 +87,80 @@ class MainApplication:
         self.create_interface()
         self.load_categories()
         self.load_passwords()
+        self.start_reencryption()
+        self.start_kdf_rehash()
+
+    def start_reencryption(self):
+        """Re-sella en segundo plano las entradas en formatos antiguos (reanudable)."""
+        if not db_manager.has_outdated_entries():
+            self.start_backfills()
+            return
+        from modules.security.reencryption import reencryption_runner, upgrade_jobs
+
+        self.reencryption_task = task_executor.submit(
+            reencryption_runner.run_all,
+            upgrade_jobs(),
+            self.vault,
+            on_progress=self.show_reencryption_progress,
+            on_success=self.on_reencryption_finished,
+            cancellable=True,
+            background=True,
+        )
+
+    def show_reencryption_progress(self, done, total):
+        if self.tree.winfo_exists():
+            self.update_status(f"Actualizando cifrado {done}/{total}...")
+
+    def on_reencryption_finished(self, completed):
+        if not self.tree.winfo_exists():
+            return
+        self.load_passwords()
+        # Después y no a la vez: las filas antiguas solo se descifran una vez
+        if completed:
+            self.start_backfills()
+
+    def start_backfills(self):
+        # Las filas re-selladas ya traen fortaleza y HMAC: aquí solo el resto
+        self.start_health_backfill()
+        self.start_hmac_backfill()
+
+    def start_health_backfill(self):
+        if not db_manager.has_pending_health():
+            return
+
+        def refresh(done):
+            if done and self.tree.winfo_exists():
+                self.load_passwords()
+
+        self.health_backfill_task = task_executor.submit(
+            db_manager.backfill_entry_health,
+            self.vault,
+            on_success=refresh,
+            cancellable=True,
+            background=True,
+        )
+
+    def start_hmac_backfill(self):
+        if not db_manager.has_pending_hmac():
+            return
+
+        def refresh(done):
+            if done and self.tree.winfo_exists():
+                self.load_passwords()
+
+        self.hmac_backfill_task = task_executor.submit(
+            db_manager.backfill_password_hmac,
+            self.vault,
+            on_success=refresh,
+            cancellable=True,
+            background=True,
+        )
+
+    def start_kdf_rehash(self):
+        # Re-envolver con KDF calibrado no cambia la contraseña: sin avisos en la UI
+        task_executor.submit(
+            db_manager.rehash_master_if_needed, self.vault, background=True
+        )
 
     def load_settings(self):
         try:
@@ -278,10 +374,13 @@ class MainApplication:
         ).grid(row=0, column=2, padx=(20, 10))
         self.category_var = tk.StringVar(value="Todas")
         self.category_combo = ttk.Combobox(
-            top_frame, textvariable=self.category_var, state="readonly", width=15
+            top_frame, textvariable=self.category_var, state="readonly", width=20
         )
         self.category_combo.grid(row=0, column=3, sticky="e", ipady=5)
         self.category_combo.bind("<<ComboboxSelected>>", self.on_category_change)
+        self.widgets.create_modern_button(
+            top_frame, "🏷️", self.open_category_manager, "#6b7280"
+        ).grid(row=0, column=4, padx=(10, 0))
 
         action_frame = tk.Frame(card, bg=self.widgets.card_bg)
         action_frame.pack(fill="x", padx=15, pady=(0, 10))
@@ -298,6 +397,12 @@ class MainApplication:
         self.del_btn.pack(side="left", padx=5)
         self.del_btn.config(state="disabled")
 
+        self.copy_btn = self.widgets.create_modern_button(
+            action_frame, "📋 Copiar", self.copy_selected_password, "#6b7280"
+        )
+        self.copy_btn.pack(side="left", padx=5)
+        self.copy_btn.config(state="disabled")
+
         tree_frame = tk.Frame(card, bg=self.widgets.card_bg)
         tree_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
 
@@ -319,28 +424,56 @@ class MainApplication:
         self.tree.pack(side="left", fill="both", expand=True)
         sb.pack(side="right", fill="y")
 
+        self.tree_renderer = TreeRenderer(self.tree)
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
         self.tree.bind("<Motion>", self.on_tree_hover)
+        self.tree.bind("<Leave>", self.on_tree_leave)
 
     def on_tree_hover(self, event):
-        region = self.tree.identify_region(event.x, event.y)
+        # Solo se guarda la última posición; se procesa como mucho una vez
+        # cada HOVER_THROTTLE_MS aunque lleguen eventos por cada píxel
+        self.hover_point = (event.x, event.y, event.x_root, event.y_root)
+        if self.hover_after_id is None:
+            self.hover_after_id = self.root.after(HOVER_THROTTLE_MS, self.update_hover)
+
+    def on_tree_leave(self, event):
+        self.cancel_hover()
+        self.hover_row = None
+        self.tooltip.hide_tip()
 
-        if region == "cell":
-            col = self.tree.identify_column(event.x)
-            row_id = self.tree.identify_row(event.y)
+    def cancel_hover(self):
+        if self.hover_after_id is not None:
+            self.root.after_cancel(self.hover_after_id)
+            self.hover_after_id = None
 
-            if col == "#1" and row_id:
-                item_tags = self.tree.item(row_id, "tags")
-                if item_tags:
-                    db_id = int(item_tags[0])
+    def update_hover(self):
+        self.hover_after_id = None
+        if not self.tree.winfo_exists():
+            return
+        x, y, x_root, y_root = self.hover_point
+        region = self.tree.identify_region(x, y)
 
-                    if db_id in self.password_health_data:
-                        data = self.password_health_data[db_id]
-                        self.tooltip.show_tip(
-                            data["title"], data["messages"], event.x_root, event.y_root
-                        )
-                        return
+        if region == "cell":
+            col = self.tree.identify_column(x)
+            row_id = self.tree.identify_row(y)
 
+            if col == "#1" and row_id:
+                db_id = int(row_id)
+
+                if db_id in self.password_health_data:
+                    data = self.password_health_data[db_id]
+                    if data["pending"]:
+                        # Descifrar puede costar un PBKDF2: se muestra "sin
+                        # analizar" y el tooltip se actualiza al llegar
+                        self.analyze_entry_health(db_id)
+                    # El tooltip solo cambia su texto si la fila es otra
+                    self.hover_row = db_id
+                    self.tooltip.show_tip(
+                        data["title"], data["messages"], x_root, y_root
+                    )
+                    return
+
+        self.hover_row = None
         self.tooltip.hide_tip()
 
     def create_add_tab(self):
@@ -441,13 +574,14 @@ class MainApplication:
         notes_ent.grid(row=5, column=1, sticky="ew", pady=10)
         self.form_entries["notes"] = notes_ent
 
-        self.widgets.create_modern_button(
+        self.save_btn = self.widgets.create_modern_button(
             card,
             "💾 Guardar Contraseña",
             self.save_password,
             self.widgets.success_color,
             width=20,
-        ).pack(pady=20)
+        )
+        self.save_btn.pack(pady=20)
 
     def create_security_tab(self):
         tab = tk.Frame(self.notebook, bg=self.widgets.bg_color)
@@ -483,6 +617,13 @@ class MainApplication:
             "Gestionar 2FA",
             self.open_totp_management,
         )
+        self.create_sec_option(
+            center_frame,
+            "⏱️ Derivación de la Llave",
+            "Algoritmo y coste del desbloqueo (PBKDF2, scrypt, Argon2id)",
+            "Ajustar KDF",
+            self.open_kdf_settings,
+        )
 
     def create_about_tab(self):
         tab = tk.Frame(self.notebook, bg=self.widgets.bg_color)
@@ -612,65 +753,150 @@ class MainApplication:
         updater.check_for_updates()
 
     def load_categories(self):
-        cats = db_manager.get_categories()
-        names = ["Todas"] + [c["name"] for c in cats]
-        self.category_combo["values"] = names
+        names = [c["name"] for c in category_service.list_categories()]
         if "category" in self.form_entries:
-            self.form_entries["category"]["values"] = [c["name"] for c in cats]
-            if cats:
-                self.form_entries["category"].set(cats[0]["name"])
-
-    def load_passwords(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-
-        self.password_health_data.clear()
+            current = self.form_entries["category"].get()
+            self.form_entries["category"]["values"] = names
+            if current not in names:
+                self.form_entries["category"].set(names[0] if names else "")
+        self.refresh_category_counts()
+
+    def refresh_category_counts(self):
+        # Un solo GROUP BY, cacheado hasta que cambian las entradas
+        counts = category_service.counts()
+        selected_id = self.category_filter_ids.get(self.category_var.get())
+        labels = {f"Todas ({sum(counts.values())})": None}
+        for c in category_service.list_categories():
+            labels[f"{c['name']} ({counts.get(c['id'], 0)})"] = c["id"]
+        self.category_filter_ids = labels
+        self.category_combo["values"] = list(labels)
+        self.category_var.set(
+            next(
+                (label for label, cid in labels.items() if cid == selected_id),
+                next(iter(labels)),
+            )
+        )
 
-        entries = db_manager.get_password_entries(self.master_password)
-        search = self.current_search.lower()
-        cat = self.category_var.get()
+    def _query_params(self):
+        search = self.current_search.strip()
+        return {
+            "category_id": self.category_filter_ids.get(self.category_var.get()),
+            "search": search,
+            "sort": "relevance" if search else "title",
+        }
 
-        count = 0
+    def load_passwords(self):
+        # La consulta sale ya, sin debounce, y se pinta al volver al hilo de Tk
+        self.tree_renderer.cancel()
+        self.refresh_category_counts()
+        self.search_controller.schedule(self._query_params(), delay_ms=0)
+
+    def fetch_entries(self, **params):
+        """Consulta y estado de salud de cada fila (en el hilo del ejecutor)."""
+        entries = db_manager.query_password_entries(**params)
+        # Repetidas: un GROUP BY sobre el HMAC indexado, sin descifrar nada
+        reuse = db_manager.get_reuse_counts()
+        known = self.password_health_data
         for e in entries:
-            if search and (
-                search not in e["title"].lower() and search not in str(e["url"]).lower()
+            # La fortaleza se guarda al escribir; solo las filas aún sin
+            # rellenar se analizan descifrando al pasar el cursor
+            data = known.get(e["id"])
+            reuse_count = reuse.get(e["id"], 0)
+            if (
+                e["strength"] is not None
+                or not data
+                or data["date_for_check"] != e["date_for_check"]
+                or data["reuse"] != reuse_count
             ):
-                continue
-            if cat != "Todas" and e["category"] != cat:
-                continue
-
-            color_code, status_title, messages = PasswordHealth.calculate_status(
-                e["password"], e["date_for_check"]
+                color_code, status_title, messages = PasswordHealth.status_from_score(
+                    e["strength"], e["date_for_check"], reuse_count
+                )
+                data = {
+                    "title": status_title,
+                    "messages": messages,
+                    "color": color_code,
+                    "pending": e["strength"] is None,
+                    "date_for_check": e["date_for_check"],
+                    "reuse": reuse_count,
+                }
+            e["health"] = data
+        return entries
+
+    def render_entries(self, entries, params=None):
+        if not self.tree.winfo_exists():
+            return
+        self.password_health_data = {e["id"]: e["health"] for e in entries}
+        self.reused_count = sum(1 for e in entries if e["health"]["reuse"])
+        rows = [
+            (
+                e["id"],
+                (
+                    "♻" if e["health"]["reuse"] else "●",
+                    e["category"],
+                    e["title"],
+                    "📝 Nota cifrada" if e["has_notes"] else "",
+                ),
+                e["health"]["color"],
             )
+            for e in entries
+        ]
+        # La primera pantalla sale ya; el resto llega por tramos
+        self.tree_renderer.render_progressive(
+            rows,
+            on_progress=self.show_render_progress,
+            on_done=self.on_render_finished,
+        )
 
-            note_preview = e["notes"].replace("\n", " ") if e["notes"] else ""
-            if len(note_preview) > 30:
-                note_preview = note_preview[:30] + "..."
-
-            self.password_health_data[e["id"]] = {
-                "title": status_title,
-                "messages": messages,
-            }
+    def show_render_progress(self, done, total):
+        self.update_status(f"Cargando {done}/{total} contraseñas...")
 
-            item_id = self.tree.insert(
-                "",
-                "end",
-                values=("●", e["category"], e["title"], note_preview),
-                tags=(str(e["id"]),),
+    def on_render_finished(self, total):
+        if self.selected_item and not self.tree.exists(self.selected_item):
+            self.selected_item = None
+        if self.reused_count:
+            self.update_status(
+                f"Mostrando {total} contraseñas · ♻️ {self.reused_count} reutilizadas"
             )
+        else:
+            self.update_status(f"Mostrando {total} contraseñas")
+        if not self.tree.selection():
+            self.disable_context_buttons()
 
-            tag_name = f"status_{e['id']}"
-            self.tree.item(item_id, tags=(str(e["id"]), tag_name))
-            self.tree.tag_configure(tag_name, foreground=color_code)
+    def analyze_entry_health(self, db_id):
+        """Analiza en el ejecutor una fila que el relleno aún no alcanzó."""
+        data = self.password_health_data[db_id]
+        # Una sola petición por fila, aunque el cursor siga encima
+        data["pending"] = False
+        task_executor.submit(
+            self.assess_entry_strength,
+            db_id,
+            on_success=lambda score: self.on_entry_health(db_id, data, score),
+        )
 
-            count += 1
+    def assess_entry_strength(self, db_id):
+        password = db_manager.get_secret(db_id, self.vault)
+        if password is None:
+            return None
+        return PasswordHealth.assess_strength(password)[0]
 
-        self.update_status(f"Mostrando {count} contraseñas")
-        self.disable_context_buttons()
+    def on_entry_health(self, db_id, data, score):
+        if score is None or not self.tree.winfo_exists():
+            return
+        color_code, status_title, messages = PasswordHealth.status_from_score(
+            score, data["date_for_check"], data["reuse"]
+        )
+        data.update({"title": status_title, "messages": messages, "color": color_code})
+        self.tree_renderer.set_color(db_id, color_code)
+        if self.hover_row == db_id:
+            x_root, y_root = self.hover_point[2:]
+            self.tooltip.show_tip(data["title"], data["messages"], x_root, y_root)
 
     def on_search_change(self, e):
+        if self.search_var.get() == self.current_search:
+            return
         self.current_search = self.search_var.get()
-        self.load_passwords()
+        self.tree_renderer.cancel()
+        self.search_controller.schedule(self._query_params())
 
     def on_category_change(self, e):
         self.load_passwords()
@@ -686,12 +912,25 @@ class MainApplication:
     def enable_context_buttons(self):
         self.edit_btn.config(state="normal", bg=self.widgets.accent_color)
         self.del_btn.config(state="normal", bg=self.widgets.danger_color)
+        self.copy_btn.config(state="normal", bg="#8b5cf6")
 
     def disable_context_buttons(self):
         self.edit_btn.config(state="disabled", bg="#6b7280")
         self.del_btn.config(state="disabled", bg="#6b7280")
+        self.copy_btn.config(state="disabled", bg="#6b7280")
+
+    def copy_selected_password(self):
+        if not self.selected_item:
+            return
+        id_ = int(self.selected_item)
+        password = db_manager.get_secret(id_, self.vault)
+        if password and self.clipboard_manager.copy_to_clipboard(password):
+            self.update_status("Contraseña copiada al portapapeles")
 
     def save_password(self):
+        # Un segundo clic con el guardado en vuelo duplicaría la entrada
+        if self.saving:
+            return
         cat = self.form_entries["category"].get()
         title = self.form_entries["title"].get()
         user = self.form_entries["username"].get()
@@ -708,12 +947,28 @@ class MainApplication:
             )
             return
 
-        cats = db_manager.get_categories()
-        cat_id = next((c["id"] for c in cats if c["name"] == cat), None)
+        self.saving = True
+        self.save_btn.config(state="disabled")
+        self.update_status("Guardando...")
+        task_executor.submit(
+            db_manager.add_password_entry,
+            category_service.get_id(cat),
+            title,
+            user,
+            pwd,
+            url,
+            notes,
+            self.vault,
+            on_success=self.on_password_saved,
+            on_error=lambda e: self.on_password_saved(False),
+        )
 
-        if db_manager.add_password_entry(
-            cat_id, title, user, pwd, url, notes, self.master_password
-        ):
+    def on_password_saved(self, saved):
+        self.saving = False
+        if not self.tree.winfo_exists():
+            return
+        self.save_btn.config(state="normal")
+        if saved:
             WindowHelper.show_custom_message(
                 self.root, "Guardado", "Contraseña guardada correctamente"
             )
@@ -742,24 +997,16 @@ class MainApplication:
     def edit_show_selected_password(self):
         if not self.selected_item:
             return
-        id_ = self.tree.item(self.selected_item, "tags")[0]
-        entries = db_manager.get_password_entries(self.master_password)
-        data = next((e for e in entries if e["id"] == int(id_)), None)
+        data = db_manager.get_password_entry(int(self.selected_item), self.vault)
         if data:
-            PasswordEditModal(
-                self.root, data, self.master_password, self.load_passwords
-            )
+            PasswordEditModal(self.root, data, self.vault, self.load_passwords)
 
     def delete_selected_password(self):
         if not self.selected_item:
             return
 
-        id_str = self.tree.item(self.selected_item, "tags")[0]
-        id_ = int(id_str)
-        entries = db_manager.get_password_entries(self.master_password)
-        entry_data = next((e for e in entries if e["id"] == id_), None)
-
-        title_to_show = entry_data["title"] if entry_data else "esta contraseña"
+        id_ = int(self.selected_item)
+        title_to_show = db_manager.get_entry_title(id_) or "esta contraseña"
 
         if messagebox.askyesno(
             "Eliminar",
@@ -777,10 +1024,10 @@ class MainApplication:
                 )
 
     def open_change_master_password(self):
-        PasswordChangeModal(self.root, self.master_password, self.on_master_changed)
+        PasswordChangeModal(self.root, self.vault, self.on_master_changed)
 
     def on_master_changed(self, new_pwd):
-        self.master_password = new_pwd
+        self.vault.master_password = new_pwd
         self.load_passwords()
 
     def open_usb_management(self):
@@ -791,17 +1038,42 @@ class MainApplication:
             self.load_categories()
             self.load_passwords()
 
-        USBManagementModal(self.root, self.master_password, refresh_app)
+        USBManagementModal(self.root, self.vault.master_password, refresh_app)
 
     def open_totp_management(self):
-        TOTPManagementModal(self.root, self.master_password)
+        TOTPManagementModal(self.root, self.vault)
+
+    def open_category_manager(self):
+        CategoryManagerModal(self.root, self.on_categories_changed)
+
+    def on_categories_changed(self):
+        self.load_categories()
+        self.load_passwords()
+
+    def open_kdf_settings(self):
+        KdfSettingsModal(self.root, self.vault)
 
     def update_status(self, msg):
         if hasattr(self, "status_label") and self.status_label:
             self.status_label.config(text=f"Estado: {msg}")
 
+    def close_session(self):
+        """Cancela el trabajo en curso y cierra la bóveda (logout o bloqueo AFK)."""
+        if self.reencryption_task:
+            self.reencryption_task.cancel()
+        if self.health_backfill_task:
+            self.health_backfill_task.cancel()
+        if self.hmac_backfill_task:
+            self.hmac_backfill_task.cancel()
+        self.search_controller.cancel()
+        self.tree_renderer.cancel()
+        self.cancel_hover()
+        self.hover_row = None
+        self.tooltip.destroy()
+        self.vault.close()
+
     def logout(self):
-        self.master_password = ""
+        self.close_session()
         if self.on_logout_callback:
             self.on_logout_callback()
         else:
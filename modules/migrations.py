@@ -0,0 +1,199 @@
+import sqlite3
+
+# Triggers que mantienen el índice FTS5 al día con password_entries
+ENTRY_FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS password_entries_fts_ai AFTER INSERT ON password_entries BEGIN INSERT INTO password_entries_fts(rowid, title, username, url) VALUES (new.id, new.title, new.username, new.url); END",
+    "CREATE TRIGGER IF NOT EXISTS password_entries_fts_ad AFTER DELETE ON password_entries BEGIN INSERT INTO password_entries_fts(password_entries_fts, rowid, title, username, url) VALUES ('delete', old.id, old.title, old.username, old.url); END",
+    "CREATE TRIGGER IF NOT EXISTS password_entries_fts_au AFTER UPDATE OF title, username, url ON password_entries BEGIN INSERT INTO password_entries_fts(password_entries_fts, rowid, title, username, url) VALUES ('delete', old.id, old.title, old.username, old.url); INSERT INTO password_entries_fts(rowid, title, username, url) VALUES (new.id, new.title, new.username, new.url); END",
+]
+
+DEFAULT_CATEGORIES = [
+    ("Redes Sociales", "#ef4444"),
+    ("Trabajo", "#3b82f6"),
+    ("Personal", "#10b981"),
+    ("Finanzas", "#f59e0b"),
+    ("Correos", "#8b5cf6"),
+    ("Juegos", "#ec4899"),
+    ("Streaming", "#06b6d4"),
+    ("Compras", "#84cc16"),
+    ("Otros", "#6b7280"),
+]
+
+DEFAULT_MFA_METHODS = [
+    ("master_password", 1, 1),
+    ("totp_offline", 0, 0),
+    ("usb_bypass", 0, 0),
+]
+
+
+def _add_column(cursor, table, column, declaration):
+    # Las bases anteriores a user_version pueden tener ya la columna
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _migration_1_base_schema(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS master_config (id INTEGER PRIMARY KEY, master_hash BLOB NOT NULL, master_salt BLOB NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, color TEXT DEFAULT '#3b82f6', created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)",
+        DEFAULT_CATEGORIES,
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS password_entries (id INTEGER PRIMARY KEY, category_id INTEGER, title TEXT NOT NULL, username TEXT, encrypted_password BLOB NOT NULL, password_salt BLOB NOT NULL, url TEXT, notes BLOB, notes_salt BLOB, strength INTEGER DEFAULT 0, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (category_id) REFERENCES categories(id))"
+    )
+    # ALTER TABLE no admite DEFAULT CURRENT_TIMESTAMP; las filas viejas quedan en NULL
+    _add_column(cursor, "password_entries", "updated_at", "DATETIME")
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS totp_secrets (id INTEGER PRIMARY KEY, service_name TEXT DEFAULT 'BIGestPwd', encrypted_secret BLOB NOT NULL, secret_salt BLOB NOT NULL, backup_codes BLOB, backup_salt BLOB, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    _add_column(cursor, "totp_secrets", "backup_codes", "BLOB")
+    _add_column(cursor, "totp_secrets", "backup_salt", "BLOB")
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS mfa_config (id INTEGER PRIMARY KEY, method_name TEXT NOT NULL UNIQUE, is_enabled BOOLEAN DEFAULT 0, is_configured BOOLEAN DEFAULT 0, config_data BLOB, config_salt BLOB, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO mfa_config (method_name, is_enabled, is_configured) VALUES (?, ?, ?)",
+        DEFAULT_MFA_METHODS,
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS user_profile (id INTEGER PRIMARY KEY, display_name TEXT NOT NULL, is_anonymous BOOLEAN DEFAULT 0, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS usb_devices (id INTEGER PRIMARY KEY, device_name TEXT NOT NULL, device_uuid TEXT UNIQUE NOT NULL, device_path TEXT DEFAULT '', created_at DATETIME DEFAULT CURRENT_TIMESTAMP, last_seen DATETIME DEFAULT CURRENT_TIMESTAMP, is_active BOOLEAN DEFAULT 1)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS usb_security_files (id INTEGER PRIMARY KEY, device_uuid TEXT NOT NULL, file_name TEXT NOT NULL, encrypted_data BLOB NOT NULL, file_salt BLOB NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (device_uuid) REFERENCES usb_devices(device_uuid))"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS usb_blacklist (id INTEGER PRIMARY KEY, device_uuid TEXT UNIQUE NOT NULL, device_name TEXT NOT NULL, revoked_at DATETIME DEFAULT CURRENT_TIMESTAMP, cleaned BOOLEAN DEFAULT 0, reason TEXT DEFAULT 'Usuario eliminó dispositivo')"
+    )
+
+
+def _migration_2_vault_key(cursor):
+    _add_column(cursor, "master_config", "wrapped_key", "BLOB")
+    _add_column(cursor, "master_config", "key_salt", "BLOB")
+    _add_column(cursor, "password_entries", "key_version", "INTEGER DEFAULT 0")
+    _add_column(cursor, "totp_secrets", "key_version", "INTEGER DEFAULT 0")
+
+
+def _migration_3_indexes(cursor):
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entries_category_title ON password_entries(category_id, title)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entries_title_id ON password_entries(title, id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_usb_security_files_uuid ON usb_security_files(device_uuid)"
+    )
+    # usb_blacklist.device_uuid y usb_devices.device_uuid ya tienen índice por UNIQUE
+
+
+def _migration_4_search_index(cursor):
+    try:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS password_entries_fts USING fts5(title, username, url, content='password_entries', content_rowid='id')"
+        )
+    except sqlite3.OperationalError:
+        # SQLite sin FTS5: la búsqueda usa LIKE
+        return
+    for trigger in ENTRY_FTS_TRIGGERS:
+        cursor.execute(trigger)
+    cursor.execute(
+        "INSERT INTO password_entries_fts(password_entries_fts) VALUES ('rebuild')"
+    )
+
+
+def _migration_5_entry_epochs(cursor):
+    _add_column(cursor, "password_entries", "created_epoch", "INTEGER")
+    _add_column(cursor, "password_entries", "updated_epoch", "INTEGER")
+
+
+def _migration_6_reencryption_journal(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS reencryption_journal (job_name TEXT PRIMARY KEY, source_version INTEGER NOT NULL, target_version INTEGER NOT NULL, status TEXT NOT NULL DEFAULT 'running', total INTEGER DEFAULT 0, done INTEGER DEFAULT 0, failed INTEGER DEFAULT 0, last_id INTEGER DEFAULT 0, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entries_key_version ON password_entries(key_version, id)"
+    )
+
+
+def _migration_7_kdf_params(cursor):
+    # Las bóvedas existentes quedan con el PBKDF2 fijo de antes, sin calibrar
+    _add_column(
+        cursor, "master_config", "kdf_algorithm", "TEXT DEFAULT 'pbkdf2-sha256'"
+    )
+    _add_column(cursor, "master_config", "kdf_iterations", "INTEGER DEFAULT 100000")
+    _add_column(cursor, "master_config", "kdf_memory_kib", "INTEGER DEFAULT 0")
+    _add_column(cursor, "master_config", "kdf_parallelism", "INTEGER DEFAULT 1")
+    _add_column(cursor, "master_config", "kdf_target_ms", "INTEGER DEFAULT 300")
+    _add_column(cursor, "master_config", "kdf_calibrated", "INTEGER DEFAULT 0")
+
+
+def _migration_8_attachments(cursor):
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS attachments (id INTEGER PRIMARY KEY, entry_id INTEGER NOT NULL, file_name TEXT NOT NULL, size INTEGER NOT NULL, chunk_size INTEGER NOT NULL, chunk_count INTEGER DEFAULT 0, key_salt BLOB NOT NULL, status TEXT NOT NULL DEFAULT 'writing', created_epoch INTEGER, FOREIGN KEY (entry_id) REFERENCES password_entries(id) ON DELETE CASCADE)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_attachments_entry ON attachments(entry_id)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS attachment_chunks (attachment_id INTEGER NOT NULL, chunk_index INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (attachment_id, chunk_index), FOREIGN KEY (attachment_id) REFERENCES attachments(id) ON DELETE CASCADE) WITHOUT ROWID"
+    )
+
+
+def _migration_9_password_hmac(cursor):
+    # HMAC con llave de la bóveda: detecta contraseñas repetidas sin descifrar
+    _add_column(cursor, "password_entries", "password_hmac", "BLOB")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entries_password_hmac ON password_entries(password_hmac)"
+    )
+
+
+MIGRATIONS = [
+    (1, _migration_1_base_schema),
+    (2, _migration_2_vault_key),
+    (3, _migration_3_indexes),
+    (4, _migration_4_search_index),
+    (5, _migration_5_entry_epochs),
+    (6, _migration_6_reencryption_journal),
+    (7, _migration_7_kdf_params),
+    (8, _migration_8_attachments),
+    (9, _migration_9_password_hmac),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Aplica las migraciones pendientes en una sola transacción.
+
+    Con el esquema al día solo cuesta leer ``PRAGMA user_version``.
+    """
+    current = get_schema_version(conn)
+    if current >= SCHEMA_VERSION:
+        return current
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Otro proceso pudo migrar mientras esperábamos el bloqueo
+        current = get_schema_version(conn)
+        for version, step in MIGRATIONS:
+            if version > current:
+                step(cursor)
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except:
+        conn.rollback()
+        raise
+    return SCHEMA_VERSION
@@ -0,0 +1,290 @@
+import os
+import time
+import base64
+import struct
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.backends import default_backend
+from modules.encryption import db_manager
+
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+ATTACHMENT_COMMIT_CHUNKS = 8  # trozos por transacción al escribir
+ATTACHMENT_NONCE_SIZE = 12
+# Cada trozo autentica su adjunto, su posición y si es el último
+CHUNK_AAD = struct.Struct(">QIB")
+
+
+class AttachmentStore:
+    """
+    Adjuntos cifrados de las entradas, guardados en trozos AES-GCM de tamaño
+    fijo (attachment_chunks). Cada trozo lleva su propio nonce y va ligado a
+    su posición, así que se puede leer uno cualquiera sin tocar el resto y
+    la memoria usada no depende del tamaño del archivo.
+
+    La escritura confirma cada pocos trozos: un adjunto en estado 'writing'
+    se continúa con ``resume_attachment`` desde el último trozo guardado.
+    """
+
+    def __init__(self, manager=None, chunk_size=ATTACHMENT_CHUNK_SIZE):
+        self.manager = manager or db_manager
+        self.chunk_size = chunk_size
+        self.backend = default_backend()
+
+    def _attachment_key(self, data_key: bytes, key_salt: bytes) -> bytes:
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=key_salt,
+            info=b"BIGestPwd-attachment",
+            backend=self.backend,
+        )
+        return hkdf.derive(base64.urlsafe_b64decode(data_key))
+
+    def _cipher(self, row, vault):
+        return AESGCM(self._attachment_key(vault.data_key, row["key_salt"]))
+
+    def _total_chunks(self, size, chunk_size):
+        # Un archivo vacío sigue teniendo un trozo final (vacío) que lo autentica
+        return max(1, -(-size // chunk_size))
+
+    def add_attachment(
+        self, entry_id, file_path, vault, progress_callback=None, cancel_event=None
+    ):
+        """Cifra ``file_path`` por trozos; devuelve el id del adjunto o None."""
+        try:
+            size = os.path.getsize(file_path)
+            with self.manager.db_lock:
+                with self.manager._get_connection() as conn:
+                    cursor = conn.execute(
+                        "INSERT INTO attachments (entry_id, file_name, size, chunk_size, chunk_count, key_salt, status, created_epoch) VALUES (?, ?, ?, ?, 0, ?, 'writing', ?)",
+                        (
+                            entry_id,
+                            os.path.basename(file_path),
+                            size,
+                            self.chunk_size,
+                            os.urandom(32),
+                            int(time.time()),
+                        ),
+                    )
+                    conn.commit()
+                    attachment_id = cursor.lastrowid
+        except:
+            return None
+
+        if self.resume_attachment(
+            attachment_id, file_path, vault, progress_callback, cancel_event
+        ):
+            return attachment_id
+        return None
+
+    def resume_attachment(
+        self,
+        attachment_id,
+        file_path,
+        vault,
+        progress_callback=None,
+        cancel_event=None,
+    ) -> bool:
+        """Sigue escribiendo desde el primer trozo no confirmado."""
+        row = self.get_attachment(attachment_id)
+        if not row or row["status"] != "writing":
+            return False
+        try:
+            if os.path.getsize(file_path) != row["size"]:
+                return False
+            cipher = self._cipher(row, vault)
+            chunk_size = row["chunk_size"]
+            total = self._total_chunks(row["size"], chunk_size)
+            index = row["chunk_count"]
+
+            with open(file_path, "rb") as f:
+                f.seek(index * chunk_size)
+                pending = []
+                while index < total:
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    plaintext = f.read(chunk_size)
+                    pending.append(
+                        (
+                            attachment_id,
+                            index,
+                            self._seal_chunk(
+                                cipher,
+                                attachment_id,
+                                index,
+                                index == total - 1,
+                                plaintext,
+                            ),
+                        )
+                    )
+                    index += 1
+                    if len(pending) >= ATTACHMENT_COMMIT_CHUNKS or index == total:
+                        self._write_chunks(
+                            attachment_id, pending, index, index == total
+                        )
+                        pending = []
+                        if progress_callback:
+                            progress_callback(
+                                min(index * chunk_size, row["size"]), row["size"]
+                            )
+                if pending:
+                    self._write_chunks(attachment_id, pending, index, False)
+            return index == total
+        except:
+            return False
+
+    def _seal_chunk(self, cipher, attachment_id, index, final, plaintext):
+        nonce = os.urandom(ATTACHMENT_NONCE_SIZE)
+        aad = CHUNK_AAD.pack(attachment_id, index, 1 if final else 0)
+        return nonce + cipher.encrypt(nonce, plaintext, aad)
+
+    def _write_chunks(self, attachment_id, chunks, chunk_count, complete):
+        with self.manager.db_lock:
+            with self.manager._get_connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO attachment_chunks (attachment_id, chunk_index, data) VALUES (?, ?, ?)",
+                    chunks,
+                )
+                conn.execute(
+                    "UPDATE attachments SET chunk_count = ?, status = ? WHERE id = ?",
+                    (chunk_count, "complete" if complete else "writing", attachment_id),
+                )
+
+    def get_attachment(self, attachment_id):
+        with self.manager._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, entry_id, file_name, size, chunk_size, chunk_count, key_salt, status, created_epoch FROM attachments WHERE id = ?",
+                (attachment_id,),
+            )
+            row = cursor.fetchone()
+        return self._attachment_dict(row) if row else None
+
+    def list_attachments(self, entry_id):
+        with self.manager._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, entry_id, file_name, size, chunk_size, chunk_count, key_salt, status, created_epoch FROM attachments WHERE entry_id = ? ORDER BY file_name",
+                (entry_id,),
+            )
+            return [self._attachment_dict(row) for row in cursor.fetchall()]
+
+    def _attachment_dict(self, row):
+        return {
+            "id": row[0],
+            "entry_id": row[1],
+            "file_name": row[2],
+            "size": row[3],
+            "chunk_size": row[4],
+            "chunk_count": row[5],
+            "key_salt": row[6],
+            "status": row[7],
+            "created_epoch": row[8],
+        }
+
+    def read_chunk(self, attachment_id, index, vault, _row=None, _cipher=None):
+        """Descifra un solo trozo (acceso aleatorio)."""
+        row = _row or self.get_attachment(attachment_id)
+        if (
+            not row
+            or row["status"] != "complete"
+            or not (0 <= index < row["chunk_count"])
+        ):
+            raise ValueError("Trozo de adjunto inexistente")
+        with self.manager._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT data FROM attachment_chunks WHERE attachment_id = ? AND chunk_index = ?",
+                (attachment_id, index),
+            )
+            chunk = cursor.fetchone()
+        if not chunk:
+            raise ValueError("Adjunto incompleto")
+        blob = chunk[0]
+        cipher = _cipher or self._cipher(row, vault)
+        aad = CHUNK_AAD.pack(
+            attachment_id, index, 1 if index == row["chunk_count"] - 1 else 0
+        )
+        try:
+            return cipher.decrypt(
+                blob[:ATTACHMENT_NONCE_SIZE], blob[ATTACHMENT_NONCE_SIZE:], aad
+            )
+        except:
+            raise ValueError("Error desencriptando adjunto")
+
+    def iter_attachment(self, attachment_id, vault, start=0):
+        """Genera el contenido descifrado trozo a trozo."""
+        row = self.get_attachment(attachment_id)
+        if not row or row["status"] != "complete":
+            raise ValueError("Adjunto incompleto")
+        cipher = self._cipher(row, vault)
+        for index in range(start, row["chunk_count"]):
+            yield self.read_chunk(attachment_id, index, vault, row, cipher)
+
+    def read_range(self, attachment_id, offset, length, vault):
+        """Lee ``length`` bytes desde ``offset`` descifrando solo los trozos necesarios."""
+        row = self.get_attachment(attachment_id)
+        if not row:
+            raise ValueError("Adjunto inexistente")
+        chunk_size = row["chunk_size"]
+        end = min(offset + length, row["size"])
+        if offset >= end:
+            return b""
+        cipher = self._cipher(row, vault)
+        parts = []
+        for index in range(offset // chunk_size, (end - 1) // chunk_size + 1):
+            data = self.read_chunk(attachment_id, index, vault, row, cipher)
+            chunk_start = index * chunk_size
+            parts.append(data[max(0, offset - chunk_start) : max(0, end - chunk_start)])
+        return b"".join(parts)
+
+    def export_attachment(
+        self, attachment_id, dest_path, vault, progress_callback=None
+    ) -> bool:
+        """Descifra el adjunto a ``dest_path``; si falla no deja el archivo a medias."""
+        temp_path = dest_path + ".part"
+        try:
+            row = self.get_attachment(attachment_id)
+            written = 0
+            with open(temp_path, "wb") as f:
+                for data in self.iter_attachment(attachment_id, vault):
+                    f.write(data)
+                    written += len(data)
+                    if progress_callback:
+                        progress_callback(written, row["size"])
+            if written != row["size"]:
+                raise ValueError("Tamaño inesperado")
+            os.replace(temp_path, dest_path)
+            return True
+        except:
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            except:
+                pass
+            return False
+
+    def delete_attachment(self, attachment_id) -> bool:
+        try:
+            with self.manager.db_lock:
+                with self.manager._get_connection() as conn:
+                    # Los trozos caen por ON DELETE CASCADE
+                    conn.execute(
+                        "DELETE FROM attachments WHERE id = ?", (attachment_id,)
+                    )
+            return True
+        except:
+            return False
+
+    def pending_attachments(self):
+        """Adjuntos con escritura interrumpida, para reanudarlos o descartarlos."""
+        with self.manager._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, entry_id, file_name, size, chunk_size, chunk_count, key_salt, status, created_epoch FROM attachments WHERE status = 'writing'"
+            )
+            return [self._attachment_dict(row) for row in cursor.fetchall()]
+
+
+attachment_store = AttachmentStore()
@@ -1,35 +1,65 @@
 import os
 import base64
+import struct
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
+from modules.security.secure_wipe import secure_wiper
+from modules.security.kdf import (
+    KdfParams,
+    DEFAULT_PBKDF2_ITERATIONS,
+    DEFAULT_TARGET_MS,
+    calibrate,
+    derive_key,
+)
+
+# Cabecera: magia | versión | id de KDF | iteraciones | largo de sal | id de cifrado
+FILE_MAGIC = b"BGPF"
+FILE_FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct(">4sBBIBB")
+KDF_PBKDF2_SHA256 = 1
+CIPHER_FERNET = 1
+# Coste de los datos sin cabecera (copias en usb_security_files, archivos
+# antiguos): no guardan sus iteraciones, así que este valor no puede cambiar
+FILE_KDF_ITERATIONS = DEFAULT_PBKDF2_ITERATIONS
+# Los archivos con cabecera se calibran, con tope: la USB se abre en otros equipos
+FILE_KDF_MAX_ITERATIONS = 10 * FILE_KDF_ITERATIONS
+FILE_KDF_MIN_ITERATIONS = FILE_KDF_ITERATIONS
+# Archivos sin cabecera: sal de 32 bytes (actual) o de 16 (versiones antiguas)
+LEGACY_SALT_LENGTHS = (32, 16)
+
+
+_calibrated_iterations = None
+
+
+def file_kdf_iterations() -> int:
+    """Iteraciones PBKDF2 de los archivos nuevos, medidas una vez por proceso."""
+    global _calibrated_iterations
+    if _calibrated_iterations is None:
+        iterations = calibrate(target_ms=DEFAULT_TARGET_MS).iterations
+        _calibrated_iterations = min(
+            FILE_KDF_MAX_ITERATIONS, max(FILE_KDF_ITERATIONS, iterations)
+        )
+    return _calibrated_iterations
 
 
 class FileEncryption:
     def __init__(self):
         self.backend = default_backend()
 
-    def derive_key_from_password(self, password: str, salt: bytes) -> bytes:
-        if isinstance(password, str):
-            password = password.encode()
-
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-            backend=self.backend,
-        )
-        key = kdf.derive(password)
+    def derive_key_from_password(
+        self, password: str, salt: bytes, iterations: int = FILE_KDF_ITERATIONS
+    ) -> bytes:
+        key = derive_key(password, salt, KdfParams(iterations=iterations))
         return base64.urlsafe_b64encode(key)
 
     def generate_salt(self) -> bytes:
         return os.urandom(32)
 
-    def encrypt_file(self, data: str, password: str) -> tuple[bytes, bytes]:
+    def encrypt_file(
+        self, data: str, password: str, iterations: int = FILE_KDF_ITERATIONS
+    ) -> tuple[bytes, bytes]:
         salt = self.generate_salt()
-        key = self.derive_key_from_password(password, salt)
+        key = self.derive_key_from_password(password, salt, iterations)
         cipher_suite = Fernet(key)
 
         if isinstance(data, str):
@@ -40,9 +70,15 @@ class FileEncryption:
         encrypted_data = cipher_suite.encrypt(data_bytes)
         return encrypted_data, salt
 
-    def decrypt_file(self, encrypted_data: bytes, salt: bytes, password: str) -> str:
+    def decrypt_file(
+        self,
+        encrypted_data: bytes,
+        salt: bytes,
+        password: str,
+        iterations: int = FILE_KDF_ITERATIONS,
+    ) -> str:
         try:
-            key = self.derive_key_from_password(password, salt)
+            key = self.derive_key_from_password(password, salt, iterations)
 
             f = Fernet(key)
             decrypted_data = f.decrypt(encrypted_data)
@@ -63,19 +99,7 @@ class FileEncryption:
 
     def secure_file_overwrite(self, file_path: str, passes: int = 3):
         try:
-            if not os.path.exists(file_path):
-                return
-
-            file_size = os.path.getsize(file_path)
-
-            with open(file_path, "wb") as f:
-                for _ in range(passes):
-                    f.seek(0)
-                    f.write(os.urandom(file_size))
-                    f.flush()
-                    os.fsync(f.fileno())
-            os.remove(file_path)
-
+            secure_wiper.wipe_file(file_path, passes)
         except Exception as e:
             print(f"⚠️ Error sobrescribiendo archivo seguro: {e}")
             try:
@@ -84,11 +108,44 @@ class FileEncryption:
             except:
                 pass
 
+    def build_header(self, salt: bytes, iterations: int = FILE_KDF_ITERATIONS) -> bytes:
+        return FILE_HEADER.pack(
+            FILE_MAGIC,
+            FILE_FORMAT_VERSION,
+            KDF_PBKDF2_SHA256,
+            iterations,
+            len(salt),
+            CIPHER_FERNET,
+        )
+
+    def parse_header(self, content: bytes):
+        """Devuelve (iteraciones, sal, datos) o None si el archivo no tiene cabecera."""
+        if not content.startswith(FILE_MAGIC) or len(content) < FILE_HEADER.size:
+            return None
+        _magic, version, kdf_id, iterations, salt_length, cipher_id = (
+            FILE_HEADER.unpack_from(content)
+        )
+        if (
+            version != FILE_FORMAT_VERSION
+            or kdf_id != KDF_PBKDF2_SHA256
+            or cipher_id != CIPHER_FERNET
+        ):
+            raise ValueError("Formato de archivo seguro no soportado")
+        # El archivo viene de la USB: un coste desmesurado colgaría la app
+        if not FILE_KDF_MIN_ITERATIONS <= iterations <= FILE_KDF_MAX_ITERATIONS:
+            raise ValueError("Coste de derivación fuera de rango")
+        start = FILE_HEADER.size
+        salt = content[start : start + salt_length]
+        return iterations, salt, content[start + salt_length :]
+
     def create_secure_file(self, file_path: str, content: str, password: str) -> bool:
         try:
-            encrypted_data, salt = self.encrypt_file(content, password)
+            # La cabecera guarda el coste, así que aquí sí se calibra
+            iterations = file_kdf_iterations()
+            encrypted_data, salt = self.encrypt_file(content, password, iterations)
 
             with open(file_path, "wb") as f:
+                f.write(self.build_header(salt, iterations))
                 f.write(salt)
                 f.write(encrypted_data)
 
@@ -106,20 +163,39 @@ class FileEncryption:
             with open(file_path, "rb") as f:
                 content = f.read()
 
-            try:
-                if len(content) > 32:
-                    salt_new = content[:32]
-                    data_new = content[32:]
-                    return self.decrypt_file(data_new, salt_new, password)
-            except ValueError:
-                pass
+            parsed = self.parse_header(content)
+            if parsed:
+                # La cabecera dice cómo derivar: una sola pasada de KDF
+                iterations, salt, data = parsed
+                return self.decrypt_file(data, salt, password, iterations)
 
-            if len(content) > 16:
-                salt_old = content[:16]
-                data_old = content[16:]
-                return self.decrypt_file(data_old, salt_old, password)
-
-            raise ValueError("Contraseña incorrecta o archivo corrupto")
+            plaintext = self._read_legacy_content(content, password)
+            self._upgrade_legacy_file(file_path, plaintext, password)
+            return plaintext
 
         except Exception as e:
             raise ValueError(f"Error leyendo archivo seguro: {e}")
+
+    def _read_legacy_content(self, content: bytes, password: str) -> str:
+        for salt_length in LEGACY_SALT_LENGTHS:
+            if len(content) > salt_length:
+                try:
+                    return self.decrypt_file(
+                        content[salt_length:], content[:salt_length], password
+                    )
+                except ValueError:
+                    continue
+        raise ValueError("Contraseña incorrecta o archivo corrupto")
+
+    def _upgrade_legacy_file(self, file_path: str, plaintext: str, password: str):
+        # Se reescribe con cabecera tras la primera lectura correcta
+        temp_path = file_path + ".tmp"
+        try:
+            if self.create_secure_file(temp_path, plaintext, password):
+                os.replace(temp_path, file_path)
+        except:
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            except:
+                pass
@@ -0,0 +1,166 @@
+import os
+import time
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from cryptography.hazmat.backends import default_backend
+
+KDF_PBKDF2_SHA256 = "pbkdf2-sha256"
+KDF_SCRYPT = "scrypt"
+KDF_ARGON2ID = "argon2id"
+KDF_LABELS = {
+    KDF_PBKDF2_SHA256: "PBKDF2-SHA256",
+    KDF_SCRYPT: "scrypt",
+    KDF_ARGON2ID: "Argon2id",
+}
+
+# Coste histórico de BIGestPwd: es el de las bóvedas y entradas existentes
+DEFAULT_PBKDF2_ITERATIONS = 100000
+DEFAULT_TARGET_MS = 300
+
+PBKDF2_PROBE_ITERATIONS = 50000
+CALIBRATION_PROBES = 3
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_MIN_LOG_N = 14
+SCRYPT_MAX_LOG_N = 18  # 256 MiB
+ARGON2_MEMORY_KIB = 65536
+ARGON2_MIN_PASSES = 2
+ARGON2_MAX_PASSES = 16
+
+
+class KdfParams:
+    """
+    Algoritmo y coste de la derivación de la llave maestra.
+    ``iterations`` son rondas en PBKDF2, N en scrypt y pasadas en Argon2id.
+    """
+
+    def __init__(
+        self,
+        algorithm=KDF_PBKDF2_SHA256,
+        iterations=DEFAULT_PBKDF2_ITERATIONS,
+        memory_kib=0,
+        parallelism=1,
+    ):
+        self.algorithm = algorithm
+        self.iterations = iterations
+        self.memory_kib = memory_kib
+        self.parallelism = parallelism
+
+    def describe(self) -> str:
+        label = KDF_LABELS.get(self.algorithm, self.algorithm)
+        if self.algorithm == KDF_PBKDF2_SHA256:
+            return f"{label}, {self.iterations:,} iteraciones"
+        if self.algorithm == KDF_SCRYPT:
+            return f"{label}, N={self.iterations:,}, {self.memory_kib // 1024} MiB"
+        return f"{label}, {self.iterations} pasadas, {self.memory_kib // 1024} MiB, {self.parallelism} hilos"
+
+    def __eq__(self, other):
+        return isinstance(other, KdfParams) and (
+            self.algorithm,
+            self.iterations,
+            self.memory_kib,
+            self.parallelism,
+        ) == (other.algorithm, other.iterations, other.memory_kib, other.parallelism)
+
+
+LEGACY_KDF_PARAMS = KdfParams()
+
+
+def _argon2id_class():
+    # Argon2id llega con cryptography 44; en versiones anteriores no se ofrece
+    try:
+        from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+
+        return Argon2id
+    except ImportError:
+        return None
+
+
+def available_algorithms():
+    algorithms = [KDF_PBKDF2_SHA256, KDF_SCRYPT]
+    if _argon2id_class() is not None:
+        algorithms.append(KDF_ARGON2ID)
+    return algorithms
+
+
+def derive_key(password, salt: bytes, params: KdfParams = None, length=32) -> bytes:
+    """Deriva ``length`` bytes crudos con los parámetros dados."""
+    params = params or LEGACY_KDF_PARAMS
+    if isinstance(password, str):
+        password = password.encode()
+
+    if params.algorithm == KDF_PBKDF2_SHA256:
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=length,
+            salt=salt,
+            iterations=params.iterations,
+            backend=default_backend(),
+        )
+    elif params.algorithm == KDF_SCRYPT:
+        kdf = Scrypt(
+            salt=salt,
+            length=length,
+            n=params.iterations,
+            r=SCRYPT_BLOCK_SIZE,
+            p=params.parallelism,
+            backend=default_backend(),
+        )
+    elif params.algorithm == KDF_ARGON2ID:
+        argon2id = _argon2id_class()
+        if argon2id is None:
+            raise ValueError("Argon2id no está disponible en esta instalación")
+        kdf = argon2id(
+            salt=salt,
+            length=length,
+            iterations=params.iterations,
+            lanes=params.parallelism,
+            memory_cost=params.memory_kib,
+        )
+    else:
+        raise ValueError(f"KDF desconocido: {params.algorithm}")
+    return kdf.derive(password)
+
+
+def measure_ms(params: KdfParams) -> float:
+    start = time.perf_counter()
+    derive_key("calibración", os.urandom(32), params)
+    return (time.perf_counter() - start) * 1000
+
+
+def _probe_ms(params: KdfParams) -> float:
+    # La primera derivación de un proceso sale lenta (OpenSSL y cachés en frío)
+    # y haría elegir un coste demasiado bajo: se descarta y se toma la mejor
+    measure_ms(params)
+    return min(measure_ms(params) for _ in range(CALIBRATION_PROBES))
+
+
+def calibrate(algorithm=KDF_PBKDF2_SHA256, target_ms=DEFAULT_TARGET_MS) -> KdfParams:
+    """
+    Mide esta máquina y elige el coste que tarda ~``target_ms`` en desbloquear.
+    Nunca baja del coste histórico de PBKDF2.
+    """
+    if algorithm == KDF_PBKDF2_SHA256:
+        elapsed = _probe_ms(KdfParams(iterations=PBKDF2_PROBE_ITERATIONS))
+        iterations = int(PBKDF2_PROBE_ITERATIONS * target_ms / max(elapsed, 0.1))
+        iterations = max(DEFAULT_PBKDF2_ITERATIONS, iterations // 1000 * 1000)
+        return KdfParams(KDF_PBKDF2_SHA256, iterations)
+
+    if algorithm == KDF_SCRYPT:
+        # El coste crece lineal con N: se duplica mientras acerque al objetivo
+        log_n = SCRYPT_MIN_LOG_N
+        elapsed = _probe_ms(KdfParams(KDF_SCRYPT, 2**log_n))
+        while log_n < SCRYPT_MAX_LOG_N and elapsed * 1.5 <= target_ms:
+            log_n += 1
+            elapsed *= 2
+        n = 2**log_n
+        return KdfParams(KDF_SCRYPT, n, 128 * SCRYPT_BLOCK_SIZE * n // 1024, 1)
+
+    if algorithm == KDF_ARGON2ID:
+        parallelism = min(4, os.cpu_count() or 1)
+        elapsed = _probe_ms(KdfParams(KDF_ARGON2ID, 1, ARGON2_MEMORY_KIB, parallelism))
+        passes = round(target_ms / max(elapsed, 0.1))
+        passes = min(ARGON2_MAX_PASSES, max(ARGON2_MIN_PASSES, passes))
+        return KdfParams(KDF_ARGON2ID, passes, ARGON2_MEMORY_KIB, parallelism)
+
+    raise ValueError(f"KDF desconocido: {algorithm}")
@@ -0,0 +1,290 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.encryption import (
+    db_manager,
+    encryption_system,
+    KEY_VERSION_LEGACY,
+    KEY_VERSION_DATA_KEY,
+    KEY_VERSION_RECORD,
+    RECORD_EMPTY_SALT,
+)
+
+REENCRYPT_BATCH_SIZE = 100
+# PBKDF2 de OpenSSL libera el GIL, así que los hilos escalan
+REENCRYPT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+REENCRYPT_LOCK_POLL_S = 0.1
+
+
+class ReencryptionJob:
+    """
+    Describe un re-cifrado de password_entries: las filas con
+    ``source_version`` se abren con ``open_field`` y se vuelven a sellar con
+    ``seal_field`` quedando en ``target_version``.
+    """
+
+    def __init__(self, name, source_version, target_version, open_field, seal_field):
+        self.name = name
+        self.source_version = source_version
+        self.target_version = target_version
+        self.open_field = open_field
+        self.seal_field = seal_field
+
+    def reseal_row(self, row, vault):
+        """
+        Abre y vuelve a sellar una fila. Ya con la contraseña en claro se
+        calculan su fortaleza y su HMAC: así los rellenos no vuelven a
+        descifrarla.
+        """
+        from modules.utils.helpers import PasswordHealth
+
+        entry_id, enc_pwd, pwd_salt, enc_notes, notes_salt = row
+        try:
+            password = self.open_field(enc_pwd, pwd_salt, vault)
+            new_pwd, new_pwd_salt = self.seal_field(password, vault)
+            new_notes, new_notes_salt = (None, None)
+            if enc_notes:
+                notes = self.open_field(enc_notes, notes_salt, vault)
+                if notes:
+                    new_notes, new_notes_salt = self.seal_field(notes, vault)
+            return (
+                new_pwd,
+                new_pwd_salt,
+                new_notes,
+                new_notes_salt,
+                PasswordHealth.assess_strength(password)[0],
+                encryption_system.password_hmac(password, vault.data_key),
+                entry_id,
+            )
+        except:
+            return None
+
+
+def _seal_record(plaintext, vault):
+    return encryption_system.seal_record(plaintext, vault.data_key), RECORD_EMPTY_SALT
+
+
+def legacy_to_record_job():
+    """Entradas con PBKDF2 por campo (versión 0) -> registro binario (versión 2)."""
+    return ReencryptionJob(
+        "legacy_to_record",
+        KEY_VERSION_LEGACY,
+        KEY_VERSION_RECORD,
+        lambda token, salt, vault: encryption_system.decrypt_data(
+            token, salt, vault.master_password
+        ),
+        _seal_record,
+    )
+
+
+def data_key_to_record_job():
+    """Tokens Fernet con subllave por sal (versión 1) -> registro binario (versión 2)."""
+    return ReencryptionJob(
+        "data_key_to_record",
+        KEY_VERSION_DATA_KEY,
+        KEY_VERSION_RECORD,
+        lambda token, salt, vault: encryption_system.decrypt_with_key(
+            token, salt, vault.data_key
+        ),
+        _seal_record,
+    )
+
+
+def upgrade_jobs():
+    """Trabajos que llevan cualquier entrada al formato actual, en orden."""
+    return [legacy_to_record_job(), data_key_to_record_job()]
+
+
+class ReencryptionRunner:
+    """
+    Ejecuta trabajos de re-cifrado por lotes confirmados.
+
+    Cada lote actualiza las filas y el diario (reencryption_journal) en la
+    misma transacción: si el proceso muere, las filas ya convertidas quedan
+    en su nueva versión y el trabajo continúa desde ``last_id``. Las lecturas
+    descifran según ``key_version``, así que un estado mixto es válido.
+
+    Cada trabajo tiene un solo diario, así que sus ejecuciones van de una en
+    una: la que llega con otra en curso (p. ej. un cambio de llave maestra con
+    el re-cifrado de fondo) espera a que termine. Un diario en 'running' sin
+    nadie ejecutándolo es de un proceso que murió y se reanuda.
+    """
+
+    def __init__(
+        self,
+        manager=None,
+        batch_size=REENCRYPT_BATCH_SIZE,
+        max_workers=REENCRYPT_MAX_WORKERS,
+    ):
+        self.manager = manager or db_manager
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._job_locks = {}
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="reencrypt"
+                    )
+        return self._pool
+
+    def _job_lock(self, job):
+        with self._lock:
+            return self._job_locks.setdefault(job.name, threading.Lock())
+
+    def pending(self, job):
+        with self.manager._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM password_entries WHERE key_version = ?",
+                (job.source_version,),
+            )
+            return cursor.fetchone()[0]
+
+    def get_journal(self, job):
+        with self.manager._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT status, total, done, failed, last_id FROM reencryption_journal WHERE job_name = ?",
+                (job.name,),
+            )
+            row = cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "status": row[0],
+            "total": row[1],
+            "done": row[2],
+            "failed": row[3],
+            "last_id": row[4],
+        }
+
+    def run(self, job, vault, progress_callback=None, cancel_event=None):
+        """Devuelve True si el trabajo terminó; False si se canceló o falló."""
+        lock = self._job_lock(job)
+        # Se espera a la otra ejecución sin dejar de atender la cancelación
+        while not lock.acquire(timeout=REENCRYPT_LOCK_POLL_S):
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+        try:
+            return self._run(job, vault, progress_callback, cancel_event)
+        finally:
+            lock.release()
+
+    def _run(self, job, vault, progress_callback, cancel_event):
+        journal = self._begin(job)
+        done, total, failed, last_id = (
+            journal["done"],
+            journal["total"],
+            journal["failed"],
+            journal["last_id"],
+        )
+        if progress_callback:
+            progress_callback(done, total)
+
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                self._set_status(job, "cancelled")
+                return False
+
+            rows = self._next_batch(job, last_id)
+            if not rows:
+                self._set_status(job, "done")
+                return True
+
+            resealed = list(
+                self._get_pool().map(lambda row: job.reseal_row(row, vault), rows)
+            )
+            updates = [r for r in resealed if r is not None]
+
+            try:
+                # Bóveda bloqueada a mitad de lote: no se escribe y se reanuda luego
+                vault.data_key
+            except ValueError:
+                self._set_status(job, "cancelled")
+                return False
+
+            last_id = rows[-1][0]
+            failed += len(rows) - len(updates)
+            done += len(updates)
+            try:
+                with self.manager.db_lock:
+                    with self.manager._get_connection() as conn:
+                        conn.executemany(
+                            f"UPDATE password_entries SET encrypted_password = ?, password_salt = ?, notes = ?, notes_salt = ?, strength = ?, password_hmac = ?, created_epoch = COALESCE(created_epoch, CAST(strftime('%s', created_at) AS INTEGER)), updated_epoch = COALESCE(updated_epoch, CAST(strftime('%s', COALESCE(updated_at, created_at)) AS INTEGER)), key_version = {job.target_version} WHERE id = ? AND key_version = {job.source_version}",
+                            updates,
+                        )
+                        conn.execute(
+                            "UPDATE reencryption_journal SET done = ?, failed = ?, last_id = ?, updated_at = CURRENT_TIMESTAMP WHERE job_name = ?",
+                            (done, failed, last_id, job.name),
+                        )
+            except:
+                self._set_status(job, "failed")
+                return False
+
+            if progress_callback:
+                progress_callback(done, total)
+
+    def run_all(self, jobs, vault, progress_callback=None, cancel_event=None) -> bool:
+        """Ejecuta uno tras otro los trabajos con filas pendientes."""
+        for job in jobs:
+            if self.pending(job) == 0:
+                continue
+            if not self.run(job, vault, progress_callback, cancel_event):
+                return False
+        return True
+
+    def _begin(self, job):
+        journal = self.get_journal(job)
+        remaining = self.pending(job)
+        with self.manager.db_lock:
+            with self.manager._get_connection() as conn:
+                if journal and journal["status"] in ("running", "cancelled"):
+                    # Se reanuda: lo ya convertido más lo que queda
+                    journal["total"] = journal["done"] + remaining
+                    conn.execute(
+                        "UPDATE reencryption_journal SET status = 'running', total = ?, updated_at = CURRENT_TIMESTAMP WHERE job_name = ?",
+                        (journal["total"], job.name),
+                    )
+                else:
+                    journal = {
+                        "status": "running",
+                        "total": remaining,
+                        "done": 0,
+                        "failed": 0,
+                        "last_id": 0,
+                    }
+                    conn.execute(
+                        "INSERT OR REPLACE INTO reencryption_journal (job_name, source_version, target_version, status, total, done, failed, last_id) VALUES (?, ?, ?, 'running', ?, 0, 0, 0)",
+                        (
+                            job.name,
+                            job.source_version,
+                            job.target_version,
+                            remaining,
+                        ),
+                    )
+        return journal
+
+    def _next_batch(self, job, last_id):
+        with self.manager._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, encrypted_password, password_salt, notes, notes_salt FROM password_entries WHERE key_version = ? AND id > ? ORDER BY id LIMIT ?",
+                (job.source_version, last_id, self.batch_size),
+            )
+            return cursor.fetchall()
+
+    def _set_status(self, job, status):
+        with self.manager.db_lock:
+            with self.manager._get_connection() as conn:
+                conn.execute(
+                    "UPDATE reencryption_journal SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE job_name = ?",
+                    (status, job.name),
+                )
+
+
+reencryption_runner = ReencryptionRunner()
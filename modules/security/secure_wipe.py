@@ -0,0 +1,195 @@
+import os
+import stat
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+WIPE_BLOCK_SIZE = 1024 * 1024
+WIPE_DEFAULT_PASSES = 3
+WIPE_MAX_WORKERS = 4
+PATTERN_RANDOM = "random"
+PATTERN_ZERO = "zero"
+
+
+def is_link(path) -> bool:
+    """Enlace simbólico o unión de Windows (no se debe seguir al borrar)."""
+    if os.path.islink(path):
+        return True
+    isjunction = getattr(os.path, "isjunction", None)
+    return bool(isjunction and isjunction(path))
+
+
+class WipeReport:
+    """Resultado de un borrado: archivos, bytes sobrescritos y velocidad."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.links = 0
+        self.failed = []
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_link(self):
+        with self._lock:
+            self.links += 1
+
+    def add(self, path, wiped_bytes, ok):
+        with self._lock:
+            if ok:
+                self.files += 1
+                self.bytes += wiped_bytes
+            else:
+                self.failed.append(path)
+
+    @property
+    def throughput_mb_s(self) -> float:
+        if self.seconds <= 0:
+            return 0.0
+        return self.bytes / (1024 * 1024) / self.seconds
+
+    def summary(self) -> str:
+        return f"{self.files} archivos, {self.bytes / (1024 * 1024):.1f} MiB en {self.seconds:.2f} s ({self.throughput_mb_s:.1f} MiB/s)"
+
+
+class SecureWiper:
+    """
+    Sobrescritura segura por bloques de tamaño fijo: la memoria usada es un
+    bloque por hilo, sea cual sea el tamaño del archivo. Los árboles de
+    carpetas se borran con un grupo acotado de hilos.
+    """
+
+    def __init__(
+        self,
+        block_size=WIPE_BLOCK_SIZE,
+        passes=WIPE_DEFAULT_PASSES,
+        max_workers=WIPE_MAX_WORKERS,
+    ):
+        self.block_size = block_size
+        self.passes = passes
+        self.max_workers = max_workers
+
+    def _overwrite(self, file_path, passes, pattern):
+        size = os.path.getsize(file_path)
+        zero_block = bytes(self.block_size) if pattern == PATTERN_ZERO else None
+        # r+b sobrescribe en el sitio; wb truncaría y escribiría en bloques nuevos.
+        # O_NOFOLLOW: si alguien cambia el archivo por un enlace, no se sigue
+        fd = os.open(file_path, os.O_RDWR | getattr(os, "O_NOFOLLOW", 0))
+        with os.fdopen(fd, "r+b") as f:
+            for _ in range(passes):
+                f.seek(0)
+                remaining = size
+                while remaining > 0:
+                    n = min(self.block_size, remaining)
+                    if zero_block is not None:
+                        f.write(zero_block[:n])
+                    else:
+                        f.write(os.urandom(n))
+                    remaining -= n
+                f.flush()
+                os.fsync(f.fileno())
+        return size * passes
+
+    def wipe_file(self, file_path, passes=None, pattern=PATTERN_RANDOM) -> int:
+        """Sobrescribe, renombra y borra el archivo; devuelve los bytes escritos.
+
+        Los enlaces (simbólicos o uniones) se borran sin tocar su destino.
+        """
+        if is_link(file_path):
+            os.unlink(file_path)
+            return 0
+        if not os.path.exists(file_path):
+            return 0
+        if not stat.S_ISREG(os.lstat(file_path).st_mode):
+            raise ValueError(f"No es un archivo normal: {file_path}")
+        passes = self.passes if passes is None else passes
+        try:
+            # Archivos de solo lectura u ocultos (marcas de la USB)
+            os.chmod(file_path, stat.S_IWRITE | stat.S_IREAD)
+        except:
+            pass
+
+        written = self._overwrite(file_path, passes, pattern)
+
+        # El nombre también delata: se renombra y trunca antes de borrar
+        hidden_path = os.path.join(os.path.dirname(file_path), uuid.uuid4().hex)
+        try:
+            os.replace(file_path, hidden_path)
+            file_path = hidden_path
+            with open(file_path, "r+b") as f:
+                f.truncate(0)
+        except:
+            pass
+        os.remove(file_path)
+        return written
+
+    def wipe_tree(
+        self, root_path, passes=None, pattern=PATTERN_RANDOM, progress_callback=None
+    ) -> WipeReport:
+        """Borra de forma segura todos los archivos de ``root_path`` y la carpeta."""
+        report = WipeReport()
+        start = time.perf_counter()
+        if is_link(root_path) or not os.path.isdir(root_path):
+            report.seconds = time.perf_counter() - start
+            return report
+
+        files = []
+        links = []
+        directories = []
+        # Sin seguir enlaces: nada fuera de root_path se sobrescribe
+        for current, dirnames, filenames in os.walk(root_path, followlinks=False):
+            directories.append(current)
+            subdirs = []
+            for name in dirnames:
+                path = os.path.join(current, name)
+                if is_link(path):
+                    links.append(path)
+                else:
+                    subdirs.append(name)
+            dirnames[:] = subdirs
+            for name in filenames:
+                path = os.path.join(current, name)
+                if is_link(path):
+                    links.append(path)
+                else:
+                    files.append(path)
+
+        for path in links:
+            try:
+                os.unlink(path)
+                report.add_link()
+            except:
+                # Las uniones de Windows se quitan como carpetas vacías
+                try:
+                    os.rmdir(path)
+                    report.add_link()
+                except:
+                    report.failed.append(path)
+
+        def wipe(path):
+            try:
+                report.add(path, self.wipe_file(path, passes, pattern), True)
+            except:
+                report.add(path, 0, False)
+            if progress_callback:
+                progress_callback(report.files + len(report.failed), len(files))
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_workers, len(files))),
+            thread_name_prefix="wipe",
+        ) as executor:
+            list(executor.map(wipe, files))
+
+        # Carpetas de la más profunda a la raíz
+        for directory in reversed(directories):
+            try:
+                os.rmdir(directory)
+            except:
+                report.failed.append(directory)
+
+        report.seconds = time.perf_counter() - start
+        return report
+
+
+secure_wiper = SecureWiper()
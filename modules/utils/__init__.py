@@ -1,3 +1,14 @@
-from .helpers import WindowHelper
+import importlib
+
+_LAZY_EXPORTS = {"WindowHelper": ".helpers"}
 
 __all__ = ["WindowHelper"]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -2,6 +2,7 @@ import time
 import threading
 import ctypes
 from ctypes import Structure, windll, c_uint, sizeof, byref
+from modules.utils.task_executor import task_executor
 
 
 class LASTINPUTINFO(Structure):
@@ -41,7 +42,8 @@ class AFKMonitor:
                 idle_time = self._get_idle_time()
                 if idle_time >= self.timeout_seconds:
                     if self.callback:
-                        self.callback()
+                        # El aviso se entrega en el hilo de Tk
+                        task_executor.post(self.callback)
                         self._wait_for_activity()
                 time.sleep(5)
             except Exception:
@@ -149,25 +149,38 @@ class PasswordHealth:
         complexity_count = sum([has_lower, has_upper, has_digit, has_special])
         score += complexity_count
 
+        return (score,) + PasswordHealth.strength_label(score)
+
+    @staticmethod
+    def strength_label(score):
         if score >= 6:
-            return score, "Excelente", "#3b82f6", "🔵"
+            return "Excelente", "#3b82f6", "🔵"
         elif score >= 5:
-            return score, "Segura", "#10b981", "🟢"
+            return "Segura", "#10b981", "🟢"
         elif score >= 3:
-            return score, "Moderada", "#f59e0b", "🟡"
+            return "Moderada", "#f59e0b", "🟡"
         else:
-            return score, "Débil", "#ef4444", "🔴"
+            return "Débil", "#ef4444", "🔴"
 
     @staticmethod
     def calculate_status(password, date_str):
+        score = PasswordHealth.assess_strength(password)[0]
+        return PasswordHealth.status_from_score(score, date_str)
+
+    @staticmethod
+    def status_from_score(score, date_str, reuse_count=0):
+        """Estado de salud a partir de la fortaleza (None = aún sin analizar) y la fecha.
+
+        La fecha puede ser un epoch entero o el texto de SQLite.
+        ``reuse_count`` es el número de otras entradas con la misma contraseña.
+        """
         msgs = []
-        score, strength_text, strength_color, strength_emoji = (
-            PasswordHealth.assess_strength(password)
-        )
 
         try:
             if not date_str:
                 date_obj = datetime.now()
+            elif isinstance(date_str, int):
+                date_obj = datetime.fromtimestamp(date_str)
             else:
                 date_obj = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
 
@@ -176,15 +189,24 @@ class PasswordHealth:
         except:
             months = 0
 
-        msgs.append(f"{strength_emoji} Fortaleza: {strength_text}")
+        if score is None:
+            msgs.append("⚪ Fortaleza: sin analizar")
+        else:
+            strength_text, strength_color, strength_emoji = (
+                PasswordHealth.strength_label(score)
+            )
+            msgs.append(f"{strength_emoji} Fortaleza: {strength_text}")
 
-        if score < 3:
-            msgs.append("• Contraseña débil o muy corta.")
-            msgs.append("• Se recomienda mejorarla usando el generador.")
+            if score < 3:
+                msgs.append("• Contraseña débil o muy corta.")
+                msgs.append("• Se recomienda mejorarla usando el generador.")
 
         if months > 0:
             msgs.append(f"• Antigüedad: {months} mes(es).")
 
+        if reuse_count:
+            msgs.append(f"♻️ Repetida en {reuse_count} entrada(s) más.")
+
         if months >= 6:
             return (
                 "#ef4444",
@@ -193,7 +215,18 @@ class PasswordHealth:
                 + msgs,
             )
 
-        if score < 3:
+        if reuse_count:
+            return (
+                "#ef4444",
+                "Riesgo: Reutilizada",
+                [
+                    "• La misma contraseña protege otras cuentas.",
+                    "• Usa una distinta en cada sitio.",
+                ]
+                + msgs,
+            )
+
+        if score is not None and score < 3:
             return (
                 "#ef4444",
                 "Riesgo: Insegura",
@@ -207,6 +240,9 @@ class PasswordHealth:
                 ["• Tiene más de 3 meses.", "• Considera renovarla."] + msgs,
             )
 
+        if score is None:
+            return "#6b7280", "Fortaleza sin analizar", msgs
+
         if score < 5:
             return "#f59e0b", "Seguridad Moderada", ["• Podría ser más robusta."] + msgs
 
@@ -214,44 +250,77 @@ class PasswordHealth:
 
 
 class Tooltip:
+    """Ventana de ayuda única: se crea una vez y luego solo se mueve, se
+    oculta o cambia su texto cuando el contenido es otro."""
+
     def __init__(self, widget):
         self.widget = widget
         self.tipwindow = None
-        self.id = None
-        self.x = self.y = 0
-
-    def show_tip(self, text_title, text_lines, x, y):
-        self.hide_tip()
+        self.title_label = None
+        self.body_label = None
+        self.content = None
+        self.position = None
+        self.visible = False
+
+    def _ensure_window(self):
+        if self.tipwindow is not None and self.tipwindow.winfo_exists():
+            return
+        widgets = ModernWidgets()
         self.tipwindow = tw = tk.Toplevel(self.widget)
         tw.wm_overrideredirect(1)
-        tw.wm_geometry("+%d+%d" % (x + 15, y + 10))
+        tw.withdraw()
 
-        widgets = ModernWidgets()
         main = tk.Frame(tw, bg=widgets.card_bg, relief="solid", bd=1)
         main.pack()
-
-        tk.Label(
+        self.title_label = tk.Label(
             main,
-            text=text_title,
             font=("Segoe UI", 10, "bold"),
             bg=widgets.card_bg,
             fg=widgets.accent_color,
             justify="left",
-        ).pack(anchor="w", padx=10, pady=(5, 0))
-
-        for line in text_lines:
-            tk.Label(
-                main,
-                text=line,
-                font=("Segoe UI", 9),
-                bg=widgets.card_bg,
-                fg="white",
-                justify="left",
-            ).pack(anchor="w", padx=10, pady=(0, 2))
+        )
+        self.title_label.pack(anchor="w", padx=10, pady=(5, 0))
+        self.body_label = tk.Label(
+            main,
+            font=("Segoe UI", 9),
+            bg=widgets.card_bg,
+            fg="white",
+            justify="left",
+        )
+        self.body_label.pack(anchor="w", padx=10, pady=(0, 7))
+        self.content = None
+        self.position = None
+        self.visible = False
 
-        tk.Frame(main, bg=widgets.card_bg, height=5).pack()
+    def show_tip(self, text_title, text_lines, x, y):
+        self._ensure_window()
+        content = (text_title, text_lines)
+        if content != self.content:
+            self.title_label.config(text=text_title)
+            self.body_label.config(text="\n".join(text_lines))
+            self.content = content
+        position = (x + 15, y + 10)
+        if position != self.position:
+            self.tipwindow.wm_geometry("+%d+%d" % position)
+            self.position = position
+        if not self.visible:
+            self.tipwindow.deiconify()
+            self.tipwindow.lift()
+            self.visible = True
 
     def hide_tip(self):
-        if self.tipwindow:
-            self.tipwindow.destroy()
+        if self.visible:
+            try:
+                self.tipwindow.withdraw()
+            except:
+                pass
+            self.visible = False
+
+    def destroy(self):
+        if self.tipwindow is not None:
+            try:
+                self.tipwindow.destroy()
+            except:
+                pass
             self.tipwindow = None
+        self.visible = False
@@ -0,0 +1,57 @@
+from modules.utils.task_executor import task_executor
+
+
+class SearchController:
+    """Búsqueda con debounce fuera del hilo de Tk.
+
+    Cada pulsación reprograma la consulta; solo se ejecuta la última y los
+    resultados de consultas obsoletas (generación antigua) se descartan.
+    """
+
+    def __init__(self, root, query_func, on_results, delay_ms=200, executor=None):
+        self.root = root
+        self.query_func = query_func
+        self.on_results = on_results
+        self.delay_ms = delay_ms
+        self.executor = executor or task_executor
+
+        self.generation = 0
+        self._after_id = None
+        self._task = None
+
+    def schedule(self, params, delay_ms=None):
+        """Programa una consulta; cancela la pendiente si aún no ha salido."""
+        self._cancel_pending()
+        delay = self.delay_ms if delay_ms is None else delay_ms
+        self._after_id = self.root.after(delay, lambda: self._submit(params))
+
+    def cancel(self):
+        self._cancel_pending()
+        self.generation += 1
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _cancel_pending(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _submit(self, params):
+        self._after_id = None
+        self.generation += 1
+        generation = self.generation
+        # Si la anterior aún no empezó, ya no sale; si corre, se ignora su resultado
+        if self._task is not None:
+            self._task.cancel()
+        self._task = self.executor.submit(
+            self.query_func,
+            on_success=lambda results: self._deliver(generation, params, results),
+            on_error=lambda e: self._deliver(generation, params, []),
+            **params,
+        )
+
+    def _deliver(self, generation, params, results):
+        if generation == self.generation:
+            self._task = None
+            self.on_results(results, params)
@@ -3,6 +3,7 @@ from pystray import Icon, MenuItem, Menu
 from PIL import Image
 import os
 import sys
+from modules.utils.task_executor import task_executor
 
 
 class AppTrayIcon:
@@ -50,11 +51,11 @@ class AppTrayIcon:
 
     def _action_show(self, icon, item):
         if self.on_show and self.root:
-            self.root.after(0, self.on_show)
+            task_executor.post(self.on_show)
 
     def _action_exit(self, icon, item):
         self.stop()
         if self.on_exit and self.root:
-            self.root.after(0, self.on_exit)
+            task_executor.post(self.on_exit)
         elif self.on_exit:
             self.on_exit()
@@ -0,0 +1,199 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TASK_MAX_WORKERS = 4
+BACKGROUND_MAX_WORKERS = 1  # trabajos largos: de uno en uno, aparte de la interfaz
+DISPATCH_BUSY_MS = 16  # ~60 fps mientras hay tareas en curso
+DISPATCH_IDLE_MS = 100
+DISPATCH_BUDGET_MS = 8  # tiempo máximo de callbacks por vuelta del bucle de Tk
+
+
+class TaskFuture:
+    """Tarea enviada al ejecutor. Al cancelarla sus callbacks ya no se llaman."""
+
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.state = "pending"
+        self.value = None
+        self.error = None
+        self._future = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self._future is not None and self._future.cancel():
+            self.state = "cancelled"
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def done(self) -> bool:
+        return self.state in ("done", "failed", "cancelled")
+
+    def result(self, timeout=None):
+        """Espera el resultado (solo fuera del hilo de Tk)."""
+        self._future.result(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class TaskExecutor:
+    """
+    Trabajo bloqueante (DB, cifrado, red, USB) fuera del hilo de Tk.
+
+    Las tareas corren en un grupo acotado de hilos. Sus resultados, errores y
+    avances se encolan y un único despachador, programado con ``after`` en el
+    hilo de Tk, los entrega. Ningún otro hilo toca Tk: desde fuera se usa
+    ``post``.
+
+    Los trabajos largos (re-cifrado, rellenos, rehash) van con
+    ``background=True`` a su propio grupo y se ejecutan en orden de llegada:
+    nunca ocupan los hilos de las consultas y búsquedas de la interfaz.
+    """
+
+    def __init__(
+        self, max_workers=TASK_MAX_WORKERS, background_workers=BACKGROUND_MAX_WORKERS
+    ):
+        self.max_workers = max_workers
+        self.background_workers = background_workers
+        self.root = None
+        self._pool = None
+        self._background_pool = None
+        self._callbacks = queue.SimpleQueue()
+        self._running = 0
+        self._lock = threading.Lock()
+        self._dispatch_id = None
+
+    def attach(self, root):
+        """Engancha el despachador al bucle de ``root`` (desde el hilo de Tk)."""
+        if self.root is root and self._dispatch_id is not None:
+            return
+        if self.root is not None and self._dispatch_id is not None:
+            try:
+                self.root.after_cancel(self._dispatch_id)
+            except:
+                pass
+        self.root = root
+        self._schedule(0)
+
+    def post(self, callback, *args):
+        """Ejecuta ``callback(*args)`` en el hilo de Tk. Seguro desde cualquier hilo."""
+        self._callbacks.put((callback, args))
+
+    def submit(
+        self,
+        func,
+        *args,
+        on_success=None,
+        on_error=None,
+        on_progress=None,
+        cancellable=False,
+        background=False,
+        **kwargs,
+    ) -> TaskFuture:
+        """
+        Ejecuta ``func`` en el grupo de hilos. ``on_success``/``on_error``
+        reciben el resultado o la excepción en el hilo de Tk. Con
+        ``on_progress`` la función recibe ``progress_callback`` y con
+        ``cancellable`` recibe ``cancel_event``. Con ``background`` va al
+        grupo de trabajos largos.
+        """
+        task = TaskFuture()
+        if on_progress is not None:
+
+            def progress_callback(*values):
+                if not task.cancelled:
+                    self.post(self._deliver, task, on_progress, values)
+
+            kwargs["progress_callback"] = progress_callback
+        if cancellable:
+            kwargs["cancel_event"] = task.cancel_event
+
+        def run():
+            if task.cancelled:
+                task.state = "cancelled"
+                return
+            task.state = "running"
+            with self._lock:
+                self._running += 1
+            try:
+                task.value = func(*args, **kwargs)
+                task.state = "done"
+                if on_success is not None:
+                    self.post(self._deliver, task, on_success, (task.value,))
+            except Exception as e:
+                task.error = e
+                task.state = "failed"
+                if on_error is not None:
+                    self.post(self._deliver, task, on_error, (e,))
+                else:
+                    print(f"⚠️ Error en tarea en segundo plano: {e}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        pool = self._get_background_pool() if background else self._get_pool()
+        task._future = pool.submit(run)
+        return task
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="task"
+                    )
+        return self._pool
+
+    def _get_background_pool(self):
+        if self._background_pool is None:
+            with self._lock:
+                if self._background_pool is None:
+                    self._background_pool = ThreadPoolExecutor(
+                        max_workers=self.background_workers,
+                        thread_name_prefix="background",
+                    )
+        return self._background_pool
+
+    def _deliver(self, task, callback, values):
+        if not task.cancelled:
+            callback(*values)
+
+    def _schedule(self, delay_ms):
+        try:
+            self._dispatch_id = self.root.after(delay_ms, self._dispatch)
+        except:
+            # La ventana se destruyó: se espera al siguiente attach
+            self._dispatch_id = None
+
+    def _dispatch(self):
+        self._dispatch_id = None
+        deadline = time.perf_counter() + DISPATCH_BUDGET_MS / 1000
+        delivered = False
+        # Presupuesto por vuelta: el resto espera a la siguiente y Tk sigue pintando
+        while time.perf_counter() < deadline:
+            try:
+                callback, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            delivered = True
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"⚠️ Error entregando tarea a la interfaz: {e}")
+
+        busy = delivered or self._running or not self._callbacks.empty()
+        self._schedule(DISPATCH_BUSY_MS if busy else DISPATCH_IDLE_MS)
+
+    def shutdown(self):
+        for pool in (self._pool, self._background_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._background_pool = None
+
+
+task_executor = TaskExecutor()
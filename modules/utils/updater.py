@@ -1,14 +1,12 @@
 import tkinter as tk
 from tkinter import ttk
-import requests
 import os
 import sys
 import subprocess
-import threading
 import tempfile
-from packaging import version
 from modules.components.widgets import ModernWidgets
 from modules.utils.helpers import WindowHelper
+from modules.utils.task_executor import task_executor
 from modules.config import APP_VERSION as CURRENT_VERSION, REPO_OWNER, REPO_NAME
 
 
@@ -32,7 +30,11 @@ class AppUpdater:
             self.on_start()
 
         self._create_update_modal()
-        threading.Thread(target=self._check_logic, daemon=True).start()
+        task_executor.submit(
+            self._check_logic,
+            on_success=self._on_check_finished,
+            on_error=lambda e: self._on_check_finished(("error", f"Error: {str(e)}")),
+        )
 
     def _create_update_modal(self):
         self.modal = tk.Toplevel(self.root)
@@ -97,44 +99,29 @@ class AppUpdater:
         self.btn_frame.pack(pady=10, fill="x")
 
     def _check_logic(self):
-        try:
-            response = requests.get(self.api_url, timeout=5)
-            if response.status_code != 200:
-                self.root.after(
-                    0, lambda: self._update_ui_state("error", "Error de conexión")
-                )
-                return
-
-            data = response.json()
-            latest_tag = data.get("tag_name", "0.0").replace("v", "")
-
-            if version.parse(latest_tag) > version.parse(CURRENT_VERSION):
-                exe_url = self._get_exe_url(data)
-                if exe_url:
-                    self.root.after(
-                        0,
-                        lambda: self._update_ui_state(
-                            "found", f"¡Nueva versión {latest_tag} disponible!", exe_url
-                        ),
-                    )
-                else:
-                    self.root.after(
-                        0,
-                        lambda: self._update_ui_state(
-                            "error", "Actualización detectada sin ejecutable."
-                        ),
-                    )
-            else:
-                self.root.after(0, lambda: self._update_ui_state("uptodate"))
-
-        except Exception as e:
-            self.root.after(
-                0, lambda: self._update_ui_state("error", f"Error: {str(e)}")
-            )
-
-        finally:
-            if self.on_finish:
-                self.root.after(0, self.on_finish)
+        """Corre en el ejecutor: devuelve (estado, mensaje[, url]) para la UI."""
+        # requests y packaging se cargan solo al buscar actualizaciones
+        import requests
+        from packaging import version
+
+        response = requests.get(self.api_url, timeout=5)
+        if response.status_code != 200:
+            return ("error", "Error de conexión")
+
+        data = response.json()
+        latest_tag = data.get("tag_name", "0.0").replace("v", "")
+
+        if version.parse(latest_tag) > version.parse(CURRENT_VERSION):
+            exe_url = self._get_exe_url(data)
+            if exe_url:
+                return ("found", f"¡Nueva versión {latest_tag} disponible!", exe_url)
+            return ("error", "Actualización detectada sin ejecutable.")
+        return ("uptodate",)
+
+    def _on_check_finished(self, result):
+        self._update_ui_state(*result)
+        if self.on_finish:
+            self.on_finish()
 
     def _get_exe_url(self, data):
         for asset in data.get("assets", []):
@@ -211,34 +198,44 @@ class AppUpdater:
         self.status_label.config(text="Descargando actualización...")
         self.info_label.config(text="Por favor espera, no cierres el programa.")
 
-        threading.Thread(target=self._download_logic, args=(url,), daemon=True).start()
+        task_executor.submit(
+            self._download_logic,
+            url,
+            on_progress=self._on_download_progress,
+            on_success=self._launch_installer,
+            on_error=lambda e: self._update_ui_state(
+                "error", f"Error de descarga: {e}"
+            ),
+        )
 
-    def _download_logic(self, url):
-        try:
-            temp_dir = tempfile.gettempdir()
-            installer_path = os.path.join(temp_dir, "BIGestPwd_Update.exe")
-
-            response = requests.get(url, stream=True)
-            total_size = int(response.headers.get("content-length", 0))
-            block_size = 8192
-            wrote = 0
-
-            with open(installer_path, "wb") as f:
-                for data in response.iter_content(block_size):
-                    size = f.write(data)
-                    wrote += size
-                    if total_size > 0:
-                        percent = (wrote / total_size) * 100
-                        self.root.after(
-                            0, lambda p=percent: self.progress_bar.configure(value=p)
-                        )
-
-            self.root.after(0, lambda: self._launch_installer(installer_path))
-
-        except Exception as e:
-            self.root.after(
-                0, lambda: self._update_ui_state("error", f"Error de descarga: {e}")
-            )
+    def _download_logic(self, url, progress_callback=None):
+        import requests
+
+        temp_dir = tempfile.gettempdir()
+        installer_path = os.path.join(temp_dir, "BIGestPwd_Update.exe")
+
+        response = requests.get(url, stream=True)
+        total_size = int(response.headers.get("content-length", 0))
+        block_size = 8192
+        wrote = 0
+        last_percent = -1
+
+        with open(installer_path, "wb") as f:
+            for data in response.iter_content(block_size):
+                size = f.write(data)
+                wrote += size
+                if total_size > 0 and progress_callback:
+                    # Un aviso por punto porcentual, no uno por bloque
+                    percent = int((wrote / total_size) * 100)
+                    if percent != last_percent:
+                        last_percent = percent
+                        progress_callback(percent)
+
+        return installer_path
+
+    def _on_download_progress(self, percent):
+        if self.modal and self.modal.winfo_exists():
+            self.progress_bar.configure(value=percent)
 
     def _launch_installer(self, path):
         self.status_label.config(text="Iniciando instalación...")
@@ -0,0 +1,187 @@
+import os
+import threading
+import tracemalloc
+import pytest
+from modules.encryption import DatabaseManager, SecureEncryption
+from modules.security.kdf import KdfParams
+from modules.security.attachments import AttachmentStore, ATTACHMENT_COMMIT_CHUNKS
+
+MASTER = "Master123!x"
+CHUNK = 1024
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db = DatabaseManager(SecureEncryption())
+    db.db_path = str(tmp_path / "vault.db")
+    assert db.configure_master_password(MASTER, KdfParams(iterations=1000))
+    return db
+
+
+@pytest.fixture
+def vault(manager):
+    session = manager.unlock(MASTER)
+    assert manager.add_password_entry(None, "con adjunto", "", "x", "", "", session)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def store(manager):
+    return AttachmentStore(manager, chunk_size=CHUNK)
+
+
+def write_file(tmp_path, size, name="adjunto.bin"):
+    path = tmp_path / name
+    data = os.urandom(size)
+    path.write_bytes(data)
+    return str(path), data
+
+
+def chunk_data(manager, attachment_id, index):
+    with manager._get_connection() as conn:
+        return conn.execute(
+            "SELECT data FROM attachment_chunks WHERE attachment_id = ? AND chunk_index = ?",
+            (attachment_id, index),
+        ).fetchone()[0]
+
+
+def set_chunk_data(manager, attachment_id, index, data):
+    with manager._get_connection() as conn:
+        conn.execute(
+            "UPDATE attachment_chunks SET data = ? WHERE attachment_id = ? AND chunk_index = ?",
+            (data, attachment_id, index),
+        )
+        conn.commit()
+
+
+@pytest.mark.parametrize("size", [0, CHUNK, 10 * CHUNK + 123])
+def test_round_trip(tmp_path, store, vault, size):
+    path, data = write_file(tmp_path, size)
+    attachment_id = store.add_attachment(1, path, vault)
+    row = store.get_attachment(attachment_id)
+    assert row["status"] == "complete"
+    assert row["chunk_count"] == max(1, -(-size // CHUNK))
+
+    assert b"".join(store.iter_attachment(attachment_id, vault)) == data
+    dest = str(tmp_path / "exportado.bin")
+    assert store.export_attachment(attachment_id, dest, vault)
+    with open(dest, "rb") as f:
+        assert f.read() == data
+
+
+def test_resume_after_cancel(tmp_path, store, vault):
+    path, data = write_file(tmp_path, 20 * CHUNK)
+    cancel_event = threading.Event()
+
+    def cancel_after_first_commit(done, total):
+        cancel_event.set()
+
+    assert (
+        store.add_attachment(1, path, vault, cancel_after_first_commit, cancel_event)
+        is None
+    )
+    (pending,) = store.pending_attachments()
+    assert pending["chunk_count"] == ATTACHMENT_COMMIT_CHUNKS
+    with pytest.raises(ValueError):
+        store.read_chunk(pending["id"], 0, vault)
+
+    assert store.resume_attachment(pending["id"], path, vault)
+    assert store.pending_attachments() == []
+    assert b"".join(store.iter_attachment(pending["id"], vault)) == data
+
+
+def test_resume_rejects_a_changed_file(tmp_path, store, vault):
+    path, data = write_file(tmp_path, 20 * CHUNK)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    store.add_attachment(1, path, vault, cancel_event=cancel_event)
+    (pending,) = store.pending_attachments()
+
+    with open(path, "ab") as f:
+        f.write(b"mas")
+    assert not store.resume_attachment(pending["id"], path, vault)
+
+
+def test_read_range_across_chunk_boundaries(tmp_path, store, vault):
+    path, data = write_file(tmp_path, 5 * CHUNK + 10)
+    attachment_id = store.add_attachment(1, path, vault)
+
+    assert (
+        store.read_range(attachment_id, CHUNK - 10, 20, vault)
+        == data[CHUNK - 10 : CHUNK + 10]
+    )
+    assert (
+        store.read_range(attachment_id, 100, 3 * CHUNK, vault)
+        == data[100 : 100 + 3 * CHUNK]
+    )
+    # Más allá del final se recorta; desde el final no hay nada
+    assert store.read_range(attachment_id, 5 * CHUNK, 100, vault) == data[5 * CHUNK :]
+    assert store.read_range(attachment_id, len(data), 10, vault) == b""
+
+
+def test_tampered_chunk_is_rejected(tmp_path, store, vault):
+    path, data = write_file(tmp_path, 4 * CHUNK)
+    attachment_id = store.add_attachment(1, path, vault)
+    blob = bytearray(chunk_data(store.manager, attachment_id, 2))
+    blob[-1] ^= 1
+    set_chunk_data(store.manager, attachment_id, 2, bytes(blob))
+
+    with pytest.raises(ValueError):
+        store.read_chunk(attachment_id, 2, vault)
+    dest = tmp_path / "exportado.bin"
+    assert not store.export_attachment(attachment_id, str(dest), vault)
+    assert not dest.exists()
+    assert not (tmp_path / "exportado.bin.part").exists()
+
+
+def test_reordered_chunks_are_rejected(tmp_path, store, vault):
+    path, data = write_file(tmp_path, 4 * CHUNK)
+    attachment_id = store.add_attachment(1, path, vault)
+    first = chunk_data(store.manager, attachment_id, 1)
+    second = chunk_data(store.manager, attachment_id, 2)
+    set_chunk_data(store.manager, attachment_id, 1, second)
+    set_chunk_data(store.manager, attachment_id, 2, first)
+
+    with pytest.raises(ValueError):
+        store.read_chunk(attachment_id, 1, vault)
+    with pytest.raises(ValueError):
+        store.read_chunk(attachment_id, 2, vault)
+
+
+def test_truncated_attachment_is_rejected(tmp_path, store, vault):
+    path, data = write_file(tmp_path, 4 * CHUNK)
+    attachment_id = store.add_attachment(1, path, vault)
+    with store.manager._get_connection() as conn:
+        conn.execute(
+            "DELETE FROM attachment_chunks WHERE attachment_id = ? AND chunk_index = 3",
+            (attachment_id,),
+        )
+        conn.execute(
+            "UPDATE attachments SET chunk_count = 3 WHERE id = ?", (attachment_id,)
+        )
+        conn.commit()
+
+    # El trozo 2 no se selló como último: el corte se detecta
+    with pytest.raises(ValueError):
+        store.read_chunk(attachment_id, 2, vault)
+
+
+def test_memory_does_not_grow_with_file_size(tmp_path, manager, vault):
+    chunk_size = 64 * 1024
+    store = AttachmentStore(manager, chunk_size=chunk_size)
+    path, data = write_file(tmp_path, 256 * chunk_size)
+    dest = str(tmp_path / "exportado.bin")
+    del data
+
+    tracemalloc.start()
+    try:
+        attachment_id = store.add_attachment(1, path, vault)
+        assert store.export_attachment(attachment_id, dest, vault)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # 16 MB de archivo; en memoria solo un lote de trozos sin confirmar
+    assert peak < 2 * ATTACHMENT_COMMIT_CHUNKS * chunk_size + 512 * 1024
+    assert os.path.getsize(dest) == 256 * chunk_size
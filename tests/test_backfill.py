@@ -0,0 +1,90 @@
+import pytest
+from modules.encryption import (
+    DatabaseManager,
+    SecureEncryption,
+    KEY_VERSION_RECORD,
+    RECORD_EMPTY_SALT,
+)
+from modules.security.kdf import KdfParams
+
+MASTER = "Master123!x"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db = DatabaseManager(SecureEncryption())
+    db.db_path = str(tmp_path / "vault.db")
+    assert db.configure_master_password(MASTER, KdfParams(iterations=1000))
+    return db
+
+
+@pytest.fixture
+def vault(manager):
+    session = manager.unlock(MASTER)
+    yield session
+    session.close()
+
+
+def add_unfilled_entry(manager, vault, password):
+    # Fila anterior a las columnas de salud: sin epochs ni HMAC
+    record = manager.encryption.seal_record(password, vault.data_key)
+    with manager._get_connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO password_entries (title, encrypted_password, password_salt, key_version, strength) VALUES ('antigua', ?, ?, ?, 0)",
+            (record, RECORD_EMPTY_SALT, KEY_VERSION_RECORD),
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+
+def read_row(manager, entry_id):
+    with manager._get_connection() as conn:
+        return conn.execute(
+            "SELECT strength, updated_epoch FROM password_entries WHERE id = ?",
+            (entry_id,),
+        ).fetchone()
+
+
+def test_health_backfill_keeps_edit_made_during_batch(manager, vault, monkeypatch):
+    entry_id = add_unfilled_entry(manager, vault, "abc")
+    decrypt = manager._decrypt_value
+
+    def decrypt_then_edit(*args):
+        value = decrypt(*args)
+        # El usuario guarda una contraseña fuerte mientras el lote está en vuelo
+        manager.update_password_entry(
+            entry_id, None, "antigua", "", "Fuerte!Larga#2024xyz", "", "", vault
+        )
+        return value
+
+    monkeypatch.setattr(manager, "_decrypt_value", decrypt_then_edit)
+    manager.backfill_entry_health(vault)
+
+    edited = read_row(manager, entry_id)
+    monkeypatch.undo()
+    assert edited[0] >= 4
+    assert manager.get_secret(entry_id, vault) == "Fuerte!Larga#2024xyz"
+
+
+def test_hmac_backfill_stops_when_vault_is_closed(manager, vault):
+    for i in range(5):
+        add_unfilled_entry(manager, vault, f"pwd{i}")
+    vault.close()
+    version = manager.entries_version
+
+    assert manager.backfill_password_hmac(vault, batch_size=2) == 0
+    assert manager.entries_version == version
+    assert manager.has_pending_hmac()
+
+
+def test_hmac_backfill_fills_rows_and_honours_cancel(manager, vault):
+    import threading
+
+    for i in range(3):
+        add_unfilled_entry(manager, vault, "repetida")
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert manager.backfill_password_hmac(vault, cancel_event=cancel_event) == 0
+
+    assert manager.backfill_password_hmac(vault) == 3
+    assert [len(group) for group in manager.get_reuse_groups()] == [3]
@@ -0,0 +1,49 @@
+import os
+import time
+import pytest
+from modules.security.file_encryption import (
+    FileEncryption,
+    FILE_HEADER,
+    FILE_MAGIC,
+    FILE_FORMAT_VERSION,
+    KDF_PBKDF2_SHA256,
+    CIPHER_FERNET,
+    FILE_KDF_ITERATIONS,
+    FILE_KDF_MAX_ITERATIONS,
+)
+
+
+def crafted_file(path, iterations):
+    salt = os.urandom(32)
+    header = FILE_HEADER.pack(
+        FILE_MAGIC,
+        FILE_FORMAT_VERSION,
+        KDF_PBKDF2_SHA256,
+        iterations,
+        len(salt),
+        CIPHER_FERNET,
+    )
+    path.write_bytes(header + salt + b"gAAAAA-no-es-fernet")
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "iterations", [0, FILE_KDF_ITERATIONS - 1, FILE_KDF_MAX_ITERATIONS + 1, 2**32 - 1]
+)
+def test_header_with_out_of_range_cost_is_rejected(tmp_path, iterations):
+    path = crafted_file(tmp_path / "validator.bypass", iterations)
+
+    start = time.perf_counter()
+    with pytest.raises(ValueError, match="fuera de rango"):
+        FileEncryption().read_secure_file(path, "Master123!")
+    # Se rechaza antes de derivar nada
+    assert time.perf_counter() - start < 0.5
+
+
+def test_secure_file_round_trip(tmp_path):
+    path = str(tmp_path / "master_key.enc")
+    fe = FileEncryption()
+    assert fe.create_secure_file(path, "contenido", "Master123!")
+    iterations = fe.parse_header(open(path, "rb").read())[0]
+    assert FILE_KDF_ITERATIONS <= iterations <= FILE_KDF_MAX_ITERATIONS
+    assert fe.read_secure_file(path, "Master123!") == "contenido"
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_modules_touches_no_disk(tmp_path):
+    env = dict(os.environ, LOCALAPPDATA=str(tmp_path / "appdata"))
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "import modules.encryption, modules.categories, modules.auth.multi_factor"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code, ROOT], cwd=tmp_path, env=env, check=True
+    )
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,90 @@
+import time
+import pytest
+import modules.encryption as encryption
+from modules.encryption import (
+    DatabaseManager,
+    SecureEncryption,
+    KEY_VERSION_RECORD,
+    RECORD_EMPTY_SALT,
+)
+from modules.security.kdf import DEFAULT_TARGET_MS, KDF_PBKDF2_SHA256, calibrate
+
+ENTRY_COUNT = 10_000
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db = DatabaseManager(SecureEncryption())
+    db.db_path = str(tmp_path / "vault.db")
+    return db
+
+
+@pytest.fixture
+def count_kdf(monkeypatch):
+    calls = []
+    derive = encryption.derive_key
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return derive(*args, **kwargs)
+
+    monkeypatch.setattr(encryption, "derive_key", counting)
+    return calls
+
+
+def fill_vault(manager, data_key, count):
+    record = manager.encryption.seal_record("secreto", data_key)
+    with manager._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO password_entries (title, encrypted_password, password_salt, key_version) VALUES (?, ?, ?, ?)",
+            [
+                (f"entrada {i}", record, RECORD_EMPTY_SALT, KEY_VERSION_RECORD)
+                for i in range(count)
+            ],
+        )
+        conn.commit()
+
+
+def test_configure_derives_once(manager, count_kdf):
+    params = calibrate(KDF_PBKDF2_SHA256, 50)
+    assert manager.configure_master_password("Original123!", params)
+    assert len(count_kdf) == 1
+    assert manager.verify_master_password("Original123!")
+    assert not manager.verify_master_password("Otra123!")
+
+
+def test_change_master_on_large_vault_is_fast(manager, count_kdf):
+    # KDF calibrado como en una bóveda real
+    params = calibrate(KDF_PBKDF2_SHA256, DEFAULT_TARGET_MS)
+    assert manager.configure_master_password("Original123!", params)
+    data_key = manager.unlock_data_key("Original123!")
+    fill_vault(manager, data_key, ENTRY_COUNT)
+    count_kdf.clear()
+
+    start = time.perf_counter()
+    assert manager.change_master_password("Original123!", "Nueva456!")
+    elapsed = time.perf_counter() - start
+
+    # Desbloquear con la antigua y envolver con la nueva; nada por entrada
+    assert len(count_kdf) == 2
+    assert elapsed < 1.0
+
+    assert manager.unlock_data_key("Original123!") is None
+    assert manager.unlock_data_key("Nueva456!") == data_key
+    vault = manager.unlock("Nueva456!")
+    try:
+        assert manager.get_secret(ENTRY_COUNT, vault) == "secreto"
+    finally:
+        vault.close()
+
+
+def test_change_with_wrong_password_is_rejected_in_one_derivation(manager, count_kdf):
+    params = calibrate(KDF_PBKDF2_SHA256, 50)
+    assert manager.configure_master_password("Original123!", params)
+    count_kdf.clear()
+
+    with pytest.raises(ValueError):
+        manager.change_master_password("Otra123!", "Nueva456!")
+    # El intento fallido es la única comprobación: sin verificación aparte
+    assert len(count_kdf) == 1
+    assert manager.verify_master_password("Original123!")
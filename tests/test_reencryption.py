@@ -0,0 +1,199 @@
+import pytest
+from modules.encryption import (
+    DatabaseManager,
+    SecureEncryption,
+    KEY_VERSION_DATA_KEY,
+    KEY_VERSION_RECORD,
+)
+from modules.security.kdf import KdfParams
+from modules.security.reencryption import ReencryptionRunner, data_key_to_record_job
+
+MASTER = "Master123!x"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db = DatabaseManager(SecureEncryption())
+    db.db_path = str(tmp_path / "vault.db")
+    assert db.configure_master_password(MASTER, KdfParams(iterations=1000))
+    return db
+
+
+@pytest.fixture
+def vault(manager):
+    session = manager.unlock(MASTER)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def runner(manager):
+    return ReencryptionRunner(manager, batch_size=2)
+
+
+def add_data_key_entries(manager, vault, passwords):
+    # Filas de versión 1 anteriores a las columnas de salud: sin epochs
+    rows = []
+    for password in passwords:
+        token, salt = manager.encryption.encrypt_with_key(password, vault.data_key)
+        rows.append((token, salt, KEY_VERSION_DATA_KEY))
+    with manager._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO password_entries (title, encrypted_password, password_salt, key_version) VALUES ('antigua', ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+
+def test_reseal_fills_strength_and_epochs(manager, vault, runner):
+    add_data_key_entries(manager, vault, ["abc", "Fuerte!Larga#2024xyz"])
+    assert manager.has_pending_health()
+
+    assert runner.run(data_key_to_record_job(), vault)
+
+    # Los rellenos de salud y HMAC ya no tienen nada que descifrar
+    assert not manager.has_pending_health()
+    assert not manager.has_pending_hmac()
+    entries = {e["id"]: e for e in manager.query_password_entries()}
+    assert entries[1]["strength"] < entries[2]["strength"]
+    with manager._get_connection() as conn:
+        versions = conn.execute(
+            "SELECT DISTINCT key_version FROM password_entries"
+        ).fetchall()
+    assert versions == [(KEY_VERSION_RECORD,)]
+
+
+def cancel_after_first_batch(cancel_event):
+    def progress(done, total):
+        if done:
+            cancel_event.set()
+
+    return progress
+
+
+def secrets(manager, vault):
+    return [
+        manager.get_secret(e["id"], vault) for e in manager.query_password_entries()
+    ]
+
+
+def test_journal_status_goes_from_running_to_done(manager, vault, runner):
+    add_data_key_entries(manager, vault, [f"pwd{i}" for i in range(5)])
+    job = data_key_to_record_job()
+    statuses = []
+
+    def progress(done, total):
+        statuses.append(runner.get_journal(job)["status"])
+
+    assert runner.run(job, vault, progress)
+    assert set(statuses) == {"running"}
+    journal = runner.get_journal(job)
+    assert (journal["status"], journal["total"], journal["done"]) == ("done", 5, 5)
+    assert journal["last_id"] == 5
+
+
+def test_cancel_then_resume(manager, vault, runner):
+    import threading
+
+    add_data_key_entries(manager, vault, [f"pwd{i}" for i in range(5)])
+    job = data_key_to_record_job()
+    cancel_event = threading.Event()
+
+    assert not runner.run(
+        job, vault, cancel_after_first_batch(cancel_event), cancel_event
+    )
+    journal = runner.get_journal(job)
+    assert (journal["status"], journal["done"], journal["last_id"]) == (
+        "cancelled",
+        2,
+        2,
+    )
+    assert runner.pending(job) == 3
+
+    assert runner.run(job, vault)
+    journal = runner.get_journal(job)
+    assert (journal["status"], journal["total"], journal["done"]) == ("done", 5, 5)
+    assert secrets(manager, vault) == [f"pwd{i}" for i in range(5)]
+
+
+def test_resume_after_crash_while_running(manager, vault, runner):
+    add_data_key_entries(manager, vault, [f"pwd{i}" for i in range(5)])
+    job = data_key_to_record_job()
+
+    def crash(done, total):
+        if done:
+            raise RuntimeError("proceso terminado")
+
+    with pytest.raises(RuntimeError):
+        runner.run(job, vault, crash)
+    # El primer lote se confirmó; el diario quedó en 'running'
+    assert runner.get_journal(job)["status"] == "running"
+    assert runner.pending(job) == 3
+
+    assert ReencryptionRunner(manager, batch_size=2).run(job, vault)
+    journal = runner.get_journal(job)
+    assert (journal["status"], journal["total"], journal["done"]) == ("done", 5, 5)
+    assert secrets(manager, vault) == [f"pwd{i}" for i in range(5)]
+
+
+def test_edit_during_batch_is_not_overwritten(manager, vault, runner, monkeypatch):
+    add_data_key_entries(manager, vault, ["vieja"])
+    job = data_key_to_record_job()
+    reseal = job.reseal_row
+
+    def reseal_then_edit(row, vault):
+        resealed = reseal(row, vault)
+        # El usuario guarda la entrada mientras el lote está en vuelo
+        manager.update_password_entry(
+            row[0], None, "antigua", "", "nueva", "", "", vault
+        )
+        return resealed
+
+    monkeypatch.setattr(job, "reseal_row", reseal_then_edit)
+    assert runner.run(job, vault)
+    assert manager.get_secret(1, vault) == "nueva"
+
+
+def test_second_run_of_a_job_waits_for_the_first(manager, vault, runner, monkeypatch):
+    import threading
+
+    add_data_key_entries(manager, vault, [f"pwd{i}" for i in range(3)])
+    job = data_key_to_record_job()
+    reseal = job.reseal_row
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_reseal(row, vault):
+        started.set()
+        release.wait(5)
+        return reseal(row, vault)
+
+    monkeypatch.setattr(job, "reseal_row", blocking_reseal)
+    results = {}
+    first = threading.Thread(
+        target=lambda: results.update(first=runner.run(job, vault))
+    )
+    first.start()
+    assert started.wait(5)
+
+    # Cancelada mientras espera: sale sin tocar el diario
+    cancelled = threading.Event()
+    cancelled.set()
+    assert not runner.run(data_key_to_record_job(), vault, cancel_event=cancelled)
+    assert runner.get_journal(job)["status"] == "running"
+
+    second = threading.Thread(
+        target=lambda: results.update(
+            second=runner.run(data_key_to_record_job(), vault)
+        )
+    )
+    second.start()
+    second.join(0.3)
+    assert second.is_alive()
+
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert results == {"first": True, "second": True}
+    assert runner.get_journal(job)["status"] == "done"
+    assert secrets(manager, vault) == [f"pwd{i}" for i in range(3)]
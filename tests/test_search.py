@@ -0,0 +1,68 @@
+import sqlite3
+import pytest
+from modules.encryption import DatabaseManager, SecureEncryption
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db = DatabaseManager(SecureEncryption())
+    db.db_path = str(tmp_path / "vault.db")
+    with db._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO password_entries (title, username, encrypted_password, password_salt) VALUES (?, ?, x'00', x'00')",
+            [
+                ("Facebook", "ana"),
+                ("Bookmarks", "luis"),
+                ("Banco", "entry"),
+            ],
+        )
+        conn.commit()
+    return db
+
+
+def titles(entries):
+    return [e["title"] for e in entries]
+
+
+def test_word_prefix_uses_the_index(manager):
+    assert titles(manager.query_password_entries(search="face")) == ["Facebook"]
+    # Hay palabras que empiezan por "book": solo esas, no las subcadenas
+    assert titles(manager.query_password_entries(search="book")) == ["Bookmarks"]
+
+
+def test_substring_falls_back_to_like(manager):
+    assert titles(manager.query_password_entries(search="ceboo")) == ["Facebook"]
+    assert titles(manager.query_password_entries(search="ntry")) == ["Banco"]
+    assert manager.fts_enabled
+
+
+def test_keyset_page_after_fts_results_stays_empty(manager):
+    first = manager.query_password_entries(search="book", limit=1)
+    assert titles(first) == ["Bookmarks"]
+    assert (
+        manager.query_password_entries(
+            search="book", after_title="Bookmarks", after_id=first[0]["id"]
+        )
+        == []
+    )
+
+
+def test_transient_error_keeps_fts_enabled(manager, monkeypatch):
+    select = manager._select_entries
+
+    def locked_once(category_id, search, fts_query, *args):
+        if fts_query:
+            raise sqlite3.OperationalError("database is locked")
+        return select(category_id, search, fts_query, *args)
+
+    monkeypatch.setattr(manager, "_select_entries", locked_once)
+    assert titles(manager.query_password_entries(search="face")) == ["Facebook"]
+    assert manager.fts_enabled
+
+
+def test_missing_fts_table_disables_index(manager):
+    with manager._get_connection() as conn:
+        conn.execute("DROP TABLE password_entries_fts")
+        conn.commit()
+    assert titles(manager.query_password_entries(search="face")) == ["Facebook"]
+    assert not manager.fts_enabled
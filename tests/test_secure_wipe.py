@@ -0,0 +1,65 @@
+import os
+import pytest
+from modules.security.secure_wipe import SecureWiper
+
+
+def make_symlink(target, link, directory=False):
+    try:
+        os.symlink(target, link, target_is_directory=directory)
+    except (OSError, NotImplementedError):
+        pytest.skip("El sistema no permite crear enlaces simbólicos")
+
+
+def test_wipe_tree_removes_files(tmp_path):
+    tree = tmp_path / "tree"
+    (tree / "sub").mkdir(parents=True)
+    (tree / "a.bin").write_bytes(os.urandom(3000))
+    (tree / "sub" / "b.bin").write_bytes(b"secreto")
+
+    report = SecureWiper(block_size=1024, passes=1).wipe_tree(str(tree))
+
+    assert not tree.exists()
+    assert report.files == 2
+    assert report.failed == []
+
+
+def test_wipe_tree_does_not_follow_file_symlink(tmp_path):
+    outside = tmp_path / "outside.txt"
+    outside.write_bytes(b"no tocar")
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    (tree / "own.txt").write_bytes(b"borrar")
+    make_symlink(os.path.join("..", "outside.txt"), tree / "link.txt")
+
+    report = SecureWiper(passes=1).wipe_tree(str(tree))
+
+    assert outside.read_bytes() == b"no tocar"
+    assert not tree.exists()
+    assert report.files == 1
+    assert report.links == 1
+
+
+def test_wipe_tree_does_not_descend_into_linked_directory(tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "keep.txt").write_bytes(b"no tocar")
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    make_symlink(str(outside), tree / "linked_dir", directory=True)
+
+    SecureWiper(passes=1).wipe_tree(str(tree))
+
+    assert (outside / "keep.txt").read_bytes() == b"no tocar"
+    assert not tree.exists()
+
+
+def test_wipe_file_on_symlink_removes_only_the_link(tmp_path):
+    target = tmp_path / "target.txt"
+    target.write_bytes(b"no tocar")
+    link = tmp_path / "link.txt"
+    make_symlink(str(target), link)
+
+    assert SecureWiper(passes=1).wipe_file(str(link)) == 0
+
+    assert not os.path.lexists(link)
+    assert target.read_bytes() == b"no tocar"
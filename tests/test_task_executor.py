@@ -0,0 +1,40 @@
+import threading
+import pytest
+from modules.utils.task_executor import TaskExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = TaskExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+def test_background_jobs_leave_the_ui_workers_free(executor):
+    started = threading.Event()
+    release = threading.Event()
+
+    def long_job():
+        started.set()
+        return release.wait(5)
+
+    jobs = [executor.submit(long_job, background=True) for _ in range(3)]
+    assert started.wait(5)
+
+    # Las consultas de la interfaz no esperan a los trabajos largos
+    assert executor.submit(lambda: "filas").result(timeout=1) == "filas"
+    assert [job.state for job in jobs] == ["running", "pending", "pending"]
+
+    release.set()
+    assert all(job.result(timeout=5) for job in jobs)
+
+
+def test_background_jobs_run_in_submission_order(executor):
+    order = []
+    jobs = [
+        executor.submit(order.append, name, background=True)
+        for name in ("re-cifrado", "salud", "hmac")
+    ]
+    for job in jobs:
+        job.result(timeout=5)
+    assert order == ["re-cifrado", "salud", "hmac"]
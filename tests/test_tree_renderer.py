@@ -0,0 +1,63 @@
+import random
+from modules.components.tree_renderer import TreeRenderer
+
+
+class FakeTree:
+    """Lo justo de ttk.Treeview; ``move`` cuenta el índice sin la propia fila."""
+
+    def __init__(self):
+        self.children = []
+        self.items = {}
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def insert(self, parent, index, iid, values, tags):
+        if index == "end":
+            self.children.append(iid)
+        else:
+            self.children.insert(index, iid)
+        self.items[iid] = (values, tags)
+
+    def move(self, iid, parent, index):
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def item(self, iid, values=None, tags=None):
+        self.items[iid] = (values, tags)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.children.remove(iid)
+            del self.items[iid]
+
+    def index(self, iid):
+        return self.children.index(iid)
+
+    def get_children(self):
+        return list(self.children)
+
+
+def rows_for(ids):
+    return [(db_id, ("●", "cat", f"título {db_id}", ""), "#10b981") for db_id in ids]
+
+
+def test_reorder_moves_row_before_its_anchor():
+    tree = FakeTree()
+    renderer = TreeRenderer(tree)
+    renderer.render(rows_for([1, 2, 3, 4]))
+
+    renderer.render(rows_for([2, 3, 1, 4]))
+
+    assert tree.children == ["2", "3", "1", "4"]
+
+
+def test_random_diffs_match_desired_order():
+    rng = random.Random(7)
+    tree = FakeTree()
+    renderer = TreeRenderer(tree)
+    for _ in range(200):
+        ids = rng.sample(range(300), rng.randint(0, 250))
+        renderer.render(rows_for(ids))
+        assert tree.children == [str(db_id) for db_id in ids]
+        assert renderer.order == ids